@@ -4,81 +4,130 @@
 import os
 from typing import Optional, Dict, Any, List
 
+from .fingerprint import DATE_FIELDS, listing_fingerprint, normalize_date
+from .postgrest import PostgrestClient, quote_list
+
 SUPABASE_URL = os.environ.get("SUPABASE_URL", "")
 SUPABASE_KEY = os.environ.get("SUPABASE_KEY", "")
 
-def get_supabase():
-    """Get Supabase client for scraper (uses requests)"""
-    # Only import when actually called (not at module load)
-    import requests
-
-    class SupabaseClient:
-        def __init__(self, url, key):
-            self.url = url
-            self.key = key
-            self.session = requests.Session()
-            self.session.headers.update({
-                "apikey": key,
-                "Authorization": f"Bearer {key}",
-                "Content-Type": "application/json",
-                "Prefer": "return=representation"
-            })
-
-        def table(self, name):
-            return SupabaseTable(self, name)
-
-    class SupabaseTable:
-        def __init__(self, client, name):
-            self.client = client
-            self.name = name
-            self.url = f"{client.url}/rest/v1/{name}"
-
-        def upsert(self, data, on_conflict=None):
-            headers = {"Prefer": "resolution=merge-duplicates,return=representation"}
-            url = self.url
-            if on_conflict:
-                url += f"?on_conflict={on_conflict}"
-            response = self.client.session.post(url, json=data, headers=headers)
-            response.raise_for_status()
-            return type('Result', (), {'data': response.json() if response.text else []})()
-
-        def update(self, data):
-            return SupabaseQuery(self, "PATCH", data)
-
-        def select(self, columns="*"):
-            return SupabaseQuery(self, "GET", select=columns)
-
-    class SupabaseQuery:
-        def __init__(self, table, method, data=None, select="*"):
-            self.table = table
-            self.method = method
-            self.data = data
-            self.params = {"select": select} if method == "GET" else {}
-            self.filters = []
-
-        def eq(self, column, value):
-            self.filters.append(f"{column}=eq.{value}")
-            return self
-
-        def lt(self, column, value):
-            self.filters.append(f"{column}=lt.{value}")
-            return self
-
-        def execute(self):
-            url = self.table.url
-            if self.filters:
-                url += "?" + "&".join(self.filters)
-                if self.params:
-                    url += "&" + "&".join(f"{k}={v}" for k, v in self.params.items())
-            elif self.params:
-                url += "?" + "&".join(f"{k}={v}" for k, v in self.params.items())
-
-            if self.method == "GET":
-                response = self.table.client.session.get(url)
-            else:
-                response = self.table.client.session.patch(url, json=self.data)
-
-            response.raise_for_status()
-            return type('Result', (), {'data': response.json() if response.text else []})()
-
-    return SupabaseClient(SUPABASE_URL, SUPABASE_KEY)
+def get_supabase(pool_size: Optional[int] = None, timeout: Optional[float] = None) -> PostgrestClient:
+    """
+    Get the PostgREST client for the scraper. Pool size and read timeout
+    default to SUPABASE_POOL_SIZE (8) and SUPABASE_TIMEOUT (60 seconds).
+    """
+    pool_size = pool_size or int(os.environ.get("SUPABASE_POOL_SIZE", "8"))
+    timeout = timeout or float(os.environ.get("SUPABASE_TIMEOUT", "60"))
+    return PostgrestClient(SUPABASE_URL, SUPABASE_KEY, pool_size=pool_size, timeout=(5.0, timeout))
+
+
+# propiedades columns filled from detail pages -> scraped property keys
+DETAIL_COLUMNS = {
+    "fotos": "fotos",
+    "descripcion": "descripcion",
+    "ambientes": "ambientes",
+    "dormitorios": "dormitorios",
+    "banos": "banos",
+    "metros_cuadrados": "metrosCuadrados",
+    "metros_totales": "metrosTotales",
+    "fecha_publicacion": "fechaPublicacion",
+}
+
+
+def fetch_existing_listings(supabase, fuente: str, external_ids: List[str], chunk_size: int = 100) -> Dict[str, Dict[str, Any]]:
+    """
+    Bulk lookup of stored listings for one source.
+    Returns external_id -> {"fingerprint": "...", "detail": {...}}, where
+    detail holds the stored DETAIL_COLUMNS under their scraped keys, with
+    dates as YYYY-MM-DD like scraped ones.
+    """
+    columns = ",".join(["external_id", "titulo", "precio", "moneda", *DETAIL_COLUMNS])
+    existing = {}
+    ids = list(dict.fromkeys(external_ids))
+    queries = [
+        supabase.table("propiedades").select(columns).eq("fuente", fuente).in_("external_id", ids[start:start + chunk_size])
+        for start in range(0, len(ids), chunk_size)
+    ]
+    for result in supabase.execute_many(queries):
+        for row in result.data:
+            existing[row["external_id"]] = {
+                "fingerprint": listing_fingerprint(row),
+                "detail": {
+                    key: normalize_date(row.get(column)) if column in DATE_FIELDS else row.get(column)
+                    for column, key in DETAIL_COLUMNS.items()
+                },
+            }
+    return existing
+
+
+def fetch_existing_ids(supabase, fuente: str, external_ids: List[str], chunk_size: int = 100) -> set:
+    """Which of the given external IDs are already stored for a source"""
+    existing = set()
+    ids = list(dict.fromkeys(external_ids))
+    queries = [
+        supabase.table("propiedades").select("external_id").eq("fuente", fuente).in_("external_id", ids[start:start + chunk_size])
+        for start in range(0, len(ids), chunk_size)
+    ]
+    for result in supabase.execute_many(queries):
+        existing.update(row["external_id"] for row in result.data)
+    return existing
+
+
+def fetch_content_hashes(supabase, fuente: str, barrios: List[str], page_size: int = 1000) -> Dict[str, Optional[str]]:
+    """
+    Stored content_hash of every listing of a source in the given barrios,
+    as external_id -> content_hash. One query, streamed page_size rows at a time.
+    """
+    if not barrios:
+        return {}
+    query = (
+        supabase.table("propiedades")
+        .select("external_id,content_hash")
+        .eq("fuente", fuente)
+        .in_("barrio", barrios)
+        .order("id")
+    )
+    return {row["external_id"]: row.get("content_hash") for row in query.stream(page_size)}
+
+
+def touch_properties(
+    supabase, fuente: str, external_ids: List[str], seen_at: str, run_id: Optional[str] = None, chunk_size: int = 200
+) -> int:
+    """
+    Mark unchanged listings as seen (fecha_ultimo_visto, and ultima_corrida
+    when run_id is given) without rewriting them; the update triggers skip
+    seen-only updates. Returns rows touched.
+    """
+    data = {"fecha_ultimo_visto": seen_at, "activo": True}
+    if run_id:
+        data["ultima_corrida"] = run_id
+    ids = list(dict.fromkeys(external_ids))
+    supabase.execute_many(
+        supabase.table("propiedades").update(data, returning="minimal").eq("fuente", fuente).in_("external_id", ids[start:start + chunk_size])
+        for start in range(0, len(ids), chunk_size)
+    )
+    return len(ids)
+
+
+def deactivate_unseen(supabase, run_id: str, units: Dict[str, List[str]], seen_before: str) -> int:
+    """
+    Deactivate the active listings of the completely crawled (fuente, barrio)
+    units that this run didn't see and that weren't seen since seen_before.
+    One set-based UPDATE; only the count comes back. units maps fuente ->
+    barrios. Returns the number of rows deactivated.
+    """
+    conditions = ",".join(
+        f"and(fuente.eq.{fuente},barrio.in.({quote_list(barrios)}))"
+        for fuente, barrios in units.items() if barrios
+    )
+    if not conditions:
+        return 0
+    result = (
+        supabase.table("propiedades")
+        .update({"activo": False}, returning="minimal", count="exact")
+        .eq("activo", "true")
+        .neq("ultima_corrida", run_id)
+        .lt("fecha_ultimo_visto", seen_before)
+        .or_(conditions)
+        .execute()
+    )
+    return result.count or 0
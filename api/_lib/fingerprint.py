@@ -0,0 +1,74 @@
+# Stable fingerprints of scraped listings, used to tell whether a listing
+# changed since it was last stored
+
+import hashlib
+import json
+from datetime import date
+from typing import Any, Dict, Optional
+
+# propiedades columns a user can see. A row whose content_hash over these
+# is unchanged doesn't need rewriting, only marking as seen.
+CONTENT_FIELDS = (
+    "url",
+    "titulo",
+    "precio",
+    "moneda",
+    "barrio",
+    "tipo",
+    "ambientes",
+    "dormitorios",
+    "banos",
+    "metros_cuadrados",
+    "metros_totales",
+    "fotos",
+    "descripcion",
+    "operacion",
+    "fecha_publicacion",
+)
+
+# Fields shown on a search result card. If none of these changed, the
+# detail page (and its photos) is assumed unchanged too.
+CARD_FIELDS = ("titulo", "precio", "moneda")
+
+
+# Date columns, stored as TIMESTAMPTZ but scraped as YYYY-MM-DD
+DATE_FIELDS = ("fecha_publicacion",)
+
+
+def normalize_date(value: Any) -> Optional[str]:
+    """
+    YYYY-MM-DD for a date, datetime or ISO string, so a date read back
+    from PostgREST ("2024-03-15T00:00:00+00:00") equals the scraped one
+    """
+    if isinstance(value, date):
+        return value.isoformat()[:10]
+    if isinstance(value, str) and len(value) >= 10:
+        return value[:10]
+    return value
+
+
+def _normalize(value: Any) -> Any:
+    # Supabase returns DECIMAL columns as numbers that may or may not
+    # carry a fractional part; compare them as floats
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def listing_fingerprint(prop: Dict[str, Any]) -> str:
+    """
+    Short hash of the card fields of a property. Works on both scraped
+    dicts and propiedades rows, since these columns share their names.
+    """
+    payload = json.dumps([_normalize(prop.get(field)) for field in CARD_FIELDS], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def content_hash(row: Dict[str, Any]) -> str:
+    """Hash of the CONTENT_FIELDS of a propiedades row, stored as its content_hash"""
+    values = [
+        normalize_date(row.get(field)) if field in DATE_FIELDS else _normalize(row.get(field))
+        for field in CONTENT_FIELDS
+    ]
+    payload = json.dumps(values, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
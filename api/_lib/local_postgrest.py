@@ -0,0 +1,383 @@
+# In-process PostgREST stand-in for offline runs and benchmarks. Serves the
+# subset of the REST API that database.py / postgrest.py and the api/
+# handlers use, from in-memory tables.
+
+import json
+import threading
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+# Column defaults and unique keys from supabase/schema.sql
+TABLES = {
+    "propiedades": {
+        "unique": ("external_id", "fuente"),
+        "defaults": {
+            "id": lambda: str(uuid.uuid4()),
+            "moneda": lambda: "USD",
+            "fotos": lambda: [],
+            "operacion": lambda: "venta",
+            "fecha_primer_visto": lambda: _now(),
+            "fecha_ultima_actualizacion": lambda: _now(),
+            "fecha_ultimo_visto": lambda: _now(),
+            "activo": lambda: True,
+            "ultima_corrida": lambda: "",
+            "content_hash": lambda: None,
+        },
+    },
+    "historial_precios": {
+        "unique": ("id",),
+        "defaults": {
+            "id": lambda: str(uuid.uuid4()),
+            "moneda": lambda: "USD",
+            "fecha_cambio": lambda: _now(),
+        },
+    },
+    "corridas": {
+        "unique": ("id",),
+        "defaults": {"unidades": lambda: {}, "desactivadas": lambda: 0},
+    },
+}
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+class PostgrestRequestError(Exception):
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+def _split(text: str) -> List[str]:
+    """Split on top-level commas, minding parentheses and double quotes"""
+    parts, depth, quoted, escaped, current = [], 0, False, False, []
+    for char in text:
+        if escaped:
+            current.append(char)
+            escaped = False
+            continue
+        if char == "\\" and quoted:
+            current.append(char)
+            escaped = True
+            continue
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    if current or parts:
+        parts.append("".join(current))
+    return parts
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        value = value[1:-1]
+        out, escaped = [], False
+        for char in value:
+            if escaped or char != "\\":
+                out.append(char)
+                escaped = False
+            else:
+                escaped = True
+        return "".join(out)
+    return value
+
+
+def _coerce(value: Any, text: str) -> Any:
+    """Turn a filter literal into the type of the stored value"""
+    if isinstance(value, bool):
+        return text.lower() == "true"
+    if isinstance(value, (int, float)):
+        try:
+            return float(text)
+        except ValueError:
+            return text
+    return text
+
+
+def _compare(value: Any, op: str, text: str) -> bool:
+    if op == "is":
+        literal = text.lower()
+        if literal == "null":
+            return value is None
+        return value is (literal == "true")
+    if value is None:
+        # SQL: comparisons with NULL are never true
+        return False
+    if op == "in":
+        items = [_unquote(item) for item in _split(text[1:-1])] if text.startswith("(") else []
+        return any(value == _coerce(value, item) for item in items)
+    other = _coerce(value, _unquote(text))
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and isinstance(other, str):
+        return False
+    if op == "eq":
+        return value == other
+    if op == "neq":
+        return value != other
+    if op == "lt":
+        return value < other
+    if op == "lte":
+        return value <= other
+    if op == "gt":
+        return value > other
+    if op == "gte":
+        return value >= other
+    raise PostgrestRequestError(400, "PGRST100", f"unsupported operator {op}")
+
+
+def _condition(column: str, expression: str) -> Callable[[Dict[str, Any]], bool]:
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, text = expression.partition(".")
+    return lambda row: _compare(row.get(column), op, text) != negate
+
+
+def _logic(kind: str, tree: str) -> Callable[[Dict[str, Any]], bool]:
+    """or=(...) / and=(...) trees: items are col.op.value or nested and(...)/or(...)"""
+    predicates = []
+    for item in _split(tree[1:-1]):
+        item = item.strip()
+        if item.startswith(("and(", "or(")):
+            nested, _, rest = item.partition("(")
+            predicates.append(_logic(nested, "(" + rest))
+        else:
+            column, _, expression = item.partition(".")
+            predicates.append(_condition(column, expression))
+    combine = any if kind == "or" else all
+    return lambda row: combine(predicate(row) for predicate in predicates)
+
+
+def _sort_key(column: str, desc: bool, nulls_first: bool):
+    def key(row):
+        value = row.get(column)
+        if value is None:
+            return (0 if nulls_first != desc else 1, "")
+        return (1 if nulls_first != desc else 0, value)
+    return key
+
+
+class LocalPostgrest:
+    """
+    A PostgREST-compatible HTTP server over in-memory tables.
+
+    Supports select with column lists, eq/neq/lt/lte/gt/gte/is/in filters,
+    not., or=/and= trees, order (asc/desc, nulls first/last), offset/limit,
+    Prefer count/return/resolution, insert, upsert with on_conflict,
+    PATCH and DELETE. Column defaults follow supabase/schema.sql, and the
+    propiedades update triggers (fecha_ultima_actualizacion and price
+    history) are emulated. No auth, embedding or RPC.
+
+        with LocalPostgrest() as db:
+            os.environ["SUPABASE_URL"] = db.url
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, seed: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        self.tables: Dict[str, List[Dict[str, Any]]] = {name: [] for name in TABLES}
+        self.stats = {"requests": 0, "rows_read": 0, "rows_written": 0}
+        self._lock = threading.Lock()
+        for name, rows in (seed or {}).items():
+            for row in rows:
+                self._insert(name, dict(row))
+
+        store = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                try:
+                    status, payload, headers = store.handle(self.command, self.path, self.headers.get("Prefer", ""), body)
+                except PostgrestRequestError as e:
+                    status, headers = e.status, {}
+                    payload = json.dumps({"code": e.code, "message": e.message}).encode()
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = _handle
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "LocalPostgrest":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="local-postgrest", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "LocalPostgrest":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # Request handling
+
+    def handle(self, method: str, path: str, prefer: str, body: Any) -> Tuple[int, bytes, Dict[str, str]]:
+        parsed = urlparse(path)
+        if not parsed.path.startswith("/rest/v1/"):
+            raise PostgrestRequestError(404, "PGRST000", f"unknown path {parsed.path}")
+        table = parsed.path[len("/rest/v1/"):].strip("/")
+        if table not in self.tables:
+            raise PostgrestRequestError(404, "42P01", f'relation "{table}" does not exist')
+
+        preferences = dict(
+            item.strip().split("=", 1) for item in prefer.split(",") if "=" in item
+        )
+        params = parse_qsl(parsed.query, keep_blank_values=True)
+        with self._lock:
+            self.stats["requests"] += 1
+            if method == "GET":
+                return self._select(table, params, preferences)
+            if method == "POST":
+                return self._write(table, params, preferences, body)
+            if method in ("PATCH", "DELETE"):
+                return self._modify(method, table, params, preferences, body)
+        raise PostgrestRequestError(405, "PGRST000", f"{method} not supported")
+
+    def _filters(self, params: List[Tuple[str, str]]) -> Callable[[Dict[str, Any]], bool]:
+        predicates = []
+        for key, value in params:
+            if key in ("select", "order", "offset", "limit", "on_conflict", "columns"):
+                continue
+            if key in ("or", "and"):
+                predicates.append(_logic(key, value))
+            else:
+                predicates.append(_condition(key, value))
+        return lambda row: all(predicate(row) for predicate in predicates)
+
+    @staticmethod
+    def _project(rows: List[Dict[str, Any]], select: str) -> List[Dict[str, Any]]:
+        if select in ("", "*"):
+            return [dict(row) for row in rows]
+        columns = [column.strip() for column in select.split(",")]
+        return [{column: row.get(column) for column in columns} for row in rows]
+
+    def _select(self, table, params, preferences):
+        options = dict(params)
+        rows = [row for row in self.tables[table] if self._filters(params)(row)]
+        for term in reversed([term for term in options.get("order", "").split(",") if term]):
+            column, *modifiers = term.split(".")
+            desc = "desc" in modifiers
+            nulls_first = "nullsfirst" in modifiers or (desc and "nullslast" not in modifiers)
+            rows.sort(key=_sort_key(column, desc, nulls_first), reverse=desc)
+        total = len(rows)
+        offset = int(options.get("offset", 0))
+        limit = int(options["limit"]) if "limit" in options else None
+        rows = rows[offset:offset + limit if limit is not None else None]
+        self.stats["rows_read"] += len(rows)
+
+        counted = str(total) if "count" in preferences else "*"
+        content_range = f"{offset}-{offset + len(rows) - 1}/{counted}" if rows else f"*/{counted}"
+        payload = json.dumps(self._project(rows, options.get("select", "*"))).encode()
+        return 200, payload, {"Content-Range": content_range}
+
+    def _insert(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        for column, default in TABLES[table]["defaults"].items():
+            if column not in row:
+                row[column] = default()
+        self.tables[table].append(row)
+        return row
+
+    def _find(self, table: str, columns: Tuple[str, ...], row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        key = tuple(row.get(column) for column in columns)
+        for stored in self.tables[table]:
+            if tuple(stored.get(column) for column in columns) == key:
+                return stored
+        return None
+
+    def _update(self, table: str, stored: Dict[str, Any], changes: Dict[str, Any]):
+        old = dict(stored)
+        stored.update(changes)
+        if table == "propiedades":
+            # trigger_update_fecha, skipped for seen-only updates
+            if old.get("fecha_ultimo_visto") == stored.get("fecha_ultimo_visto") or old.get("content_hash") != stored.get("content_hash"):
+                stored["fecha_ultima_actualizacion"] = _now()
+            # trigger_cambio_precio
+            if old.get("precio") is not None and stored.get("precio") is not None and old["precio"] != stored["precio"]:
+                self._insert("historial_precios", {
+                    "propiedad_id": stored["id"],
+                    "precio_anterior": old["precio"],
+                    "precio_nuevo": stored["precio"],
+                    "moneda": stored.get("moneda"),
+                    "variacion_porcentaje": round((stored["precio"] - old["precio"]) / old["precio"] * 100, 2),
+                })
+
+    def _write(self, table, params, preferences, body):
+        rows = body if isinstance(body, list) else [body]
+        if any(not isinstance(row, dict) for row in rows):
+            raise PostgrestRequestError(400, "PGRST102", "expected an object or an array of objects")
+        if len({tuple(sorted(row)) for row in rows}) > 1:
+            raise PostgrestRequestError(400, "PGRST102", "All object keys must match")
+        options = dict(params)
+        conflict = tuple(options["on_conflict"].split(",")) if "on_conflict" in options else TABLES[table]["unique"]
+        resolution = preferences.get("resolution")
+
+        if resolution is None:
+            # Plain insert: all or nothing, like one INSERT statement
+            for row in rows:
+                if self._find(table, conflict, row) is not None:
+                    raise PostgrestRequestError(409, "23505", "duplicate key value violates unique constraint")
+
+        written = []
+        for row in rows:
+            stored = self._find(table, conflict, row) if resolution else None
+            if stored is None:
+                written.append(self._insert(table, dict(row)))
+            elif resolution == "merge-duplicates":
+                self._update(table, stored, row)
+                written.append(stored)
+        self.stats["rows_written"] += len(written)
+
+        if preferences.get("return") == "representation":
+            return 201, json.dumps(written).encode(), {}
+        return 201, b"", {}
+
+    def _modify(self, method, table, params, preferences, body):
+        matches = [row for row in self.tables[table] if self._filters(params)(row)]
+        if method == "PATCH":
+            for row in matches:
+                self._update(table, row, body or {})
+        else:
+            ids = {id(row) for row in matches}
+            self.tables[table] = [row for row in self.tables[table] if id(row) not in ids]
+        self.stats["rows_written"] += len(matches)
+
+        headers = {}
+        if "count" in preferences:
+            headers["Content-Range"] = f"*/{len(matches)}"
+        if preferences.get("return") == "representation":
+            return 200, json.dumps(self._project(matches, dict(params).get("select", "*"))).encode(), headers
+        return 204, b"", headers
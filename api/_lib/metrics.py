@@ -0,0 +1,244 @@
+# In-process run metrics: counters, gauges and latency histograms keyed by
+# name and labels (source, barrio, stage...), written at the end of a run
+# as a JSON summary and a Prometheus textfile (node_exporter's textfile
+# collector format)
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Tuple
+
+# Upper bounds in seconds, from a cached page parse to a slow render
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# HELP text for the Prometheus output; names not listed get none
+DESCRIPTIONS = {
+    "pages_fetched": "Search result pages fetched",
+    "pages_failed": "Search result pages that failed or were shed",
+    "page_bytes": "Bytes of search result pages fetched",
+    "listings_parsed": "Listings parsed from search result pages",
+    "listings_dropped": "Listing cards or embedded listings that failed to parse",
+    "detail_pages_fetched": "Detail pages fetched and merged",
+    "detail_pages_skipped": "Detail pages skipped because the stored listing was unchanged",
+    "detail_pages_failed": "Detail page fetches that failed",
+    "bytes_fetched": "Bytes fetched, by page kind",
+    "fetch_seconds": "Time to get a page body (network, cache, render or replay)",
+    "parse_seconds": "Time to parse a page",
+    "save_seconds": "Time to write one batch of properties",
+    "rows_written": "Property rows by write outcome",
+    "db_requests": "PostgREST requests, by table and method",
+    "db_retries": "PostgREST requests retried",
+    "db_request_seconds": "PostgREST request latency",
+    "host_concurrency_limit": "Host's adaptive concurrency window at the end of the run",
+    "host_concurrency_min_limit": "Smallest concurrency window the host reached",
+    "host_concurrency_max_limit": "Largest concurrency window the host reached",
+    "host_circuit_state": "Host's circuit breaker state at the end of the run (1 for the current state)",
+    "host_throttled": "Requests the host throttled",
+    "host_errors": "Failed requests to the host",
+    "host_retries": "Requests to the host retried",
+    "host_circuit_trips": "Times the host's circuit breaker opened",
+    "browser_requests_blocked": "Browser subresource requests blocked by the route filter",
+    "browser_requests_allowed": "Browser subresource requests let through by the route filter",
+    "browser_bytes_saved_estimate": "Estimated bytes not downloaded thanks to blocked requests",
+    "browser_bytes_loaded": "Bytes the browser loaded",
+    "browser_launches": "Browser launches",
+    "browser_contexts_created": "Browser contexts created",
+    "browser_context_reuses": "Renders that reused a pooled browser context",
+    "browser_contexts_recycled": "Browser contexts closed and replaced",
+    "browser_ready_timeouts": "Renders whose page never showed the ready selector",
+    "browser_errors": "Renders that failed",
+    "browser_render_max_seconds": "Slowest page render of the run",
+    "render_seconds": "Time to render a page in the browser",
+    "response_cache_lookups": "Response cache lookups, by result",
+    "response_cache_evicted": "Response cache entries evicted",
+    "response_cache_bytes_served": "Bytes served from the response cache",
+    "response_cache_bytes_stored": "Bytes written to the response cache",
+    "deadline_skipped": "Work skipped to stay within the time budget, by kind",
+    "deadline_stopped_early": "1 if the source stopped early for the time budget",
+    "stage_seconds": "Wall clock time per run stage",
+    "last_run_timestamp_seconds": "When the last run finished, as a Unix timestamp",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus exposes it"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterator[Tuple[str, int]]:
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield ("+Inf" if bound == float("inf") else repr(bound)), total
+
+
+def _key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    # Exact: byte counters outgrow "%g"'s six digits
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _label_text(key: LabelKey, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metrics:
+    """
+    Thread-safe metric registry. Each update is a dict lookup under one
+    lock, a few microseconds, which is noise next to fetching or parsing
+    a page; hot loops should still aggregate (e.g. one listings_parsed
+    increment per page, not per listing).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges.setdefault(name, {})[_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Observe how long the block took, in seconds, into a histogram"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    def total(self, name: str, **labels) -> float:
+        """Sum of a counter over every series matching the given labels"""
+        wanted = set(_key(labels))
+        with self._lock:
+            return sum(value for key, value in self.counters.get(name, {}).items() if wanted <= set(key))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Every series as plain JSON-able data"""
+        with self._lock:
+            return {
+                "counters": {
+                    name: [{"labels": dict(key), "value": value} for key, value in sorted(series.items())]
+                    for name, series in sorted(self.counters.items())
+                },
+                "gauges": {
+                    name: [{"labels": dict(key), "value": value} for key, value in sorted(series.items())]
+                    for name, series in sorted(self.gauges.items())
+                },
+                "histograms": {
+                    name: [
+                        {
+                            "labels": dict(key),
+                            "count": histogram.count,
+                            "sum": histogram.sum,
+                            "buckets": dict(histogram.cumulative()),
+                        }
+                        for key, histogram in sorted(series.items())
+                    ]
+                    for name, series in sorted(self.histograms.items())
+                },
+            }
+
+    def to_prometheus(self, prefix: str = "scraper_") -> str:
+        lines = []
+
+        def header(name: str, kind: str, short: str):
+            if short in DESCRIPTIONS:
+                lines.append(f"# HELP {name} {DESCRIPTIONS[short]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for short, series in sorted(self.counters.items()):
+                name = f"{prefix}{short}_total"
+                header(name, "counter", short)
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_label_text(key)} {_number(value)}")
+            for short, series in sorted(self.gauges.items()):
+                name = f"{prefix}{short}"
+                header(name, "gauge", short)
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_label_text(key)} {_number(value)}")
+            for short, series in sorted(self.histograms.items()):
+                name = f"{prefix}{short}"
+                header(name, "histogram", short)
+                for key, histogram in sorted(series.items()):
+                    for bound, count in histogram.cumulative():
+                        le = 'le="' + bound + '"'
+                        lines.append(f"{name}_bucket{_label_text(key, le)} {count}")
+                    lines.append(f"{name}_sum{_label_text(key)} {_number(histogram.sum)}")
+                    lines.append(f"{name}_count{_label_text(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str, summary: Dict[str, Any] = None):
+        """Write the run summary (if any) plus every metric series as JSON"""
+        data = dict(summary or {})
+        data["metrics"] = self.snapshot()
+        _write_atomic(path, json.dumps(data, indent=2, default=str))
+
+    def write_prometheus(self, path: str, prefix: str = "scraper_"):
+        _write_atomic(path, self.to_prometheus(prefix))
+
+
+def _write_atomic(path: str, text: str):
+    # The textfile collector may read at any moment; never expose a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """The process-wide metrics registry"""
+    return _metrics
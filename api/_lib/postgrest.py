@@ -0,0 +1,299 @@
+# Minimal PostgREST client for the scraper: pooled keep-alive connections,
+# timeouts, retries, and an asyncio API on top of a worker thread pool
+# (the same approach as scrapers.fetcher.AsyncFetcher)
+
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .metrics import get_metrics
+
+# Worth retrying: the gateway or database was briefly unavailable
+RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+class PostgrestError(Exception):
+    """A PostgREST request failed; carries the HTTP status and error body"""
+
+    def __init__(self, status: int, message: str, method: str = "", path: str = ""):
+        super().__init__(f"{method} {path}: HTTP {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class Result:
+    """Rows returned by a request, plus the total from Content-Range when a count was asked for"""
+
+    def __init__(self, data: List[Dict[str, Any]], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def quote_list(values: Iterable[Any]) -> str:
+    """Double-quote values for an in.() list or an or=() tree: IDs can be URLs, barrios have spaces"""
+    return ",".join('"' + str(v).replace("\\", "\\\\").replace('"', '\\"') + '"' for v in values)
+
+
+class Query:
+    """
+    One request against a table. Filters map to PostgREST operators and
+    are URL-encoded by requests. Run it with execute(), execute_async(),
+    or iterate a select with stream() / stream_async().
+    """
+
+    def __init__(self, table: "Table", method: str, body: Any = None, params: Optional[Dict[str, str]] = None):
+        self.table = table
+        self.method = method
+        self.body = body
+        self.params: List[Tuple[str, str]] = list((params or {}).items())
+        self.prefer: List[str] = []
+        self.idempotent = method in ("GET", "PATCH", "DELETE")
+
+    def _filter(self, column: str, op: str, value: Any) -> "Query":
+        self.params.append((column, f"{op}.{value}"))
+        return self
+
+    def eq(self, column: str, value: Any) -> "Query":
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "Query":
+        return self._filter(column, "neq", value)
+
+    def lt(self, column: str, value: Any) -> "Query":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "Query":
+        return self._filter(column, "lte", value)
+
+    def gt(self, column: str, value: Any) -> "Query":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "Query":
+        return self._filter(column, "gte", value)
+
+    def is_(self, column: str, value: Any) -> "Query":
+        return self._filter(column, "is", value)
+
+    def in_(self, column: str, values: Iterable[Any]) -> "Query":
+        return self._filter(column, "in", f"({quote_list(values)})")
+
+    def or_(self, conditions: str) -> "Query":
+        # PostgREST logic tree, e.g. "and(fuente.eq.x,barrio.in.(...)),and(...)"
+        self.params.append(("or", f"({conditions})"))
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "Query":
+        self.params.append(("order", f"{column}.desc" if desc else column))
+        return self
+
+    def limit(self, count: int) -> "Query":
+        self.params.append(("limit", str(count)))
+        return self
+
+    def range(self, start: int, end: int) -> "Query":
+        # Rows start..end inclusive; PostgREST caps unranged selects at its max-rows
+        self.params.extend([("offset", str(start)), ("limit", str(end - start + 1))])
+        return self
+
+    def execute(self) -> Result:
+        return self.table.client.request(self)
+
+    async def execute_async(self) -> Result:
+        return await self.table.client.run_async(self.execute)
+
+    def _page(self, start: int, page_size: int) -> "Query":
+        page = Query(self.table, self.method, self.body)
+        page.params = self.params + [("offset", str(start)), ("limit", str(page_size))]
+        page.prefer = list(self.prefer)
+        return page
+
+    def stream(self, page_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the rows of a select page by page, page_size rows per request,
+        so large results never sit in memory at once. Order the query by a
+        unique column for stable pages.
+        """
+        start = 0
+        while True:
+            rows = self._page(start, page_size).execute().data
+            yield from rows
+            if len(rows) < page_size:
+                return
+            start += page_size
+
+    async def stream_async(self, page_size: int = 1000) -> AsyncIterator[Dict[str, Any]]:
+        """Async stream(): the next page is fetched while the current one is consumed"""
+        start = 0
+        pending = asyncio.ensure_future(self._page(start, page_size).execute_async())
+        while True:
+            rows = (await pending).data
+            if len(rows) == page_size:
+                start += page_size
+                pending = asyncio.ensure_future(self._page(start, page_size).execute_async())
+            for row in rows:
+                yield row
+            if len(rows) < page_size:
+                return
+
+
+class Table:
+    def __init__(self, client: "PostgrestClient", name: str):
+        self.client = client
+        self.name = name
+
+    def select(self, columns: str = "*", count: Optional[str] = None) -> Query:
+        """count="exact" (or "planned"/"estimated") fills Result.count"""
+        query = Query(self, "GET", params={"select": columns})
+        if count:
+            query.prefer.append(f"count={count}")
+        return query
+
+    def insert(self, rows: Any, returning: str = "representation") -> Query:
+        """Insert one row or a list of rows with identical keys (one statement)"""
+        query = Query(self, "POST", rows)
+        query.prefer.append(f"return={returning}")
+        return query
+
+    def upsert(
+        self, rows: Any, on_conflict: Optional[str] = None, returning: str = "representation", ignore_duplicates: bool = False
+    ) -> Query:
+        """Insert or merge on the on_conflict columns; rows in a list must have identical keys"""
+        query = Query(self, "POST", rows, {"on_conflict": on_conflict} if on_conflict else None)
+        resolution = "ignore-duplicates" if ignore_duplicates else "merge-duplicates"
+        query.prefer.extend([f"resolution={resolution}", f"return={returning}"])
+        # Replaying an upsert lands on the same rows
+        query.idempotent = True
+        return query
+
+    def update(self, data: Dict[str, Any], returning: str = "representation", count: Optional[str] = None) -> Query:
+        """PATCH the filtered rows. count="exact" reports how many changed, even with returning="minimal"."""
+        query = Query(self, "PATCH", data)
+        query.prefer.append(f"return={returning}")
+        if count:
+            query.prefer.append(f"count={count}")
+        return query
+
+    def delete(self, returning: str = "representation", count: Optional[str] = None) -> Query:
+        query = Query(self, "DELETE")
+        query.prefer.append(f"return={returning}")
+        if count:
+            query.prefer.append(f"count={count}")
+        return query
+
+
+class PostgrestClient:
+    """
+    PostgREST (Supabase REST) client.
+
+    One requests session with a keep-alive pool of pool_size connections,
+    shared by pool_size worker threads for the async API, so that many
+    lookups or writes can be in flight at once. `timeout` is (connect,
+    read) seconds. Idempotent requests (reads, PATCH, DELETE, upserts) are
+    retried on connection errors and RETRY_STATUSES with jittered backoff.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        pool_size: int = 8,
+        timeout: Tuple[float, float] = (5.0, 60.0),
+        max_retries: int = 3,
+        backoff: float = 0.5,
+    ):
+        self.base_url = f"{url.rstrip('/')}/rest/v1"
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        self.session.headers.update({
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json",
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="postgrest")
+        self.stats = {"requests": 0, "retries": 0, "seconds": 0.0}
+        self._stats_lock = threading.Lock()
+
+    def table(self, name: str) -> Table:
+        return Table(self, name)
+
+    def request(self, query: Query) -> Result:
+        """Send a query, with retries. Raises PostgrestError on failure."""
+        path = f"/{query.table.name}"
+        headers = {"Prefer": ",".join(query.prefer)} if query.prefer else {}
+        attempts = self.max_retries + 1 if query.idempotent else 1
+        for attempt in range(attempts):
+            started = time.monotonic()
+            try:
+                response = self.session.request(
+                    query.method,
+                    self.base_url + path,
+                    params=query.params,
+                    json=query.body,
+                    headers=headers,
+                    timeout=self.timeout,
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = PostgrestError(0, str(e), query.method, path)
+                retry_after = None
+            else:
+                if response.status_code < 400:
+                    elapsed = time.monotonic() - started
+                    with self._stats_lock:
+                        self.stats["requests"] += 1
+                        self.stats["seconds"] += elapsed
+                    metrics = get_metrics()
+                    metrics.inc("db_requests", table=query.table.name, method=query.method)
+                    metrics.observe("db_request_seconds", elapsed, table=query.table.name, method=query.method)
+                    return self._result(response)
+                error = PostgrestError(response.status_code, response.text[:500], query.method, path)
+                if response.status_code not in RETRY_STATUSES:
+                    raise error
+                retry_after = response.headers.get("Retry-After")
+            if attempt + 1 < attempts:
+                with self._stats_lock:
+                    self.stats["retries"] += 1
+                get_metrics().inc("db_retries", table=query.table.name, method=query.method)
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else self.backoff * 2 ** attempt
+                time.sleep(delay * random.uniform(0.5, 1.5))
+        raise error
+
+    @staticmethod
+    def _result(response: requests.Response) -> Result:
+        # Content-Range: "0-24/25", or "*/25" with return=minimal; "*" when not counted
+        total = response.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+        data = response.json() if response.content else []
+        if isinstance(data, dict):
+            data = [data]
+        return Result(data, int(total) if total.isdigit() else None)
+
+    async def run_async(self, fn, *args):
+        """Run a blocking call on the client's worker threads"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def map(self, fn, items: Iterable[Any]) -> List[Any]:
+        """
+        fn(item) for each item on the worker threads, results in order.
+        Raises the first error. Not for use from inside the pool itself.
+        """
+        futures = [self._executor.submit(fn, item) for item in items]
+        return [future.result() for future in futures]
+
+    def execute_many(self, queries: Iterable[Query]) -> List[Result]:
+        """Run several queries concurrently over the pool; results in order"""
+        return self.map(Query.execute, queries)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
@@ -0,0 +1,312 @@
+# Opt-in CPU and memory profiling of a scrape run's stages (run_scraper.py
+# --profile). Stage code runs inside `with get_profiler().stage("parse"):`,
+# which costs next to nothing unless profiling was started.
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Sequence, Tuple
+
+STAGES = ("fetch", "parse", "enrich", "save")
+
+# Frames kept per allocation: enough to reach the stage's entry function
+MEMORY_FRAMES = 32
+
+# Collapsed stacks leave out subtrees under this share of the stage's time
+MIN_STACK_SHARE = 0.0005
+
+_NULL_STAGE = nullcontext()
+
+
+class _Stage:
+    """One entry into a stage on one thread; see Profiler.stage()"""
+
+    __slots__ = ("profiler", "name", "profile", "owner")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.profile = None
+        self.owner = False
+
+    def __enter__(self):
+        profiler = self.profiler
+        local = profiler._local
+        if getattr(local, "stage", None) is not None:
+            # Nested (e.g. the detail fetch inside enrich): counted toward the outer stage
+            return self
+        self.owner = True
+        local.stage = self.name
+        profiler._note_entry(self.name, sys._getframe(1).f_code)
+        if profiler._take_sample(self.name):
+            profile = profiler._thread_profile(self.name)
+            try:
+                profile.enable()
+                self.profile = profile
+            except ValueError:
+                # Python 3.12+ allows one active profiler per process, not per thread
+                profiler.calls[self.name]["unprofiled"] += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.owner:
+            if self.profile is not None:
+                self.profile.disable()
+            self.profiler._local.stage = None
+        return False
+
+
+class Profiler:
+    """
+    Per-stage cProfile plus tracemalloc allocation tracking.
+
+    cProfile is per thread, so each (stage, thread) pair gets its own
+    profile, merged when written. Only every `every`-th entry into a
+    stage is profiled, so the whole crawl can be profiled at a fraction
+    of the cost. A stage entered inside another (say fetch inside
+    enrich) belongs to the outer one. With memory_top > 0, tracemalloc
+    runs for the whole process (it can't be sampled) and snapshot_memory()
+    records what is allocated at that moment, attributed to the stage
+    whose code allocated it.
+    """
+
+    def __init__(self, out_dir: str, stages: Sequence[str] = STAGES, every: int = 1, memory_top: int = 25):
+        self.out_dir = out_dir
+        self.stages = set(stages)
+        self.every = max(1, every)
+        self.memory_top = memory_top
+        self.calls: Dict[str, Dict[str, int]] = {
+            stage: {"calls": 0, "profiled": 0, "unprofiled": 0} for stage in self.stages
+        }
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiles: Dict[Tuple[str, int], cProfile.Profile] = {}
+        # Code objects that entered each stage, for attributing allocations
+        self._entries: Dict[str, set] = {stage: set() for stage in self.stages}
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._peak = 0
+        if memory_top > 0:
+            tracemalloc.start(MEMORY_FRAMES)
+
+    def stage(self, name: str):
+        """Context manager around one unit of a stage's work"""
+        if name not in self.stages:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def wrap(self, name: str, fn):
+        """fn, run inside stage `name`: for work handed to thread pools"""
+        def wrapped(*args, **kwargs):
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return wrapped
+
+    def _note_entry(self, name: str, code):
+        entries = self._entries[name]
+        if code not in entries:
+            with self._lock:
+                entries.add(code)
+
+    def _take_sample(self, name: str) -> bool:
+        with self._lock:
+            counts = self.calls[name]
+            counts["calls"] += 1
+            if (counts["calls"] - 1) % self.every:
+                return False
+            counts["profiled"] += 1
+            return True
+
+    def _thread_profile(self, name: str) -> cProfile.Profile:
+        key = (name, threading.get_ident())
+        profile = self._profiles.get(key)
+        if profile is None:
+            with self._lock:
+                profile = self._profiles[key] = cProfile.Profile()
+        return profile
+
+    def snapshot_memory(self):
+        """Record what is allocated now (call when memory is at its fullest, e.g. end of the crawl)"""
+        if self.memory_top > 0 and tracemalloc.is_tracing():
+            self._peak = tracemalloc.get_traced_memory()[1]
+            self._snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__)]
+            )
+
+    def stats(self, name: str) -> Optional[pstats.Stats]:
+        """The stage's merged profile, or None if it never ran profiled"""
+        stats = None
+        for (stage, _), profile in list(self._profiles.items()):
+            if stage != name:
+                continue
+            try:
+                if stats is None:
+                    stats = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+            except TypeError:
+                # Enabled but saw no calls
+                continue
+        return stats
+
+    def write(self) -> List[str]:
+        """Write the reports into out_dir; returns the paths written"""
+        os.makedirs(self.out_dir, exist_ok=True)
+        if tracemalloc.is_tracing():
+            if self._snapshot is None:
+                self.snapshot_memory()
+            tracemalloc.stop()
+
+        paths = []
+        summary = io.StringIO()
+        stacks = []
+        for name in sorted(self.stages):
+            counts = self.calls[name]
+            summary.write(f"== {name}: {counts['profiled']} of {counts['calls']} entries profiled"
+                          + (f", {counts['unprofiled']} skipped (profiler busy)" if counts["unprofiled"] else "")
+                          + "\n")
+            stats = self.stats(name)
+            if stats is None:
+                summary.write("(no profile)\n\n")
+                continue
+            path = os.path.join(self.out_dir, f"{name}.pstats")
+            stats.dump_stats(path)
+            paths.append(path)
+            stats.stream = summary
+            stats.sort_stats("cumulative").print_stats(25)
+            stacks.extend(collapsed_stacks(stats, name))
+
+        path = os.path.join(self.out_dir, "stacks.collapsed")
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in stacks)
+        paths.append(path)
+
+        path = os.path.join(self.out_dir, "summary.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(summary.getvalue())
+        paths.append(path)
+
+        if self._snapshot is not None:
+            path = os.path.join(self.out_dir, "memory_top.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self._memory_report())
+            paths.append(path)
+        return paths
+
+    def _stage_of(self, traceback, ranges: List[Tuple[str, str, int, int]]) -> str:
+        # Oldest frame first: the outermost stage entry wins, as for profiles
+        for frame in traceback:
+            for name, filename, first, last in ranges:
+                if frame.lineno >= first and frame.lineno <= last and frame.filename == filename:
+                    return name
+        return "other"
+
+    def _memory_report(self) -> str:
+        ranges = []
+        for name, codes in self._entries.items():
+            for code in codes:
+                lines = [line for _, _, line in code.co_lines() if line is not None]
+                ranges.append((name, code.co_filename, code.co_firstlineno, max(lines, default=code.co_firstlineno)))
+
+        # stage -> allocation site -> [bytes, blocks]
+        by_stage: Dict[str, Dict[str, List[int]]] = {}
+        for trace in self._snapshot.traces:
+            stage = self._stage_of(trace.traceback, ranges)
+            frame = trace.traceback[-1]
+            site = by_stage.setdefault(stage, {}).setdefault(f"{frame.filename}:{frame.lineno}", [0, 0])
+            site[0] += trace.size
+            site[1] += 1
+
+        out = io.StringIO()
+        total = sum(size for sites in by_stage.values() for size, _ in sites.values())
+        out.write(f"Traced memory: {total / 1e6:.1f} MB allocated at snapshot, peak {self._peak / 1e6:.1f} MB\n")
+        for stage, sites in sorted(by_stage.items(), key=lambda item: -sum(size for size, _ in item[1].values())):
+            stage_total = sum(size for size, _ in sites.values())
+            blocks = sum(count for _, count in sites.values())
+            out.write(f"\n== {stage}: {stage_total / 1e6:.2f} MB in {blocks} blocks\n")
+            top = sorted(sites.items(), key=lambda item: -item[1][0])[:self.memory_top]
+            for site, (size, count) in top:
+                out.write(f"{size / 1024:>10.1f} KB {count:>8} blocks  {site}\n")
+        return out.getvalue()
+
+
+def _label(func: Tuple[str, int, str]) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def collapsed_stacks(stats: pstats.Stats, root: str) -> List[Tuple[str, int]]:
+    """
+    Approximate call stacks from a profile's caller/callee edges, in the
+    collapsed format flamegraph.pl and speedscope read: "root;a;b <µs>".
+    cProfile keeps edges, not stacks, so a function's time is split among
+    its callers in proportion to what each caller spent in it.
+    """
+    entries = stats.stats
+    callees: Dict[tuple, List[Tuple[tuple, float]]] = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    roots = [func for func, (_, _, _, _, callers) in entries.items() if not callers]
+    total = sum(entries[func][3] for func in roots) or 1.0
+    min_seconds = total * MIN_STACK_SHARE
+
+    stacks: Dict[str, float] = {}
+
+    def walk(func, path: List[str], on_path: set, seconds: float):
+        _, _, own, cumulative, _ = entries[func]
+        if cumulative <= 0 or seconds < min_seconds or len(path) > 100:
+            return
+        share = min(1.0, seconds / cumulative)
+        stack = ";".join(path)
+        stacks[stack] = stacks.get(stack, 0.0) + own * share
+        for callee, edge_seconds in callees.get(func, ()):
+            if callee in on_path:
+                continue
+            on_path.add(callee)
+            walk(callee, path + [_label(callee)], on_path, edge_seconds * share)
+            on_path.discard(callee)
+
+    for func in roots:
+        walk(func, [root, _label(func)], {func}, entries[func][3])
+    return [(stack, round(seconds * 1e6)) for stack, seconds in stacks.items() if seconds * 1e6 >= 1]
+
+
+class _NoProfiler:
+    """Stand-in when profiling is off: every stage is a no-op"""
+
+    def stage(self, name: str):
+        return _NULL_STAGE
+
+    def wrap(self, name: str, fn):
+        return fn
+
+    def snapshot_memory(self):
+        pass
+
+
+_profiler = _NoProfiler()
+
+
+def get_profiler():
+    """The profiler started with start_profiling(), or a no-op one"""
+    return _profiler
+
+
+def start_profiling(out_dir: str, stages: Sequence[str] = STAGES, every: int = 1, memory_top: int = 25) -> Profiler:
+    global _profiler
+    _profiler = Profiler(out_dir, stages, every, memory_top)
+    return _profiler
+
+
+def stop_profiling() -> List[str]:
+    """Write the active profiler's reports and switch profiling off; returns the paths written"""
+    global _profiler
+    profiler, _profiler = _profiler, _NoProfiler()
+    return profiler.write() if isinstance(profiler, Profiler) else []
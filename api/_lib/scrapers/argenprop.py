@@ -1,13 +1,19 @@
 from typing import List, Dict, Any, Optional
+from datetime import date
 from bs4 import BeautifulSoup
 from .base import BaseScraper
-import requests
 import re
 
 class ArgenpropScraper(BaseScraper):
     """Scraper for Argenprop"""
 
     BASE_URL = "https://www.argenprop.com"
+    rate_limit = 1.0
+    rate_burst = 3
+    max_concurrency = 6
+
+    # Shown instead of listings past the last results page
+    empty_selector = ".listing-no-results, .search-results__empty, .no-results"
 
     @property
     def fuente(self) -> str:
@@ -81,41 +87,12 @@ class ArgenpropScraper(BaseScraper):
                         fotos.append(match.group(1))
 
             # Attributes
-            ambientes = None
-            dormitorios = None
-            banos = None
-            metros_cuadrados = None
-            metros_totales = None
-
-            # Look for feature elements
             features = element.select(".card__main-features li, .card__features li, .listing__item__features span")
-            for feature in features:
-                text = feature.get_text(strip=True).lower()
-
-                if "m²" in text or "m2" in text:
-                    area = self.clean_area(text)
-                    if "tot" in text:
-                        metros_totales = area
-                    elif "cub" in text:
-                        metros_cuadrados = area
-                    elif metros_cuadrados is None:
-                        metros_cuadrados = area
-                elif "amb" in text:
-                    ambientes = self.clean_number(text)
-                elif "dorm" in text:
-                    dormitorios = self.clean_number(text)
-                elif "baño" in text:
-                    banos = self.clean_number(text)
+            attributes = self.parse_features(feature.get_text(strip=True) for feature in features)
 
             # Property type
             tipo_elem = element.select_one(".card__type, .listing__item__type")
-            tipo = "departamento"
-            if tipo_elem:
-                tipo_text = tipo_elem.get_text(strip=True).lower()
-                if any(word in tipo_text for word in ["casa", "chalet", "ph"]):
-                    tipo = "casa"
-            elif any(word in titulo.lower() for word in ["casa", "chalet", "ph"]):
-                tipo = "casa"
+            tipo = self.tipo_from_text(tipo_elem.get_text(strip=True) if tipo_elem else titulo)
 
             return {
                 "externalId": external_id,
@@ -124,11 +101,7 @@ class ArgenpropScraper(BaseScraper):
                 "precio": precio,
                 "moneda": moneda,
                 "tipo": tipo,
-                "ambientes": ambientes,
-                "dormitorios": dormitorios,
-                "banos": banos,
-                "metrosCuadrados": metros_cuadrados,
-                "metrosTotales": metros_totales,
+                **attributes,
                 "fotos": fotos,
                 "descripcion": None,
             }
@@ -137,44 +110,44 @@ class ArgenpropScraper(BaseScraper):
             print(f"Error parsing Argenprop listing: {e}")
             return None
 
-    def get_photos_from_detail(self, url: str) -> List[str]:
-        """Get all photos from Argenprop detail page"""
-        try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            }
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, "lxml")
-
-            photos = []
-            seen = set()
-
-            # Find gallery/carousel images
-            for img in soup.select("img[data-src], img[src*='res.cloudinary'], img[src*='argenprop']"):
-                src = img.get("data-src") or img.get("src", "")
-                if src and src not in seen and not src.startswith("data:"):
+    def parse_detail(self, soup, url: str, fetched_on: Optional[date] = None) -> Dict[str, Any]:
+        """Photos, description, feature list and publication date from an Argenprop detail page"""
+        photos = []
+        seen = set()
+
+        # Find gallery/carousel images
+        for img in soup.select("img[data-src], img[src*='res.cloudinary'], img[src*='argenprop']"):
+            src = img.get("data-src") or img.get("src", "")
+            if src and src not in seen and not src.startswith("data:"):
+                seen.add(src)
+                photos.append(src)
+
+        # Check for images in gallery containers
+        for img in soup.select(".gallery img, .carousel img, .slider img, .swiper img"):
+            src = img.get("data-src") or img.get("src", "")
+            if src and src not in seen and not src.startswith("data:"):
+                seen.add(src)
+                photos.append(src)
+
+        # Check for background-image in gallery elements
+        for elem in soup.select("[style*='background-image']"):
+            style = elem.get("style", "")
+            match = re.search(r"url\(['\"]?([^'\"]+)['\"]?\)", style)
+            if match:
+                src = match.group(1)
+                if src not in seen:
                     seen.add(src)
                     photos.append(src)
 
-            # Check for images in gallery containers
-            for img in soup.select(".gallery img, .carousel img, .slider img, .swiper img"):
-                src = img.get("data-src") or img.get("src", "")
-                if src and src not in seen and not src.startswith("data:"):
-                    seen.add(src)
-                    photos.append(src)
+        description_elem = soup.select_one(".section-description--content, .section-description")
+        descripcion = description_elem.get_text("\n", strip=True) if description_elem else None
 
-            # Check for background-image in gallery elements
-            for elem in soup.select("[style*='background-image']"):
-                style = elem.get("style", "")
-                match = re.search(r"url\(['\"]?([^'\"]+)['\"]?\)", style)
-                if match:
-                    src = match.group(1)
-                    if src not in seen:
-                        seen.add(src)
-                        photos.append(src)
+        features = soup.select(".property-main-features li, ul.property-features li")
+        date_elem = soup.select_one(".section-date, .property-date")
 
-            return photos[:20]  # Limit to 20 photos
-
-        except Exception as e:
-            return []
+        return {
+            **self.parse_features(feature.get_text(" ", strip=True) for feature in features),
+            "fotos": photos[:20],  # Limit to 20 photos
+            "descripcion": descripcion,
+            "fechaPublicacion": self.clean_date(date_elem.get_text(" ", strip=True), fetched_on) if date_elem else None,
+        }
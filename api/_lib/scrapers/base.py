@@ -1,17 +1,107 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Awaitable, Callable, Iterable, Iterator, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+from .fetcher import AsyncFetcher, BlockingHostRateLimiter
+from .throttle import HostThrottle, TransientError, check_status
+from .cache import get_response_cache, response_time
+from .replay import get_archive
+from .seen import SeenIndex
+from .deadline import Deadline
+from .checkpoint import Checkpoint
+from .parsing import DEFAULT_BACKEND, parse_html
+from .pipeline import ParsePool
+from ..models import PropiedadBase
+from ..fingerprint import listing_fingerprint
+from ..metrics import get_metrics
+from ..profiling import get_profiler
+from pydantic import ValidationError
+from .browser import DEFAULT_BLOCKED_HOSTS, DEFAULT_BLOCKED_TYPES, RouteFilter, get_browser_pool
+import asyncio
+import queue
+import threading
 import time
-import random
 import re
+from datetime import date, timedelta
+
+_CRAWL_DONE = object()
+
+class _Crawl:
+    """State shared by every barrio of one crawl"""
+
+    def __init__(
+        self,
+        fetcher: AsyncFetcher,
+        emit: Callable[[List[Dict[str, Any]]], Awaitable[None]],
+        seen_index: Optional[SeenIndex] = None,
+        parse_pool: Optional[ParsePool] = None,
+        deadline: Optional[Deadline] = None,
+        checkpoint: Optional[Checkpoint] = None,
+    ):
+        self.fetcher = fetcher
+        self.emit = emit
+        self.seen_index = seen_index
+        self.parse_pool = parse_pool
+        self.deadline = deadline
+        self.checkpoint = checkpoint
+        # URLs fetched fine that held no listings and showed the site's
+        # no-results marker (empty_selector): where pagination ran out
+        self.empty_pages = set()
+        # Listing cards per fetched results page URL, parsed or dropped,
+        # to spot the short last page of a barrio
+        self.page_sizes: Dict[str, int] = {}
 
 class BaseScraper(ABC):
     """Base class for all property scrapers"""
 
     use_playwright = False  # Override in subclass to use Playwright
 
+    # Politeness: per-host token bucket (requests/second, burst size) and
+    # how many requests may be in flight at once. Override per scraper.
+    rate_limit = 0.5
+    rate_burst = 2
+    max_concurrency = 8
+
+    # Adaptive per-host concurrency (see throttle.HostThrottle): transient
+    # failures are retried max_retries times, backing off from retry_backoff
+    # seconds. max_concurrency / detail_workers cap the adaptive window.
+    max_retries = 3
+    retry_backoff = 1.0
+
+    # Detail page fetches (see parse_detail): worker threads and per-host
+    # requests/second. detail_headers are added to the session headers.
+    fetch_detail_pages = True
+    detail_workers = 5
+    detail_rate_limit = 2.0
+    detail_headers: Optional[Dict[str, str]] = None
+
+    # Stored listings with at least this many photos and an unchanged card
+    # fingerprint skip the detail page fetch
+    min_complete_photos = 2
+
+    # Incremental crawls stop paginating once a page has at least this
+    # share of listings already seen by earlier runs
+    known_share_threshold = 0.8
+
+    # HTML parsing backend: "lxml" (compiled selectors on the raw lxml tree)
+    # or "bs4". Defaults to the SCRAPER_PARSER environment variable.
+    parser_backend = DEFAULT_BACKEND
+
+    # Playwright readiness: a rendered page is returned as soon as either
+    # selector is attached, or after ready_timeout ms. Usually the listing
+    # selectors from get_listings_from_page plus the site's no-results marker.
+    ready_selector: Optional[str] = None
+    empty_selector: Optional[str] = None
+    ready_timeout = 10000
+
+    # Playwright request interception: resource types and hosts to abort.
+    # Set allowed_hosts to only let the site's own hosts through.
+    blocked_resource_types = DEFAULT_BLOCKED_TYPES
+    blocked_hosts = DEFAULT_BLOCKED_HOSTS
+    allowed_hosts: Optional[tuple] = None
+
     def __init__(self):
         self.session = requests.Session()
         self.session.headers.update({
@@ -21,8 +111,30 @@ class BaseScraper(ABC):
             "Accept-Encoding": "gzip, deflate, br",
             "Connection": "keep-alive",
         })
-        self._playwright = None
-        self._browser = None
+        # One keep-alive connection pool per host, shared by search and detail fetches
+        adapter = HTTPAdapter(pool_maxsize=max(self.max_concurrency, self.detail_workers))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.route_filter = self.create_route_filter()
+        # Which path each search page took: embedded JSON or DOM selectors
+        # listings_dropped counts DOM cards parse_listing couldn't turn into a property
+        self.parse_stats = {"structured": 0, "dom": 0, "structured_rejected": 0, "listings_dropped": 0}
+        self.detail_limiter = BlockingHostRateLimiter(self.detail_rate_limit, self.rate_burst)
+        self.throttle = HostThrottle(max(self.max_concurrency, self.detail_workers), self.max_retries, self.retry_backoff)
+        # Result pages, properties and whether the crawl was complete, per
+        # barrio, for the barrio scheduler and deactivation
+        self.barrio_stats: Dict[str, Dict[str, Any]] = {}
+        self.detail_stats = {
+            "fetched": 0,
+            "skipped": 0,
+            "errors": 0,
+            "parse_seconds": 0.0,
+            "parse_max_seconds": 0.0,
+        }
+
+    def create_route_filter(self) -> RouteFilter:
+        """Build the Playwright route filter. Override for custom rules."""
+        return RouteFilter(self.blocked_resource_types, self.blocked_hosts, self.allowed_hosts)
 
     @property
     @abstractmethod
@@ -37,169 +149,682 @@ class BaseScraper(ABC):
 
     @abstractmethod
     def parse_listing(self, element: BeautifulSoup) -> Optional[Dict[str, Any]]:
-        """Parse a single listing element and return property data"""
+        """
+        Parse a single listing element and return property data.
+
+        `element` is a BeautifulSoup Tag or an LxmlNode depending on
+        parser_backend; stick to select/select_one/get/get_text.
+        """
         pass
 
     @abstractmethod
     def get_listings_from_page(self, soup: BeautifulSoup) -> List[BeautifulSoup]:
-        """Extract listing elements from a search results page"""
+        """Extract listing elements from a search results page (see parse_listing)"""
         pass
 
-    def _start_browser(self):
-        """Start Playwright browser"""
-        if self._browser is None:
-            from playwright.sync_api import sync_playwright
-            self._playwright = sync_playwright().start()
-            self._browser = self._playwright.chromium.launch(
-                headless=True,
-                args=['--no-sandbox', '--disable-setuid-sandbox']
-            )
-            print(f"Started Playwright browser for {self.fuente}")
-
-    def _stop_browser(self):
-        """Stop Playwright browser"""
-        if self._browser:
-            self._browser.close()
-            self._browser = None
-        if self._playwright:
-            self._playwright.stop()
-            self._playwright = None
-
-    def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
-        """Fetch a page and return parsed BeautifulSoup object"""
+    def extract_structured(self, content: bytes) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fast path: map the structured data embedded in a search page
+        (preloaded state, JSON-LD) straight to parse_listing dicts.
+        Return None when the page has none. Override in subclass.
+        """
+        return None
+
+    def fetch_page(self, url: str):
+        """Fetch a single page (rate limited) and return it parsed with parse_html"""
+        content = asyncio.run(self._fetch_one(url))
+        return self.parse_html(content) if content else None
+
+    async def _fetch_one(self, url: str) -> Optional[bytes]:
+        fetcher = self._create_fetcher()
         try:
-            # Add random delay to avoid rate limiting
-            time.sleep(random.uniform(2, 5))
+            return await fetcher.fetch(url)
+        finally:
+            fetcher.close()
 
-            if self.use_playwright:
-                return self._fetch_with_playwright(url)
-            else:
-                response = self.session.get(url, timeout=30)
-                response.raise_for_status()
-                return BeautifulSoup(response.content, "lxml")
+    def _fetch_raw(self, url: str) -> Optional[bytes]:
+        """Blocking fetch of a search page body. Runs on the fetcher's thread pool."""
+        try:
+            return self._get_with_cache(url, "search")[0]
         except Exception as e:
             print(f"Error fetching {url}: {e}")
             return None
 
-    def _fetch_with_playwright(self, url: str) -> Optional[BeautifulSoup]:
-        """Fetch page using Playwright browser"""
-        page = None
-        try:
-            self._start_browser()
-            context = self._browser.new_context(
-                user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                viewport={"width": 1920, "height": 1080},
-                locale="es-AR"
+    def _get_with_cache(self, url: str, kind: str, headers: Optional[Dict[str, str]] = None) -> Tuple[bytes, float]:
+        """
+        GET a page body, or replay it from the response archive when one is
+        being replayed (see replay.py). Returns the body and when the site
+        served it, as a Unix timestamp. Raises on HTTP errors.
+        """
+        archive = get_archive()
+        started = time.perf_counter()
+        with get_profiler().stage("fetch"):
+            if archive is not None and archive.replaying:
+                body = archive.replay(url)
+                fetched_at = archive.fetched_at(url)
+            else:
+                body, fetched_at = self._download(url, kind, headers)
+                if archive is not None:
+                    archive.record(url, body, fetched_at)
+        self._record_fetch(kind, body, started)
+        return body, fetched_at
+
+    def _record_fetch(self, kind: str, body: bytes, started: float):
+        metrics = get_metrics()
+        metrics.observe("fetch_seconds", time.perf_counter() - started, source=self.fuente, kind=kind)
+        metrics.inc("bytes_fetched", len(body), source=self.fuente, kind=kind)
+
+    def _download(self, url: str, kind: str, headers: Optional[Dict[str, str]] = None) -> Tuple[bytes, float]:
+        """
+        GET through the on-disk response cache. Fresh entries are served
+        directly, stale ones are revalidated with If-None-Match /
+        If-Modified-Since. Throttles, 5xx and connection errors are retried
+        under the host's controller. Returns the body and when it was
+        fetched (the cache entry's time, or the response's Date header).
+        Raises on HTTP errors.
+        """
+        cache = get_response_cache()
+        entry = cache.get(url) if cache else None
+        if entry is not None and cache.is_fresh(entry, kind):
+            cache.record_hit(entry)
+            return entry.body, entry.fetched_at
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            request_headers.update(entry.validators())
+
+        def send():
+            try:
+                response = self.session.get(url, headers=request_headers, timeout=30)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                raise TransientError(str(e)) from e
+            check_status(response.status_code, response.headers.get("Retry-After"))
+            return response
+
+        response = self.throttle.call(url, send)
+        fetched_at = response_time(response.headers.get("Date"))
+        if response.status_code == 304 and entry is not None:
+            # Still current: as good as fetched now
+            cache.revalidated(url, entry, fetched_at)
+            return entry.body, fetched_at
+
+        response.raise_for_status()
+        if cache:
+            cache.put(
+                url, kind, response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"), fetched_at
             )
-            page = context.new_page()
-
-            # Navigate and wait for content to load
-            page.goto(url, wait_until="domcontentloaded", timeout=30000)
+        return response.content, fetched_at
 
-            # Wait for dynamic content
-            page.wait_for_timeout(3000)
+    def _cache_lookup(self, url: str) -> Optional[bytes]:
+        archive = get_archive()
+        if archive is not None and archive.replaying:
+            return None
+        cache = get_response_cache()
+        started = time.perf_counter()
+        body = cache.lookup(url, "search") if cache else None
+        if body is not None:
+            self._record_fetch("search", body, started)
+            if archive is not None:
+                archive.record(url, body)
+        return body
+
+    async def _fetch_with_playwright(self, url: str) -> Optional[bytes]:
+        """Render page in the shared Playwright browser pool"""
+        archive = get_archive()
+        started = time.perf_counter()
+        if archive is not None and archive.replaying:
+            try:
+                content = await archive.replay_async(url)
+            except Exception as e:
+                print(f"Playwright error fetching {url}: {e}")
+                return None
+            self._record_fetch("render", content, started)
+            return content
 
-            content = page.content()
-            return BeautifulSoup(content, "lxml")
+        try:
+            content = await self.throttle.call_async(url, lambda: get_browser_pool().fetch(
+                url,
+                profile=self.fuente,
+                ready_selector=self._readiness_selector(),
+                ready_timeout=self.ready_timeout,
+                route_filter=self.route_filter,
+            ))
         except Exception as e:
             print(f"Playwright error fetching {url}: {e}")
             return None
-        finally:
-            if page:
-                try:
-                    page.context.close()
-                except:
-                    pass
-
-    def scrape_barrio(self, barrio: str, max_pages: int = 3) -> List[Dict[str, Any]]:
-        """Scrape properties from a specific neighborhood"""
-        properties = []
 
+        self._record_fetch("render", content, started)
+        if archive is not None:
+            archive.record(url, content)
+        # Rendered pages carry no validators; they're cached by TTL only. A render
+        # that timed out on a captcha or half-loaded page would be served for the
+        # whole TTL, so only cache one that is recognizably a results page.
+        cache = get_response_cache()
+        if cache and self._is_results_page(content):
+            cache.put(url, "search", content)
+        return content
+
+    def _readiness_selector(self) -> Optional[str]:
+        selectors = [s for s in (self.ready_selector, self.empty_selector) if s]
+        return ", ".join(selectors) if selectors else None
+
+    def _is_results_page(self, content: bytes) -> bool:
+        """Whether a render matched the readiness selector or holds at least one listing"""
+        soup = self.parse_html(content)
+        if soup is None:
+            return False
+        selector = self._readiness_selector()
+        if selector and soup.select_one(selector) is not None:
+            return True
         try:
-            for page in range(1, max_pages + 1):
-                url = self.get_search_url(barrio, page)
-                soup = self.fetch_page(url)
+            if self.extract_structured(content):
+                return True
+            return bool(self.get_listings_from_page(soup))
+        except Exception:
+            return False
+
+    def _create_fetcher(self) -> AsyncFetcher:
+        """Build the async fetch engine with this scraper's politeness settings"""
+        fetch_fn = self._fetch_with_playwright if self.use_playwright else self._fetch_raw
+        return AsyncFetcher(
+            fetch_fn,
+            rate=self.rate_limit,
+            burst=self.rate_burst,
+            max_concurrency=self.max_concurrency,
+            cache_lookup=self._cache_lookup,
+        )
+
+    def parse_html(self, content: bytes):
+        """Parse a page with this scraper's backend (lxml node or BeautifulSoup)"""
+        return parse_html(content, self.parser_backend)
+
+    def _tag_property(self, prop: Dict[str, Any], barrio: str):
+        prop["barrio"] = barrio
+        prop["fuente"] = self.fuente
+        prop["operacion"] = "venta"
+
+    def _parse_structured(self, content: bytes, barrio: str) -> Optional[List[Dict[str, Any]]]:
+        """Run extract_structured and validate every listing. None means use the DOM."""
+        try:
+            properties = self.extract_structured(content)
+        except Exception as e:
+            print(f"Error extracting structured data: {e}")
+            properties = None
+        if not properties:
+            return None
 
-                if not soup:
-                    break
+        for prop in properties:
+            self._tag_property(prop, barrio)
+            try:
+                PropiedadBase(**prop)
+            except ValidationError:
+                self.parse_stats["structured_rejected"] += 1
+                return None
+        return properties
 
-                listings = self.get_listings_from_page(soup)
+    def _parse_page(self, content: bytes, barrio: str) -> Optional[List[Dict[str, Any]]]:
+        """Parse a search results page. Returns None when the page has no listings."""
+        properties = self._parse_structured(content, barrio)
+        if properties:
+            self.parse_stats["structured"] += 1
+            return properties
 
-                if not listings:
-                    break
+        self.parse_stats["dom"] += 1
+        soup = self.parse_html(content)
+        listings = self.get_listings_from_page(soup) if soup is not None else None
 
-                for listing in listings:
-                    try:
-                        prop = self.parse_listing(listing)
-                        if prop:
-                            prop["barrio"] = barrio
-                            prop["fuente"] = self.fuente
-                            prop["operacion"] = "venta"
-                            properties.append(prop)
-                    except Exception as e:
-                        print(f"Error parsing listing: {e}")
-                        continue
-        finally:
-            # Close browser after each barrio to avoid async conflicts
-            if self.use_playwright:
-                self._stop_browser()
+        if not listings:
+            return None
 
+        properties = []
+        for listing in listings:
+            try:
+                prop = self.parse_listing(listing)
+                if prop:
+                    self._tag_property(prop, barrio)
+                    properties.append(prop)
+            except Exception as e:
+                print(f"Error parsing listing: {e}")
+                continue
+        self.parse_stats["listings_dropped"] += len(listings) - len(properties)
         return properties
 
-    def scrape_all(self, barrios: List[str], max_pages_per_barrio: int = 2, fetch_all_photos: bool = True) -> List[Dict[str, Any]]:
-        """Scrape properties from multiple neighborhoods"""
-        all_properties = []
+    async def _fetch_and_parse(self, crawl: "_Crawl", url: str, barrio: str, page: int = 1) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fetch one results page and parse it. None means the page failed,
+        had no listings or was shed by the crawl's deadline.
+        """
+        deadline = crawl.deadline
+        if deadline is None:
+            return await self._fetch_and_parse_page(crawl, url, barrio)
+
+        skipped = False
+
+        def admit() -> bool:
+            nonlocal skipped
+            skipped = not deadline.allow_page(first=page == 1)
+            return not skipped
+
+        properties = await self._fetch_and_parse_page(crawl, url, barrio, admit)
+        if not skipped:
+            deadline.page_done(first=page == 1, properties=len(properties or []))
+        return properties
 
-        for barrio in barrios:
-            print(f"Scraping {barrio}...")
-            properties = self.scrape_barrio(barrio, max_pages_per_barrio)
-            all_properties.extend(properties)
-            print(f"  Found {len(properties)} properties in {barrio}")
+    async def _fetch_and_parse_page(
+        self, crawl: "_Crawl", url: str, barrio: str, admit: Optional[Callable[[], bool]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        if crawl.parse_pool is None:
+            content = await crawl.fetcher.fetch(url, admit)
+            if content:
+                dropped = self.parse_stats["listings_dropped"]
+                started = time.perf_counter()
+                with get_profiler().stage("parse"):
+                    properties = self._parse_page(content, barrio)
+                parse_seconds = time.perf_counter() - started
+                dropped = self.parse_stats["listings_dropped"] - dropped
+        else:
+            # Hold a queue slot from fetch to parsed so downloads can't run far ahead of the parsers
+            async with crawl.parse_pool.slot():
+                content = await crawl.fetcher.fetch(url, admit)
+                if content:
+                    properties, stats, parse_seconds = await crawl.parse_pool.parse(content, barrio)
+                    dropped = stats["listings_dropped"]
+
+        if not content:
+            get_metrics().inc("pages_failed", source=self.fuente, barrio=barrio)
+            return None
+        self._record_page(barrio, content, properties, dropped, parse_seconds)
+        crawl.page_sizes[url] = len(properties or []) + dropped
+        # A blank 200, block or captcha page has no listings either; only the marker means "no more results"
+        if properties is None and self._shows_no_results(content):
+            crawl.empty_pages.add(url)
+        return properties
 
-        # Fetch all photos in parallel if enabled
-        if fetch_all_photos and all_properties:
-            print(f"\nFetching all photos for {len(all_properties)} properties...")
-            all_properties = self.enrich_with_photos(all_properties)
+    def _shows_no_results(self, content: bytes) -> bool:
+        """Whether a results page carries the site's no-results marker (empty_selector)"""
+        if not self.empty_selector:
+            return False
+        soup = self.parse_html(content)
+        return soup is not None and soup.select_one(self.empty_selector) is not None
+
+    def _record_page(
+        self, barrio: str, content: bytes, properties: Optional[List[Dict[str, Any]]], dropped: int, parse_seconds: float
+    ):
+        """Per-barrio metrics for one fetched results page"""
+        metrics = get_metrics()
+        metrics.inc("pages_fetched", source=self.fuente, barrio=barrio)
+        metrics.inc("page_bytes", len(content), source=self.fuente, barrio=barrio)
+        metrics.inc("listings_parsed", len(properties or []), source=self.fuente, barrio=barrio)
+        if dropped:
+            metrics.inc("listings_dropped", dropped, source=self.fuente, barrio=barrio)
+        metrics.observe("parse_seconds", parse_seconds, source=self.fuente, kind="search")
+
+    async def _emit_page(self, crawl: "_Crawl", barrio: str, page: int, page_properties: List[Dict[str, Any]]):
+        # Journal before handing off, so a crash downstream leaves the page as unsaved
+        if crawl.checkpoint is not None:
+            crawl.checkpoint.record_page(self.fuente, barrio, page, page_properties)
+        await crawl.emit(page_properties)
+        stats = self.barrio_stats.setdefault(barrio, {"pages": 0, "found": 0})
+        stats["pages"] += 1
+        stats["found"] += len(page_properties)
+
+    def _page_done(self, crawl: "_Crawl", barrio: str, page: int) -> bool:
+        """Whether an interrupted run being resumed already finished this page"""
+        return crawl.checkpoint is not None and crawl.checkpoint.page_done(self.fuente, barrio, page)
+
+    async def _scrape_barrio_async(self, crawl: "_Crawl", barrio: str, max_pages: int) -> int:
+        """
+        Fetch and parse every results page of a barrio concurrently and emit
+        each page as soon as all pages before it are in. Returns the number
+        of properties found.
+
+        With a seen_index, pages are walked one at a time instead and
+        pagination stops at the first page where at least
+        known_share_threshold of the listings were seen by earlier runs.
+
+        When resuming, pages the interrupted run finished are skipped.
+
+        The barrio is recorded as complete in barrio_stats only when
+        pagination really ended within max_pages (see _ran_out and
+        _short_page) after every page before it came back, so no listing
+        of the barrio went unseen. Stopping at the max_pages cap with full
+        pages is not complete.
+        """
+        if crawl.seen_index is not None:
+            found, complete = await self._scrape_barrio_incremental(crawl, barrio, max_pages)
+        else:
+            tasks = {
+                page: asyncio.ensure_future(self._fetch_and_parse(crawl, self.get_search_url(barrio, page), barrio, page))
+                for page in range(1, max_pages + 1)
+                if not self._page_done(crawl, barrio, page)
+            }
+            found = 0
+            complete = False
+            try:
+                for page, task in tasks.items():
+                    page_properties = await task
+                    # Same stop rule as a sequential walk: first failed or empty page ends the barrio
+                    if page_properties is None:
+                        complete = self._ran_out(crawl, barrio, page)
+                        break
+                    await self._emit_page(crawl, barrio, page, page_properties)
+                    found += len(page_properties)
+                    if self._short_page(crawl, barrio, page):
+                        complete = True
+                        break
+            finally:
+                for task in tasks.values():
+                    task.cancel()
+
+        self.barrio_stats.setdefault(barrio, {"pages": 0, "found": 0})["complete"] = complete
+        if crawl.checkpoint is not None:
+            crawl.checkpoint.record_barrio(self.fuente, barrio, complete)
+        print(f"  Found {found} properties in {barrio}")
+        return found
+
+    def _ran_out(self, crawl: "_Crawl", barrio: str, page: int) -> bool:
+        """
+        Whether a page that came back None is past the barrio's last page,
+        not a failed, shed or blocked one: it must show the no-results
+        marker. An empty page 1 doesn't count, in case the search URL broke.
+        """
+        return page > 1 and self.get_search_url(barrio, page) in crawl.empty_pages
+
+    def _short_page(self, crawl: "_Crawl", barrio: str, page: int) -> bool:
+        """Whether a page after the first held fewer listing cards than page 1: the barrio's last page"""
+        if page == 1:
+            return False
+        first = crawl.page_sizes.get(self.get_search_url(barrio, 1))
+        size = crawl.page_sizes.get(self.get_search_url(barrio, page))
+        return first is not None and size is not None and size < first
+
+    async def _scrape_barrio_incremental(self, crawl: "_Crawl", barrio: str, max_pages: int) -> tuple[int, bool]:
+        seen_index = crawl.seen_index
+        found = 0
+        for page in range(1, max_pages + 1):
+            if self._page_done(crawl, barrio, page):
+                continue
+            page_properties = await self._fetch_and_parse(crawl, self.get_search_url(barrio, page), barrio, page)
+            if page_properties is None:
+                return found, self._ran_out(crawl, barrio, page)
+            await self._emit_page(crawl, barrio, page, page_properties)
+            found += len(page_properties)
+
+            external_ids = [prop["externalId"] for prop in page_properties]
+            known_share = seen_index.known_share(self.fuente, external_ids)
+            seen_index.add(self.fuente, external_ids)
+            if self._short_page(crawl, barrio, page):
+                return found, True
+            if known_share >= self.known_share_threshold and page < max_pages:
+                print(f"  {barrio}: page {page} is {known_share:.0%} known, stopping")
+                # Later pages went unseen
+                return found, False
+
+        # Stopped at the max_pages cap: there may be more pages
+        return found, False
+
+    async def _scrape_barrios_async(
+        self,
+        barrios: List[str],
+        max_pages: int,
+        emit: Callable[[List[Dict[str, Any]]], Awaitable[None]],
+        seen_index: Optional[SeenIndex] = None,
+        parse_workers: int = 0,
+        deadline: Optional[Deadline] = None,
+        checkpoint: Optional[Checkpoint] = None,
+    ):
+        fetcher = self._create_fetcher()
+        parse_pool = ParsePool(self, parse_workers) if parse_workers > 0 else None
+        crawl = _Crawl(fetcher, emit, seen_index, parse_pool, deadline, checkpoint)
+        if checkpoint is not None:
+            barrios = [barrio for barrio in barrios if not checkpoint.barrio_done(self.fuente, barrio)]
+        if deadline is not None:
+            deadline.expect_first_pages(sum(1 for barrio in barrios if not self._page_done(crawl, barrio, 1)))
+        try:
+            await asyncio.gather(
+                *(self._scrape_barrio_async(crawl, barrio, max_pages) for barrio in barrios)
+            )
+        finally:
+            fetcher.close()
+            if parse_pool is not None:
+                parse_pool.close()
+
+    def _crawl_pages(
+        self,
+        barrios: List[str],
+        max_pages: int,
+        seen_index: Optional[SeenIndex],
+        parse_workers: int,
+        max_pending_pages: int,
+        deadline: Optional[Deadline] = None,
+        checkpoint: Optional[Checkpoint] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Run the async crawl on a background thread and yield each parsed
+        results page. The queue between them is bounded, so the crawl
+        pauses when the consumer falls behind.
+        """
+        pages: "queue.Queue" = queue.Queue(maxsize=max_pending_pages)
+        stopped = threading.Event()
+
+        def put(item):
+            while not stopped.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+            raise asyncio.CancelledError()
+
+        async def emit(page_properties):
+            await asyncio.to_thread(put, page_properties)
+
+        def run():
+            try:
+                asyncio.run(
+                    self._scrape_barrios_async(barrios, max_pages, emit, seen_index, parse_workers, deadline, checkpoint)
+                )
+                put(_CRAWL_DONE)
+            except BaseException as e:
+                if not stopped.is_set():
+                    put(e)
+
+        crawler = threading.Thread(target=run, name=f"crawl-{self.fuente}", daemon=True)
+        crawler.start()
+        try:
+            while True:
+                item = pages.get()
+                if item is _CRAWL_DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stopped.set()
+            crawler.join()
+
+    def _enrich_pages(
+        self,
+        pages: Iterable[List[Dict[str, Any]]],
+        existing_lookup: Optional[Callable[[str, List[str]], Dict[str, Dict[str, Any]]]] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Fetch and merge detail pages for a stream of result pages, keeping
+        a bounded number of detail fetches in flight.
+
+        existing_lookup(fuente, external_ids) returns what's already stored
+        for a page's listings ({"fingerprint", "detail"} per external ID).
+        Listings whose stored photos are complete and whose card fingerprint
+        hasn't changed reuse the stored detail fields instead of being fetched.
+        Detail fetches shed by the deadline fall back to the stored fields too.
+        """
+        max_workers = self.detail_workers
+        completed = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = set()
+            for page in pages:
+                existing = {}
+                if existing_lookup is not None:
+                    try:
+                        with get_profiler().stage("enrich"):
+                            existing = existing_lookup(self.fuente, [prop["externalId"] for prop in page])
+                    except Exception as e:
+                        print(f"Error looking up existing listings: {e}")
+
+                for prop in page:
+                    stored = existing.get(prop["externalId"])
+                    if (
+                        stored
+                        and len(stored["detail"].get("fotos") or []) >= self.min_complete_photos
+                        and stored["fingerprint"] == listing_fingerprint(prop)
+                    ):
+                        self.merge_detail(prop, stored["detail"])
+                        self.detail_stats["skipped"] += 1
+                        get_metrics().inc("detail_pages_skipped", source=self.fuente, barrio=prop.get("barrio"))
+                        yield prop
+                        continue
 
-        return all_properties
+                    if deadline is not None:
+                        deadline.expect_details(1)
+                    pending.add(executor.submit(self._fetch_detail_for_property, prop, stored, deadline))
+                    if len(pending) < max_workers * 4:
+                        continue
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        completed += 1
+                        if completed % 20 == 0:
+                            print(f"  Detail pages: {completed} fetched")
+                        yield future.result()
+            for future in as_completed(pending):
+                completed += 1
+                yield future.result()
+        print(f"  Detail pages: {completed} fetched, {self.detail_stats['skipped']} unchanged")
+
+    def iter_properties(
+        self,
+        barrios: List[str],
+        max_pages_per_barrio: int = 2,
+        fetch_details: bool = True,
+        seen_index: Optional[SeenIndex] = None,
+        parse_workers: int = 0,
+        max_pending_pages: int = 8,
+        existing_lookup: Optional[Callable[[str, List[str]], Dict[str, Dict[str, Any]]]] = None,
+        deadline: Optional[Deadline] = None,
+        checkpoint: Optional[Checkpoint] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream properties from multiple neighborhoods as each results page
+        is parsed, through optional detail page enrichment (see
+        _enrich_pages for existing_lookup). With a deadline, extra result
+        pages and then detail fetches are shed as time runs out. With a
+        checkpoint, parsed pages are journaled and pages finished by a
+        resumed run are skipped.
+
+        Pass a seen_index for an incremental crawl that stops paginating a
+        barrio once its pages only hold listings seen by earlier runs.
+        With parse_workers > 0, pages are parsed in a process pool while
+        the next ones download.
+        """
+        print(f"Scraping {len(barrios)} barrios...")
+        pages = self._crawl_pages(
+            barrios, max_pages_per_barrio, seen_index, parse_workers, max_pending_pages, deadline, checkpoint
+        )
+
+        if fetch_details and self.fetch_detail_pages:
+            yield from self._enrich_pages(pages, existing_lookup, deadline)
+        else:
+            for page in pages:
+                yield from page
+
+    def scrape_barrio(self, barrio: str, max_pages: int = 3, seen_index: Optional[SeenIndex] = None) -> List[Dict[str, Any]]:
+        """Scrape properties from a specific neighborhood"""
+        return list(self.iter_properties([barrio], max_pages, fetch_details=False, seen_index=seen_index))
+
+    def scrape_all(
+        self,
+        barrios: List[str],
+        max_pages_per_barrio: int = 2,
+        fetch_details: bool = True,
+        seen_index: Optional[SeenIndex] = None,
+        parse_workers: int = 0,
+        existing_lookup: Optional[Callable[[str, List[str]], Dict[str, Dict[str, Any]]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Scrape properties from multiple neighborhoods. List form of iter_properties."""
+        return list(self.iter_properties(
+            barrios, max_pages_per_barrio, fetch_details, seen_index, parse_workers,
+            existing_lookup=existing_lookup,
+        ))
+
+    def parse_detail(self, soup, url: str, fetched_on: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Extract fields from a parsed detail page: fotos, descripcion,
+        attribute fields missing from the result card and fechaPublicacion
+        (ISO date, relative ones resolved against fetched_on; see
+        clean_date). Only non-empty values are merged. Override in subclass.
+        """
+        return {}
+
+    def fetch_detail(self, url: str) -> Dict[str, Any]:
+        """Fetch a property's detail page and return its parse_detail fields"""
+        content, fetched_at = self._get_with_cache(url, "detail", self.detail_headers)
+        started = time.perf_counter()
+        with get_profiler().stage("parse"):
+            soup = self.parse_html(content)
+            detail = self.parse_detail(soup, url, date.fromtimestamp(fetched_at)) if soup is not None else {}
+        elapsed = time.perf_counter() - started
+        get_metrics().observe("parse_seconds", elapsed, source=self.fuente, kind="detail")
+        self.detail_stats["parse_seconds"] += elapsed
+        self.detail_stats["parse_max_seconds"] = max(self.detail_stats["parse_max_seconds"], elapsed)
+        return detail
 
-    def get_photos_from_detail(self, url: str) -> List[str]:
-        """Get all photos from a property detail page. Override in subclass."""
-        return []
+    @staticmethod
+    def merge_detail(prop: Dict[str, Any], detail: Dict[str, Any]) -> Dict[str, Any]:
+        """Overlay the non-empty detail fields onto a property dict"""
+        for key, value in detail.items():
+            if value is not None and value != "" and value != []:
+                prop[key] = value
+        return prop
 
-    def _fetch_photos_for_property(self, prop: Dict[str, Any]) -> Dict[str, Any]:
-        """Fetch all photos for a single property"""
+    def _fetch_detail_for_property(
+        self,
+        prop: Dict[str, Any],
+        stored: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        """Fetch the detail page of a single property and merge it in"""
         try:
-            time.sleep(random.uniform(0.5, 1.5))  # Small delay
-            photos = self.get_photos_from_detail(prop["url"])
-            if photos:
-                prop["fotos"] = photos
+            if deadline is not None and not deadline.allow_detail():
+                # Out of time: keep whatever was stored rather than blanking it
+                if stored:
+                    self.merge_detail(prop, stored["detail"])
+                return prop
+            self.detail_limiter.acquire(prop["url"])
+            try:
+                with get_profiler().stage("enrich"):
+                    detail = self.fetch_detail(prop["url"])
+            finally:
+                if deadline is not None:
+                    deadline.detail_done()
+            self.detail_stats["fetched"] += 1
+            get_metrics().inc("detail_pages_fetched", source=self.fuente, barrio=prop.get("barrio"))
+            self.merge_detail(prop, detail)
         except Exception as e:
-            print(f"Error fetching photos for {prop.get('externalId')}: {e}")
+            self.detail_stats["errors"] += 1
+            get_metrics().inc("detail_pages_failed", source=self.fuente, barrio=prop.get("barrio"))
+            print(f"Error fetching detail page for {prop.get('externalId')}: {e}")
+            # Keep the stored gallery and description rather than blanking them
+            if stored:
+                self.merge_detail(prop, stored["detail"])
         return prop
 
-    def enrich_with_photos(self, properties: List[Dict[str, Any]], max_workers: int = 5) -> List[Dict[str, Any]]:
-        """Fetch all photos for properties in parallel"""
-        enriched = []
-        total = len(properties)
-        completed = 0
-
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(self._fetch_photos_for_property, prop): prop for prop in properties}
-
-            for future in as_completed(futures):
-                try:
-                    result = future.result()
-                    enriched.append(result)
-                    completed += 1
-                    if completed % 20 == 0:
-                        print(f"  Photos: {completed}/{total} completed")
-                except Exception as e:
-                    enriched.append(futures[future])  # Keep original if failed
-                    print(f"Error: {e}")
-
-        print(f"  Photos: {completed}/{total} completed")
-        return enriched
+    def enrich_with_details(
+        self,
+        properties: List[Dict[str, Any]],
+        existing_lookup: Optional[Callable[[str, List[str]], Dict[str, Dict[str, Any]]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Fetch detail pages for properties in parallel"""
+        return list(self._enrich_pages([properties], existing_lookup))
 
     @staticmethod
     def clean_price(price_text: str) -> tuple[Optional[float], str]:
@@ -247,3 +872,81 @@ class BaseScraper(ABC):
             except ValueError:
                 pass
         return None
+
+    @classmethod
+    def classify_feature(cls, text: str) -> Optional[tuple[str, Any]]:
+        """
+        The property field a feature text ("50 m2 cub.", "2 dormitorios",
+        "Cant. Baños: 1") fills and its value, or None. An area that says
+        neither covered nor total comes back as "metros".
+        """
+        text = text.lower()
+        if "m²" in text or "m2" in text:
+            area = cls.clean_area(text)
+            if "tot" in text:
+                return "metrosTotales", area
+            if "cub" in text:
+                return "metrosCuadrados", area
+            return "metros", area
+        if "amb" in text:
+            return "ambientes", cls.clean_number(text)
+        if "dorm" in text:
+            return "dormitorios", cls.clean_number(text)
+        if "baño" in text:
+            return "banos", cls.clean_number(text)
+        return None
+
+    def parse_features(self, texts: Iterable[str]) -> Dict[str, Any]:
+        """Map feature texts to property fields; see classify_feature()"""
+        fields = dict.fromkeys(("ambientes", "dormitorios", "banos", "metrosCuadrados", "metrosTotales"))
+        for text in texts:
+            feature = self.classify_feature(text)
+            if feature is None:
+                continue
+            field, value = feature
+            if field == "metros":
+                # Taken as covered area unless a labelled one shows up
+                if fields["metrosCuadrados"] is None:
+                    fields["metrosCuadrados"] = value
+            else:
+                fields[field] = value
+        return fields
+
+    @staticmethod
+    def tipo_from_text(text: str) -> str:
+        """Property type from a title or type label"""
+        text = text.lower()
+        return "casa" if any(word in text for word in ["casa", "chalet", "ph"]) else "departamento"
+
+    @staticmethod
+    def clean_date(text: str, today: Optional[date] = None) -> Optional[str]:
+        """
+        Extract a publication date from text like "Publicado hace 3 días",
+        "Publicado hoy" or "15/03/2024". Relative dates count back from
+        `today`: the day the page was fetched, which for a cached or
+        archived page isn't the current one. Returns an ISO date (YYYY-MM-DD).
+        """
+        if not text:
+            return None
+        text = text.lower()
+        today = today or date.today()
+
+        match = re.search(r"(\d{1,2})/(\d{1,2})/(\d{4})", text)
+        if match:
+            day, month, year = (int(g) for g in match.groups())
+            try:
+                return date(year, month, day).isoformat()
+            except ValueError:
+                return None
+
+        # Relative dates are approximate: a month is 30 days, a year 365
+        match = re.search(r"hace\s+(?:más de\s+)?(\d+|un|una)\s+(minuto|hora|día|dia|semana|mes|año)", text)
+        if match:
+            amount = 1 if match.group(1) in ("un", "una") else int(match.group(1))
+            days = {"minuto": 0, "hora": 0, "día": 1, "dia": 1, "semana": 7, "mes": 30, "año": 365}[match.group(2)]
+            return (today - timedelta(days=amount * days)).isoformat()
+        if "hoy" in text:
+            return today.isoformat()
+        if "ayer" in text:
+            return (today - timedelta(days=1)).isoformat()
+        return None
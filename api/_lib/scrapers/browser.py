@@ -0,0 +1,346 @@
+import asyncio
+import atexit
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from ..metrics import get_metrics
+from .throttle import check_status
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Resource types we never need: the scrapers only read the DOM and take
+# image URLs from attributes
+DEFAULT_BLOCKED_TYPES = ("image", "media", "font", "stylesheet")
+
+# Analytics, ads and tag managers
+DEFAULT_BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googlesyndication.com",
+    "doubleclick.net",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "clarity.ms",
+    "criteo.com",
+    "taboola.com",
+    "newrelic.com",
+    "nr-data.net",
+)
+
+# Rough per-request transfer sizes, only used to estimate bytes saved
+# since aborted requests never report their real size
+TYPICAL_BYTES = {
+    "image": 40_000,
+    "media": 250_000,
+    "font": 35_000,
+    "stylesheet": 20_000,
+    "script": 30_000,
+}
+
+
+def _host_matches(host: str, patterns: Iterable[str]) -> bool:
+    return any(host == p or host.endswith("." + p) for p in patterns)
+
+
+class RouteFilter:
+    """
+    Playwright route handler that aborts requests by resource type and host.
+
+    If `allowed_hosts` is set, only the page itself and requests to those
+    hosts (and their subdomains) go through.
+    """
+
+    def __init__(
+        self,
+        blocked_types: Iterable[str] = DEFAULT_BLOCKED_TYPES,
+        blocked_hosts: Iterable[str] = DEFAULT_BLOCKED_HOSTS,
+        allowed_hosts: Optional[Iterable[str]] = None,
+    ):
+        self.blocked_types = frozenset(blocked_types)
+        self.blocked_hosts = tuple(blocked_hosts)
+        self.allowed_hosts = tuple(allowed_hosts) if allowed_hosts else None
+        self.stats = {
+            "requests_allowed": 0,
+            "requests_blocked": 0,
+            "bytes_loaded": 0,
+            "bytes_saved_estimate": 0,
+            "blocked_by_type": {},
+        }
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        if resource_type == "document":
+            return False
+        if resource_type in self.blocked_types:
+            return True
+        host = urlparse(url).hostname or ""
+        if _host_matches(host, self.blocked_hosts):
+            return True
+        if self.allowed_hosts is not None and not _host_matches(host, self.allowed_hosts):
+            return True
+        return False
+
+    async def handle(self, route):
+        request = route.request
+        resource_type = request.resource_type
+        if self.should_block(request.url, resource_type):
+            self.stats["requests_blocked"] += 1
+            self.stats["bytes_saved_estimate"] += TYPICAL_BYTES.get(resource_type, 0)
+            by_type = self.stats["blocked_by_type"]
+            by_type[resource_type] = by_type.get(resource_type, 0) + 1
+            await route.abort()
+        else:
+            self.stats["requests_allowed"] += 1
+            await route.continue_()
+
+    def record_response(self, response):
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self.stats["bytes_loaded"] += int(length)
+
+
+class _PooledContext:
+    """A warm browser context with a single reusable page"""
+
+    def __init__(self, profile: str, context, page):
+        self.profile = profile
+        self.context = context
+        self.page = page
+        self.pages_served = 0
+
+    async def close(self):
+        try:
+            await self.context.close()
+        except Exception:
+            pass
+
+
+class BrowserPool:
+    """
+    One headless Chromium shared by every Playwright scraper in the process,
+    with a bounded set of warm contexts.
+
+    Playwright's async API is bound to the event loop that started it, so
+    the pool runs its own loop on a background thread. Scrapers submit
+    renders from any thread or loop and await the result.
+
+    Contexts are keyed by profile (the scraper's fuente) so cookies don't
+    leak between sites. A context is recycled after `max_pages_per_context`
+    renders or as soon as a render fails.
+    """
+
+    def __init__(self, size: int = 4, max_pages_per_context: int = 25):
+        self.size = size
+        self.max_pages_per_context = max_pages_per_context
+        self.stats = {
+            "launches": 0,
+            "contexts_created": 0,
+            "context_reuses": 0,
+            "contexts_recycled": 0,
+            "pages_rendered": 0,
+            "errors": 0,
+            "ready_timeouts": 0,
+            "render_seconds": 0.0,
+            "render_max_seconds": 0.0,
+        }
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._playwright = None
+        self._browser = None
+        self._idle: Dict[str, List[_PooledContext]] = {}
+        self._live = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._launch_lock: Optional[asyncio.Lock] = None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="browser-pool", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+        return self._loop
+
+    async def _ensure_browser(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+            self._launch_lock = asyncio.Lock()
+
+        async with self._launch_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            if self._browser is not None:
+                # Browser crashed: every pooled context died with it
+                self._idle.clear()
+                self._live = 0
+            if self._playwright is None:
+                from playwright.async_api import async_playwright
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=True,
+                args=['--no-sandbox', '--disable-setuid-sandbox']
+            )
+            self.stats["launches"] += 1
+            print("Started Playwright browser")
+
+    async def _acquire(self, profile: str, route_filter: Optional[RouteFilter]) -> _PooledContext:
+        idle = self._idle.get(profile)
+        if idle:
+            self.stats["context_reuses"] += 1
+            return idle.pop()
+
+        # Make room by evicting an idle context from another profile
+        if self._live >= self.size:
+            for contexts in self._idle.values():
+                if contexts:
+                    await self._discard(contexts.pop())
+                    break
+
+        context = await self._browser.new_context(
+            user_agent=USER_AGENT,
+            viewport={"width": 1920, "height": 1080},
+            locale="es-AR"
+        )
+        if route_filter is not None:
+            await context.route("**/*", route_filter.handle)
+            context.on("response", route_filter.record_response)
+        page = await context.new_page()
+        self._live += 1
+        self.stats["contexts_created"] += 1
+        return _PooledContext(profile, context, page)
+
+    async def _discard(self, pooled: _PooledContext):
+        self._live -= 1
+        self.stats["contexts_recycled"] += 1
+        await pooled.close()
+
+    async def _release(self, pooled: _PooledContext, ok: bool):
+        if not ok or pooled.pages_served >= self.max_pages_per_context:
+            await self._discard(pooled)
+        else:
+            self._idle.setdefault(pooled.profile, []).append(pooled)
+
+    async def _wait_until_ready(self, page, ready_selector: Optional[str], ready_timeout: int):
+        """Return as soon as `ready_selector` is attached, or after `ready_timeout` ms"""
+        if not ready_selector:
+            # No readiness condition declared: fall back to a fixed wait
+            await page.wait_for_timeout(3000)
+            return
+
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+        try:
+            await page.wait_for_selector(ready_selector, state="attached", timeout=ready_timeout)
+        except PlaywrightTimeoutError:
+            # Keep whatever rendered; the parser decides if it's usable
+            self.stats["ready_timeouts"] += 1
+
+    async def _render(
+        self,
+        url: str,
+        profile: str,
+        ready_selector: Optional[str],
+        ready_timeout: int,
+        route_filter: Optional[RouteFilter],
+    ) -> bytes:
+        await self._ensure_browser()
+        async with self._slots:
+            pooled = await self._acquire(profile, route_filter)
+            ok = False
+            started = time.monotonic()
+            try:
+                page = pooled.page
+
+                # Navigate, then wait only until the listings (or the empty-results marker) show up
+                response = await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+                if response is not None:
+                    check_status(response.status, response.headers.get("retry-after"))
+                await self._wait_until_ready(page, ready_selector, ready_timeout)
+
+                content = await page.content()
+                pooled.pages_served += 1
+                ok = True
+
+                elapsed = time.monotonic() - started
+                self.stats["pages_rendered"] += 1
+                self.stats["render_seconds"] += elapsed
+                self.stats["render_max_seconds"] = max(self.stats["render_max_seconds"], elapsed)
+                get_metrics().observe("render_seconds", elapsed, host=urlparse(url).hostname or "")
+                return content.encode("utf-8")
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+            finally:
+                await self._release(pooled, ok)
+
+    async def fetch(
+        self,
+        url: str,
+        profile: str = "default",
+        ready_selector: Optional[str] = None,
+        ready_timeout: int = 10000,
+        route_filter: Optional[RouteFilter] = None,
+    ) -> bytes:
+        """
+        Render a page in a pooled context. Awaitable from any event loop.
+
+        `route_filter` is installed when a context for `profile` is created,
+        so every render for a profile should pass the same filter.
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(
+            self._render(url, profile, ready_selector, ready_timeout, route_filter), loop
+        )
+        return await asyncio.wrap_future(future)
+
+    async def _shutdown(self):
+        for contexts in self._idle.values():
+            for pooled in contexts:
+                await pooled.close()
+        self._idle.clear()
+        self._live = 0
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def close(self):
+        """Close the browser and stop the pool's event loop"""
+        with self._start_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=30)
+        except Exception as e:
+            print(f"Error closing browser pool: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=5)
+        self._slots = None
+        self._launch_lock = None
+
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Return the process-wide browser pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+        return _pool
+
+
+def close_browser_pool():
+    """Close the process-wide browser pool if it was ever started"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,200 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+DEFAULT_CACHE_DIR = ".scraper-cache"
+
+# Freshness per kind of page, in seconds. Search results change all the
+# time; a listing's detail page (photos) almost never does.
+DEFAULT_TTLS = {
+    "search": 30 * 60,
+    "detail": 7 * 24 * 3600,
+}
+
+# Stale entries are kept this long so they can still be revalidated
+# with If-None-Match / If-Modified-Since
+MAX_STALE_AGE = 30 * 24 * 3600
+
+
+class CacheEntry:
+    def __init__(self, body: bytes, etag: Optional[str], last_modified: Optional[str], fetched_at: float):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this entry"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Size-bounded on-disk response cache keyed by URL, backed by sqlite.
+
+    Bodies are zlib-compressed. Entries older than MAX_STALE_AGE are dropped
+    on open, and when the cache grows past `max_bytes` the least recently
+    used entries are evicted.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, ttls: Optional[Dict[str, int]] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "revalidated": 0,
+            "evicted": 0,
+            "bytes_served": 0,
+            "bytes_stored": 0,
+        }
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self._db.execute("DELETE FROM responses WHERE fetched_at < ?", (time.time() - MAX_STALE_AGE,))
+        self._db.commit()
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """Return the cached entry for a URL, fresh or not"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+        return CacheEntry(zlib.decompress(row[0]), row[1], row[2], row[3])
+
+    def is_fresh(self, entry: CacheEntry, kind: str) -> bool:
+        return entry.age() < self.ttls.get(kind, 0)
+
+    def lookup(self, url: str, kind: str) -> Optional[bytes]:
+        """Return the body if a fresh entry exists"""
+        entry = self.get(url)
+        if entry is not None and self.is_fresh(entry, kind):
+            self.record_hit(entry)
+            return entry.body
+        return None
+
+    def record_hit(self, entry: CacheEntry):
+        self.stats["hits"] += 1
+        self.stats["bytes_served"] += len(entry.body)
+
+    def revalidated(self, url: str, entry: CacheEntry, fetched_at: Optional[float] = None):
+        """The server answered 304: the stored body is fresh again"""
+        self.stats["revalidated"] += 1
+        self.stats["bytes_served"] += len(entry.body)
+        with self._lock:
+            self._db.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (fetched_at or time.time(), url))
+            self._db.commit()
+
+    def put(
+        self,
+        url: str,
+        kind: str,
+        body: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        fetched_at: Optional[float] = None,
+    ):
+        """Store a freshly downloaded body. Every put is a cache miss."""
+        compressed = zlib.compress(body)
+        now = time.time()
+        with self._lock:
+            old = self._db.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            if old:
+                self._size -= old[0]
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, kind, compressed, etag, last_modified, fetched_at or now, now, len(compressed)),
+            )
+            self._size += len(compressed)
+            if self._size > self.max_bytes:
+                self._evict()
+            self._db.commit()
+        self.stats["misses"] += 1
+        self.stats["bytes_stored"] += len(body)
+
+    def _evict(self):
+        """Drop least recently used entries until we're at 90% of max_bytes"""
+        target = self.max_bytes * 0.9
+        rows = self._db.execute("SELECT url, size FROM responses ORDER BY accessed_at").fetchall()
+        for url, size in rows:
+            if self._size <= target:
+                break
+            self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self._size -= size
+            self.stats["evicted"] += 1
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def response_time(date_header: Optional[str]) -> float:
+    """Unix time from a response's Date header, or now if it's missing or unreadable"""
+    if date_header:
+        try:
+            return parsedate_to_datetime(date_header).timestamp()
+        except (TypeError, ValueError):
+            pass
+    return time.time()
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Return the process-wide response cache, or None if disabled.
+
+    The location comes from SCRAPER_CACHE_DIR; set SCRAPER_CACHE=0 to
+    disable caching.
+    """
+    global _cache
+    if os.environ.get("SCRAPER_CACHE", "1") == "0":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            cache_dir = os.environ.get("SCRAPER_CACHE_DIR", DEFAULT_CACHE_DIR)
+            _cache = ResponseCache(os.path.join(cache_dir, "responses.sqlite"))
+        return _cache
+
+
+def close_response_cache():
+    """Close the process-wide cache; the next get_response_cache() opens it again"""
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+            _cache = None
@@ -0,0 +1,138 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from .cache import DEFAULT_CACHE_DIR
+
+
+class Checkpoint:
+    """
+    Append-only JSON-lines journal of a run's progress, so an interrupted
+    run can be resumed.
+
+    Records, one per line:
+      {"t": "run", "id"}                              the run ID, kept when resuming
+      {"t": "plan", "fuente", "barrios"}              barrios picked for a source
+      {"t": "page", "fuente", "barrio", "page", "properties"}
+                                                      a result page was parsed
+      {"t": "barrio", "fuente", "barrio", "complete"}  a barrio needs no more pages;
+                                                      complete if every listing was seen
+      {"t": "saved", "keys"}                          properties written to Supabase
+
+    Properties from page records that were never saved are the run's
+    parsed-but-unsaved data; their detail pages (photos) are still to be
+    fetched. Each record is a single buffered write with no fsync, so
+    journaling stays off the crawl's critical path. A line cut short by a
+    crash is ignored on load.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._run_id: Optional[str] = None
+        self._plans: Dict[str, List[str]] = {}
+        self._pages = set()
+        self._barrios = set()
+        self._complete = set()
+        self._unsaved: Dict[str, Dict[str, Any]] = {}
+
+        if resume and os.path.exists(path):
+            self._load()
+        # Whether there was an interrupted run to pick up
+        self.resumed = bool(self._plans)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    @staticmethod
+    def _key(fuente: str, external_id: str) -> str:
+        return f"{fuente}\t{external_id}"
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                kind = record.get("t")
+                if kind == "run":
+                    self._run_id = record["id"]
+                elif kind == "plan":
+                    self._plans[record["fuente"]] = record["barrios"]
+                elif kind == "page":
+                    self._pages.add((record["fuente"], record["barrio"], record["page"]))
+                    for prop in record["properties"]:
+                        self._unsaved[self._key(record["fuente"], prop["externalId"])] = prop
+                elif kind == "barrio":
+                    self._barrios.add((record["fuente"], record["barrio"]))
+                    if record.get("complete"):
+                        self._complete.add((record["fuente"], record["barrio"]))
+                elif kind == "saved":
+                    for key in record["keys"]:
+                        self._unsaved.pop(key, None)
+
+    def _append(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    # Resume state, from the interrupted run
+
+    def run_id(self) -> Optional[str]:
+        """ID of the interrupted run"""
+        return self._run_id
+
+    def plan(self, fuente: str) -> Optional[List[str]]:
+        """Barrios the interrupted run had picked for a source"""
+        return self._plans.get(fuente)
+
+    def page_done(self, fuente: str, barrio: str, page: int) -> bool:
+        return (fuente, barrio, page) in self._pages
+
+    def barrio_done(self, fuente: str, barrio: str) -> bool:
+        return (fuente, barrio) in self._barrios
+
+    def barrio_complete(self, fuente: str, barrio: str) -> bool:
+        return (fuente, barrio) in self._complete
+
+    def unsaved(self, fuente: str) -> List[Dict[str, Any]]:
+        """Properties the interrupted run parsed but never saved"""
+        return [prop for prop in self._unsaved.values() if prop["fuente"] == fuente]
+
+    # Progress of this run
+
+    def record_run(self, run_id: str):
+        self._run_id = run_id
+        self._append({"t": "run", "id": run_id})
+
+    def record_plan(self, fuente: str, barrios: List[str]):
+        self._plans[fuente] = list(barrios)
+        self._append({"t": "plan", "fuente": fuente, "barrios": list(barrios)})
+
+    def record_page(self, fuente: str, barrio: str, page: int, properties: List[Dict[str, Any]]):
+        self._append({"t": "page", "fuente": fuente, "barrio": barrio, "page": page, "properties": properties})
+
+    def record_barrio(self, fuente: str, barrio: str, complete: bool = False):
+        self._append({"t": "barrio", "fuente": fuente, "barrio": barrio, "complete": complete})
+
+    def record_saved(self, properties: Iterable[Dict[str, Any]]):
+        self._append({"t": "saved", "keys": [self._key(prop["fuente"], prop["externalId"]) for prop in properties]})
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def finish(self):
+        """The run completed: drop the journal so the next run starts fresh"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def open_checkpoint(resume: bool = False) -> Checkpoint:
+    """Open the run checkpoint in SCRAPER_CACHE_DIR, continuing it when resuming"""
+    cache_dir = os.environ.get("SCRAPER_CACHE_DIR", DEFAULT_CACHE_DIR)
+    return Checkpoint(os.path.join(cache_dir, "checkpoint.jsonl"), resume)
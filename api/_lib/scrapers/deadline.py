@@ -0,0 +1,112 @@
+import threading
+import time
+from typing import Optional
+
+
+class Deadline:
+    """
+    Wall-clock budget for one source's crawl.
+
+    Work is shed in priority order as the end approaches. Projections use
+    the throughput observed so far in this crawl (pages or detail pages
+    finished per second), so a slow site sheds earlier than a fast one:
+
+    1. extra result pages (page 2+), once the remaining time no longer
+       covers the outstanding first pages plus their detail fetches
+    2. detail page enrichment, once it no longer fits next to the
+       outstanding first pages
+    3. first pages, once the time is up
+
+    `end` is a time.monotonic() timestamp shared by every source; `reserve`
+    seconds before it are kept free for flushing writes and deactivation.
+    """
+
+    def __init__(self, end: float, reserve: float = 60.0):
+        self.end = end
+        self.reserve = reserve
+        self.started = time.monotonic()
+        self.stats = {
+            "pages_done": 0,
+            "pages_skipped": 0,
+            "barrios_skipped": 0,
+            "details_done": 0,
+            "details_skipped": 0,
+            "stopped_early": False,
+        }
+        self._lock = threading.Lock()
+        self._pending_first = 0
+        self._pending_details = 0
+        self._properties_seen = 0
+        self._details_started: Optional[float] = None
+
+    def remaining(self) -> float:
+        """Seconds left for crawling, after the reserve"""
+        return self.end - self.reserve - time.monotonic()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def _project(self, done: int, since: Optional[float], count: float) -> float:
+        """Seconds for `count` more units at the observed rate (0 with no observations)"""
+        if not done or since is None or count <= 0:
+            return 0.0
+        return count * (time.monotonic() - since) / done
+
+    def _first_pages_need(self) -> float:
+        return self._project(self.stats["pages_done"], self.started, self._pending_first)
+
+    def _details_need(self, extra: float = 0) -> float:
+        per_page = self._properties_seen / self.stats["pages_done"] if self.stats["pages_done"] else 0
+        count = self._pending_details + self._pending_first * per_page + extra
+        return self._project(self.stats["details_done"], self._details_started, count)
+
+    def expect_first_pages(self, count: int):
+        """Register the barrios about to be crawled"""
+        with self._lock:
+            self._pending_first += count
+
+    def allow_page(self, first: bool) -> bool:
+        """Whether a result page may still be fetched. Call right before fetching."""
+        with self._lock:
+            remaining = self.remaining()
+            if first:
+                allowed = remaining > 0
+            else:
+                need = self._first_pages_need() + self._details_need() + self._project(self.stats["pages_done"], self.started, 1)
+                allowed = remaining > need
+            if not allowed:
+                if first:
+                    self._pending_first -= 1
+                    self.stats["barrios_skipped"] += 1
+                else:
+                    self.stats["pages_skipped"] += 1
+            return allowed
+
+    def page_done(self, first: bool, properties: int):
+        with self._lock:
+            if first:
+                self._pending_first -= 1
+            self.stats["pages_done"] += 1
+            self._properties_seen += properties
+
+    def expect_details(self, count: int):
+        """Register detail pages queued for fetching"""
+        with self._lock:
+            self._pending_details += count
+
+    def allow_detail(self) -> bool:
+        """Whether a queued detail page may still be fetched. Call right before fetching."""
+        with self._lock:
+            if self._details_started is None:
+                self._details_started = time.monotonic()
+            allowed = self.remaining() > self._first_pages_need() + self._project(
+                self.stats["details_done"], self._details_started, 1
+            )
+            self._pending_details -= 1
+            if not allowed:
+                self.stats["details_skipped"] += 1
+            return allowed
+
+    def detail_done(self):
+        with self._lock:
+            self.stats["details_done"] += 1
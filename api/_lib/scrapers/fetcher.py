@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Token bucket that refills `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class HostRateLimiter:
+    """One token bucket per host, all sharing the same rate and burst"""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def bucket_for(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return self._buckets[host]
+
+    async def acquire(self, url: str):
+        await self.bucket_for(url).acquire()
+
+
+class BlockingHostRateLimiter:
+    """Thread-safe per-host token buckets for fetches made from plain worker threads"""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def acquire(self, url: str):
+        """Block until the URL's host has a token available and take it"""
+        host = urlparse(url).netloc
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, updated = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - updated) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                delay = (1 - tokens) / self.rate
+            time.sleep(delay)
+
+
+class AsyncFetcher:
+    """
+    Asyncio fetch engine. Keeps up to `max_concurrency` requests in flight
+    while a per-host token bucket decides when each one may start.
+
+    `fetch_fn` is either a coroutine function (Playwright renders through
+    the browser pool) or a blocking callable (requests), which is run on
+    a thread pool. `cache_lookup`, if given, is tried first so cache hits
+    don't spend a rate-limit token.
+    """
+
+    def __init__(
+        self,
+        fetch_fn: Callable[[str], Any],
+        rate: float,
+        burst: float = 1.0,
+        max_concurrency: int = 8,
+        threads: Optional[int] = None,
+        cache_lookup: Optional[Callable[[str], Optional[bytes]]] = None,
+    ):
+        self._fetch_fn = fetch_fn
+        self._cache_lookup = cache_lookup
+        self.limiter = HostRateLimiter(rate, burst)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=threads or max_concurrency)
+
+    async def fetch(self, url: str, admit: Optional[Callable[[], bool]] = None) -> Optional[bytes]:
+        """
+        Fetch a URL once the host's rate limit allows it. If given, `admit`
+        is asked once a concurrency slot is free; returning False drops the
+        fetch (None is returned).
+        """
+        if self._cache_lookup is not None:
+            cached = self._cache_lookup(url)
+            if cached is not None:
+                return cached
+
+        async with self._semaphore:
+            # Before the rate limiter, so dropped fetches don't spend tokens
+            if admit is not None and not admit():
+                return None
+            await self.limiter.acquire(url)
+            if asyncio.iscoroutinefunction(self._fetch_fn):
+                return await self._fetch_fn(url)
+            return await self.run_sync(self._fetch_fn, url)
+
+    async def run_sync(self, fn: Callable, *args):
+        """Run a blocking callable on the fetcher's thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
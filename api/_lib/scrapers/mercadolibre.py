@@ -1,7 +1,8 @@
 from typing import List, Dict, Any, Optional
+from datetime import date
 from bs4 import BeautifulSoup
 from .base import BaseScraper
-import requests
+from .parsing import decode_html, find_json_assignment, find_json_script
 import re
 
 class MercadoLibreScraper(BaseScraper):
@@ -9,6 +10,17 @@ class MercadoLibreScraper(BaseScraper):
 
     BASE_URL = "https://inmuebles.mercadolibre.com.ar"
     use_playwright = True  # Use Playwright to bypass bot detection
+    rate_limit = 0.5
+    rate_burst = 2
+    max_concurrency = 4
+    ready_selector = "li.ui-search-layout__item, div.ui-search-result"
+    empty_selector = ".ui-search-rescue"
+    # Search pages only need MercadoLibre's own scripts; everything else is tracking
+    allowed_hosts = ("mercadolibre.com.ar", "mercadolibre.com", "mlstatic.com")
+    detail_headers = {
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "es-AR,es;q=0.9",
+    }
 
     @property
     def fuente(self) -> str:
@@ -80,33 +92,10 @@ class MercadoLibreScraper(BaseScraper):
                     fotos.append(img_url)
 
             # Attributes (rooms, bathrooms, area)
-            ambientes = None
-            dormitorios = None
-            banos = None
-            metros_cuadrados = None
-            metros_totales = None
-
             attrs = element.select(".ui-search-card-attributes__attribute, .ui-search-item__attributes li")
-            for attr in attrs:
-                text = attr.get_text(strip=True).lower()
-                if "dormitorio" in text or "dorm" in text:
-                    dormitorios = self.clean_number(text)
-                elif "ambiente" in text or "amb" in text:
-                    ambientes = self.clean_number(text)
-                elif "baño" in text:
-                    banos = self.clean_number(text)
-                elif "m²" in text or "m2" in text:
-                    area = self.clean_area(text)
-                    if "total" in text:
-                        metros_totales = area
-                    elif "cubierto" in text or "cub" in text:
-                        metros_cuadrados = area
-                    elif metros_cuadrados is None:
-                        metros_cuadrados = area
-
-            # Determine property type from title
-            titulo_lower = titulo.lower()
-            tipo = "casa" if any(word in titulo_lower for word in ["casa", "chalet", "ph"]) else "departamento"
+            attributes = self.parse_features(attr.get_text(strip=True) for attr in attrs)
+
+            tipo = self.tipo_from_text(titulo)
 
             return {
                 "externalId": external_id,
@@ -115,11 +104,7 @@ class MercadoLibreScraper(BaseScraper):
                 "precio": precio,
                 "moneda": moneda,
                 "tipo": tipo,
-                "ambientes": ambientes,
-                "dormitorios": dormitorios,
-                "banos": banos,
-                "metrosCuadrados": metros_cuadrados,
-                "metrosTotales": metros_totales,
+                **attributes,
                 "fotos": fotos,
                 "descripcion": None,
             }
@@ -128,42 +113,114 @@ class MercadoLibreScraper(BaseScraper):
             print(f"Error parsing MercadoLibre listing: {e}")
             return None
 
-    def get_photos_from_detail(self, url: str) -> List[str]:
-        """Get all photos from MercadoLibre detail page"""
-        try:
-            # Use fresh headers for detail page
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                "Accept-Language": "es-AR,es;q=0.9",
-            }
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, "lxml")
-
-            photos = []
-            seen = set()
-
-            # Find all images from mlstatic
-            for img in soup.select("img[src*='mlstatic']"):
-                src = img.get("src", "")
-                if src and "mlstatic" in src and src not in seen:
-                    # Convert to high quality version
-                    # Replace size indicators like -F, -V, -W with -O (original)
-                    high_quality = re.sub(r"-[A-Z](-null)?\.(jpg|webp)", r"-O.\2", src)
-                    high_quality = re.sub(r"_[A-Z]\.(jpg|webp)", r"_O.\1", high_quality)
-                    if high_quality not in seen:
-                        seen.add(high_quality)
-                        photos.append(high_quality)
-
-            # Also check data-zoom attributes
-            for img in soup.select("img[data-zoom]"):
-                src = img.get("data-zoom", "")
-                if src and src not in seen:
-                    seen.add(src)
-                    photos.append(src)
-
-            return photos[:20]  # Limit to 20 photos
+    def extract_structured(self, content: bytes) -> Optional[List[Dict[str, Any]]]:
+        """Map the search results in __PRELOADED_STATE__ (polycards) to listing dicts"""
+        text = decode_html(content)
+        state = find_json_script(text, "__PRELOADED_STATE__") or find_json_assignment(text, "__PRELOADED_STATE__")
+        if not isinstance(state, dict):
+            return None
 
-        except Exception as e:
-            return []
+        results = state.get("pageState", {}).get("initialState", {}).get("results")
+        if not isinstance(results, list):
+            return None
+
+        properties = []
+        for result in results:
+            card = result.get("polycard") if isinstance(result, dict) else None
+            if not card:
+                continue
+            prop = self._parse_polycard(card)
+            if prop is None:
+                # Unknown card shape: let the DOM path handle the page
+                return None
+            properties.append(prop)
+        return properties
+
+    def _parse_polycard(self, card: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        url = card.get("metadata", {}).get("url", "")
+        if not url:
+            return None
+        if not url.startswith("http"):
+            url = f"https://{url}"
+
+        # Same ID format as the DOM path ("MLA-123"), taken from the URL
+        external_id_match = re.search(r"MLA-?(\d+)", url)
+        external_id = external_id_match.group(0) if external_id_match else url
+
+        components = {c.get("type"): c for c in card.get("components", []) if isinstance(c, dict)}
+
+        titulo = components.get("title", {}).get("title", {}).get("text")
+        if not titulo:
+            return None
+
+        precio = None
+        moneda = "USD"
+        current_price = components.get("price", {}).get("price", {}).get("current_price", {})
+        if current_price.get("value") is not None:
+            precio = float(current_price["value"])
+            moneda = "ARS" if current_price.get("currency") == "ARS" else "USD"
+
+        attribute_texts = components.get("attributes_list", {}).get("attributes_list", {}).get("texts", [])
+
+        fotos = []
+        pictures = card.get("pictures", {}).get("pictures", [])
+        if pictures and pictures[0].get("id"):
+            fotos.append(f"https://http2.mlstatic.com/D_NQ_NP_{pictures[0]['id']}-O.webp")
+
+        return {
+            "externalId": external_id,
+            "url": url,
+            "titulo": titulo,
+            "precio": precio,
+            "moneda": moneda,
+            "tipo": self.tipo_from_text(titulo),
+            **self.parse_features(attribute_texts),
+            "fotos": fotos,
+            "descripcion": None,
+        }
+
+    def parse_detail(self, soup, url: str, fetched_on: Optional[date] = None) -> Dict[str, Any]:
+        """Photos, description, attribute table and publication date from a MercadoLibre detail page"""
+        photos = []
+        seen = set()
+
+        # Find all images from mlstatic
+        for img in soup.select("img[src*='mlstatic']"):
+            src = img.get("src", "")
+            if src and "mlstatic" in src and src not in seen:
+                # Convert to high quality version
+                # Replace size indicators like -F, -V, -W with -O (original)
+                high_quality = re.sub(r"-[A-Z](-null)?\.(jpg|webp)", r"-O.\2", src)
+                high_quality = re.sub(r"_[A-Z]\.(jpg|webp)", r"_O.\1", high_quality)
+                if high_quality not in seen:
+                    seen.add(high_quality)
+                    photos.append(high_quality)
+
+        # Also check data-zoom attributes
+        for img in soup.select("img[data-zoom]"):
+            src = img.get("data-zoom", "")
+            if src and src not in seen:
+                seen.add(src)
+                photos.append(src)
+
+        description_elem = soup.select_one(".ui-pdp-description__content")
+        descripcion = description_elem.get_text("\n", strip=True) if description_elem else None
+
+        # Specs table rows ("Superficie total" | "120 m²") read as "120 m² superficie total"
+        attribute_texts = []
+        for row in soup.select("tr.andes-table__row"):
+            label = row.select_one("th")
+            value = row.select_one("td")
+            if label and value:
+                attribute_texts.append(f"{value.get_text(strip=True)} {label.get_text(strip=True)}")
+        for spec in soup.select(".ui-pdp-highlighted-specs-res__icon-label, .ui-vpp-highlighted-specs__key-value"):
+            attribute_texts.append(spec.get_text(" ", strip=True))
+
+        subtitle = soup.select_one(".ui-pdp-header__subtitle, .ui-pdp-subtitle")
+
+        return {
+            **self.parse_features(attribute_texts),
+            "fotos": photos[:20],  # Limit to 20 photos
+            "descripcion": descripcion,
+            "fechaPublicacion": self.clean_date(subtitle.get_text(" ", strip=True), fetched_on) if subtitle else None,
+        }
@@ -0,0 +1,122 @@
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Union
+
+from bs4 import BeautifulSoup
+from bs4.dammit import UnicodeDammit
+import lxml.html
+from lxml import etree
+from lxml.cssselect import CSSSelector
+
+# "lxml" (default) or "bs4". The scrapers only use select/select_one/get/
+# get_text, so both backends produce the same property dicts.
+DEFAULT_BACKEND = os.environ.get("SCRAPER_PARSER", "lxml")
+
+# Text nodes BeautifulSoup leaves out of get_text()
+_TEXT_XPATH = etree.XPath(
+    "descendant::text()[not(parent::script or parent::style or parent::template)]"
+)
+
+_compiled: Dict[str, CSSSelector] = {}
+
+
+def compile_selector(css: str) -> CSSSelector:
+    """CSS -> XPath translation happens once per selector string per process"""
+    selector = _compiled.get(css)
+    if selector is None:
+        selector = _compiled[css] = CSSSelector(css)
+    return selector
+
+
+class LxmlNode:
+    """
+    Thin wrapper over an lxml element exposing the subset of the
+    BeautifulSoup Tag API the scrapers use, with the same semantics:
+    select() only matches descendants, results are in document order and
+    get_text(strip=True) joins the stripped strings with no separator.
+    """
+
+    __slots__ = ("element",)
+
+    def __init__(self, element):
+        self.element = element
+
+    def select(self, css: str) -> List["LxmlNode"]:
+        element = self.element
+        return [LxmlNode(match) for match in compile_selector(css)(element) if match is not element]
+
+    def select_one(self, css: str) -> Optional["LxmlNode"]:
+        element = self.element
+        for match in compile_selector(css)(element):
+            if match is not element:
+                return LxmlNode(match)
+        return None
+
+    def get(self, attr: str, default=None):
+        return self.element.get(attr, default)
+
+    def get_text(self, separator: str = "", strip: bool = False) -> str:
+        strings = _TEXT_XPATH(self.element)
+        if strip:
+            strings = [s.strip() for s in strings]
+            strings = [s for s in strings if s]
+        return separator.join(strings)
+
+    def __bool__(self) -> bool:
+        return True
+
+
+def decode_html(content: Union[bytes, str]) -> str:
+    if isinstance(content, str):
+        return content
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        return UnicodeDammit(content, is_html=True).unicode_markup
+
+
+def parse_html(content: Union[bytes, str], backend: str = DEFAULT_BACKEND) -> Optional[Union[LxmlNode, BeautifulSoup]]:
+    """Parse a page with the chosen backend. Returns None for an empty document."""
+    if backend == "bs4":
+        return BeautifulSoup(content, "lxml")
+    try:
+        try:
+            root = lxml.html.document_fromstring(decode_html(content))
+        except ValueError:
+            # Unicode input with an XML encoding declaration; let lxml decode the bytes
+            root = lxml.html.document_fromstring(content)
+    except etree.ParserError:
+        return None
+    return LxmlNode(root)
+
+
+def find_json_assignment(text: str, name: str) -> Optional[Any]:
+    """
+    Decode the JSON literal assigned to `name` in an inline script,
+    e.g. `window.__PRELOADED_STATE__ = {...};`. Returns None if absent
+    or not valid JSON.
+    """
+    match = re.search(re.escape(name) + r"\s*=\s*", text)
+    if not match:
+        return None
+    try:
+        value, _ = json.JSONDecoder().raw_decode(text, match.end())
+    except ValueError:
+        return None
+    return value
+
+
+def find_json_script(text: str, script_id: str) -> Optional[Any]:
+    """Decode the body of `<script id="..." type="application/json">`"""
+    match = re.search(
+        r"<script[^>]*\bid=[\"']" + re.escape(script_id) + r"[\"'][^>]*>(.*?)</script>",
+        text,
+        re.DOTALL,
+    )
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except ValueError:
+        return None
@@ -0,0 +1,68 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+# One scraper instance per class, per worker process
+_worker_scrapers: Dict[type, Any] = {}
+
+
+def parse_page_worker(
+    scraper_cls: type, parser_backend: str, content: bytes, barrio: str
+) -> Tuple[Optional[List[Dict[str, Any]]], Dict[str, int], float]:
+    """
+    Process-pool entry point: parse one search results page.
+    Returns the property dicts (or None), the page's parse_stats and the
+    seconds the parse took.
+    """
+    scraper = _worker_scrapers.get(scraper_cls)
+    if scraper is None:
+        scraper = _worker_scrapers[scraper_cls] = scraper_cls()
+    scraper.parser_backend = parser_backend
+    for key in scraper.parse_stats:
+        scraper.parse_stats[key] = 0
+    started = time.perf_counter()
+    properties = scraper._parse_page(content, barrio)
+    return properties, dict(scraper.parse_stats), time.perf_counter() - started
+
+
+class ParsePool:
+    """
+    Process pool that parses raw search pages while the next ones download.
+
+    Parsing is CPU-bound and holds the GIL, so it runs in separate
+    processes and only plain dicts come back. `queue_depth` bounds how many
+    pages may be between "fetch started" and "parsed" at once, so fetching
+    can't run ahead and pile raw HTML up in memory.
+    """
+
+    def __init__(self, scraper, workers: int, queue_depth: Optional[int] = None):
+        self.scraper = scraper
+        # spawn, not fork: the parent has live threads (fetcher, browser pool)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self._slots = asyncio.Semaphore(queue_depth or workers * 4)
+
+    def slot(self) -> asyncio.Semaphore:
+        """Hold a slot from before the fetch until the page is parsed"""
+        return self._slots
+
+    async def parse(self, content: bytes, barrio: str) -> Tuple[Optional[List[Dict[str, Any]]], Dict[str, int], float]:
+        """Parse a page in a worker: (properties or None, the page's parse_stats, parse seconds)"""
+        loop = asyncio.get_running_loop()
+        properties, stats, seconds = await loop.run_in_executor(
+            self._executor,
+            parse_page_worker,
+            type(self.scraper),
+            self.scraper.parser_backend,
+            content,
+            barrio,
+        )
+        for key, value in stats.items():
+            self.scraper.parse_stats[key] += value
+        return properties, stats, seconds
+
+    def close(self):
+        self._executor.shutdown(wait=True)
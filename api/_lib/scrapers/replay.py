@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import random
+import threading
+import time
+import zipfile
+from typing import Dict, List, Optional
+
+
+class ReplayMiss(Exception):
+    """The archive being replayed has no response for this URL"""
+
+
+class ResponseArchive:
+    """
+    Compressed archive of every page body the scrapers fetched, for offline
+    end-to-end runs.
+
+    mode "record" stores each body the first time its URL is fetched
+    (search pages, detail pages and Playwright renders, including ones
+    served by the response cache). mode "replay" serves them back instead
+    of touching the network, after `latency` seconds (±50% jitter) to
+    stand in for the site's response time. URLs that weren't recorded
+    fail, like a failed request would.
+
+    The archive is a zip file with one deflated entry per URL; the URL is
+    kept in the entry's comment, so a recording cut short stays readable.
+    """
+
+    def __init__(self, path: str, mode: str = "replay", latency: float = 0.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"unknown archive mode {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+        self._lock = threading.Lock()
+        self._entries: Dict[str, zipfile.ZipInfo] = {}
+        self._zip = zipfile.ZipFile(path, "a" if mode == "record" else "r", zipfile.ZIP_DEFLATED)
+        for info in self._zip.infolist():
+            self._entries[info.comment.decode("utf-8")] = info
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def urls(self) -> List[str]:
+        return list(self._entries)
+
+    def record(self, url: str, body: bytes, fetched_at: Optional[float] = None):
+        """Store a body; fetched_at (default now) becomes the entry's timestamp"""
+        if self.mode != "record":
+            return
+        with self._lock:
+            if url in self._entries or self._zip.fp is None:
+                return
+            info = zipfile.ZipInfo(hashlib.sha1(url.encode("utf-8")).hexdigest(), time.localtime(fetched_at)[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.comment = url.encode("utf-8")
+            self._zip.writestr(info, body)
+            self._entries[url] = info
+            self.stats["recorded"] += 1
+
+    def _lookup(self, url: str) -> bytes:
+        with self._lock:
+            info = self._entries.get(url)
+            if info is None:
+                self.stats["misses"] += 1
+                raise ReplayMiss(f"not in archive: {url}")
+            self.stats["replayed"] += 1
+            return self._zip.read(info)
+
+    def fetched_at(self, url: str) -> float:
+        """When a recorded body was fetched (to the 2 seconds zip timestamps keep), or now if unknown"""
+        info = self._entries.get(url)
+        if info is None:
+            return time.time()
+        return time.mktime(info.date_time + (0, 0, -1))
+
+    def _delay(self) -> float:
+        return self.latency * random.uniform(0.5, 1.5) if self.latency else 0.0
+
+    def replay(self, url: str) -> bytes:
+        """Blocking replay of a recorded body"""
+        time.sleep(self._delay())
+        return self._lookup(url)
+
+    async def replay_async(self, url: str) -> bytes:
+        await asyncio.sleep(self._delay())
+        return self._lookup(url)
+
+    def close(self):
+        with self._lock:
+            self._zip.close()
+
+
+_archive: Optional[ResponseArchive] = None
+
+
+def get_archive() -> Optional[ResponseArchive]:
+    """The process-wide archive set with open_archive(), or None"""
+    return _archive
+
+
+def open_archive(path: str, mode: str = "replay", latency: float = 0.0) -> ResponseArchive:
+    """Start recording to, or replaying from, the archive at path"""
+    global _archive
+    if _archive is not None:
+        _archive.close()
+    _archive = ResponseArchive(path, mode, latency)
+    return _archive
+
+
+def close_archive():
+    global _archive
+    if _archive is not None:
+        _archive.close()
+        _archive = None
@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from .cache import DEFAULT_CACHE_DIR
+
+# Most IDs kept per crawl unit to detect new listings on the next visit
+MAX_TRACKED_IDS = 500
+
+
+class BarrioScheduler:
+    """
+    Decides which (fuente, barrio) crawl units to visit each run.
+
+    Per unit it remembers when it was last crawled, how many new listings
+    per hour it has been producing (smoothed) and how many result pages a
+    crawl took. Each run visits overdue units first (never crawled, or not
+    crawled for max_staleness_hours), then fills the page budget with the
+    units whose expected new listings per page are highest. High-churn
+    barrios therefore come around more often, and none waits longer than
+    the staleness limit as long as the budget can cover it.
+
+    State is a JSON file next to the response cache.
+    """
+
+    def __init__(self, path: str, max_staleness_hours: float = 48.0, default_pages: int = 2, smoothing: float = 0.5):
+        self.path = path
+        self.max_staleness_hours = max_staleness_hours
+        self.default_pages = default_pages
+        self.smoothing = smoothing
+        self._units: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._units = json.load(f).get("units", {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable schedule state {path}: {e}")
+
+    @staticmethod
+    def _key(fuente: str, barrio: str) -> str:
+        return f"{fuente}\t{barrio}"
+
+    def _default_rate(self, fuente: str) -> float:
+        """Mean churn of a source's measured units, the prior for unmeasured ones"""
+        rates = [
+            unit["new_rate"] for key, unit in self._units.items()
+            if key.startswith(fuente + "\t") and unit.get("new_rate") is not None
+        ]
+        return sum(rates) / len(rates) if rates else 0.0
+
+    def plan(self, fuente: str, barrios: Iterable[str], page_budget: int, now: Optional[float] = None) -> List[str]:
+        """Pick the barrios to crawl for a source this run, within page_budget result pages"""
+        now = time.time() if now is None else now
+        with self._lock:
+            default_rate = self._default_rate(fuente)
+            overdue = []
+            candidates = []
+            for barrio in barrios:
+                unit = self._units.get(self._key(fuente, barrio))
+                if unit is None or unit.get("last_crawl") is None:
+                    overdue.append((float("inf"), barrio, self.default_pages))
+                    continue
+
+                cost = max(1, round(unit.get("pages") or self.default_pages))
+                staleness = (now - unit["last_crawl"]) / 3600
+                if staleness >= self.max_staleness_hours:
+                    overdue.append((staleness, barrio, cost))
+                else:
+                    rate = unit["new_rate"] if unit.get("new_rate") is not None else default_rate
+                    candidates.append((rate * staleness / cost, barrio, cost))
+
+        # Stalest first, then best expected yield per page; sorted() keeps list order on ties
+        ordered = sorted(overdue, key=lambda item: -item[0]) + sorted(candidates, key=lambda item: -item[0])
+        selected = []
+        remaining = page_budget
+        for _, barrio, cost in ordered:
+            if cost <= remaining:
+                selected.append(barrio)
+                remaining -= cost
+        if not selected and ordered:
+            # Budget smaller than any unit: still make progress
+            selected.append(ordered[0][1])
+        return selected
+
+    def record(self, fuente: str, barrio: str, external_ids: Iterable[str], pages: int, now: Optional[float] = None):
+        """Update a unit after a crawl that returned `pages` result pages"""
+        now = time.time() if now is None else now
+        ids = list(dict.fromkeys(external_ids))
+        key = self._key(fuente, barrio)
+        with self._lock:
+            unit = self._units.get(key) or {"last_crawl": None, "new_rate": None, "pages": None, "ids": []}
+
+            if unit["last_crawl"] is not None:
+                # New listings per hour since the previous visit; the first visit has no baseline
+                known = set(unit["ids"])
+                new = sum(1 for external_id in ids if external_id not in known)
+                hours = max((now - unit["last_crawl"]) / 3600, 0.25)
+                rate = new / hours
+                if unit["new_rate"] is None:
+                    unit["new_rate"] = rate
+                else:
+                    unit["new_rate"] += self.smoothing * (rate - unit["new_rate"])
+
+            if unit["pages"] is None:
+                unit["pages"] = float(pages)
+            else:
+                unit["pages"] += self.smoothing * (pages - unit["pages"])
+
+            unit["last_crawl"] = now
+            unit["ids"] = ids[:MAX_TRACKED_IDS]
+            self._units[key] = unit
+
+    def save(self):
+        """Write the scheduler state back to disk"""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"units": self._units}, f)
+            os.replace(tmp_path, self.path)
+
+
+def load_barrio_scheduler(max_staleness_hours: float = 48.0, default_pages: int = 2) -> BarrioScheduler:
+    """Load the barrio scheduler state from SCRAPER_CACHE_DIR"""
+    cache_dir = os.environ.get("SCRAPER_CACHE_DIR", DEFAULT_CACHE_DIR)
+    return BarrioScheduler(os.path.join(cache_dir, "schedule.json"), max_staleness_hours, default_pages)
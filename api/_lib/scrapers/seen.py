@@ -0,0 +1,66 @@
+import os
+import threading
+from bisect import bisect_left
+from typing import Iterable, List
+
+from .cache import DEFAULT_CACHE_DIR
+
+
+def _key(fuente: str, external_id: str) -> str:
+    return f"{fuente}\t{external_id}"
+
+
+class SeenIndex:
+    """
+    Compact index of (fuente, externalId) pairs seen by earlier runs.
+
+    Kept as a sorted list of strings for bisect lookups and stored as a
+    sorted text file, one key per line. Loaded once per run; IDs added
+    during the run are only visible to lookups after `save()`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._keys: List[str] = []
+        self._new: set = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._keys = sorted(line.rstrip("\n") for line in f if line.strip())
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def contains(self, fuente: str, external_id: str) -> bool:
+        key = _key(fuente, external_id)
+        i = bisect_left(self._keys, key)
+        return i < len(self._keys) and self._keys[i] == key
+
+    def known_share(self, fuente: str, external_ids: Iterable[str]) -> float:
+        """Fraction of the given IDs that were already seen"""
+        ids = list(external_ids)
+        if not ids:
+            return 0.0
+        return sum(1 for external_id in ids if self.contains(fuente, external_id)) / len(ids)
+
+    def add(self, fuente: str, external_ids: Iterable[str]):
+        with self._lock:
+            self._new.update(_key(fuente, external_id) for external_id in external_ids)
+
+    def save(self):
+        """Merge IDs added during the run and write the index back to disk"""
+        with self._lock:
+            if self._new:
+                self._keys = sorted(self._new.union(self._keys))
+                self._new.clear()
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(key + "\n" for key in self._keys)
+            os.replace(tmp_path, self.path)
+
+
+def load_seen_index() -> SeenIndex:
+    """Load the seen-ID index from SCRAPER_CACHE_DIR"""
+    cache_dir = os.environ.get("SCRAPER_CACHE_DIR", DEFAULT_CACHE_DIR)
+    return SeenIndex(os.path.join(cache_dir, "seen_ids.txt"))
@@ -0,0 +1,288 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+# Responses that mean "slow down" rather than "this request is broken"
+THROTTLE_STATUSES = (429, 503)
+
+# Longest Retry-After we'll honour before treating the host as down
+MAX_RETRY_AFTER = 120.0
+
+
+class TransientError(Exception):
+    """A failure worth retrying: 5xx, connection reset, timeout"""
+
+
+class ThrottledError(TransientError):
+    """The host asked us to back off (429/503), maybe with a Retry-After"""
+
+    def __init__(self, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status}" + (f", retry after {retry_after:.0f}s" if retry_after else ""))
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """The host kept failing and is skipped for the rest of the run"""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds, from either delta-seconds or an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def check_status(status: int, retry_after: Optional[str] = None):
+    """Raise ThrottledError / TransientError for statuses worth retrying"""
+    if status in THROTTLE_STATUSES:
+        raise ThrottledError(status, parse_retry_after(retry_after))
+    if status >= 500:
+        raise TransientError(f"HTTP {status}")
+
+
+class HostController:
+    """
+    AIMD concurrency window and circuit breaker for one host.
+
+    The window grows by one request per window's worth of successes while
+    latency stays within `latency_factor` of the best latency seen, and
+    halves on throttling or transient errors. A throttle also pauses the
+    whole host for Retry-After (or a backoff). After `failure_threshold`
+    consecutive failures the breaker opens: the host is paused for
+    `cooldown` seconds, then a single probe decides whether it closes
+    again. After `max_trips` trips in a row the host is given up on and
+    requests fail fast with CircuitOpenError.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        max_trips: int = 3,
+        latency_factor: float = 2.0,
+    ):
+        self.host = host
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_trips = max_trips
+        self.latency_factor = latency_factor
+
+        self.limit = float(max(min_concurrency, max_concurrency / 2))
+        self.in_flight = 0
+        self.state = "closed"  # closed, open, half_open or dead
+        self.blocked_until = 0.0
+        self.stats = {
+            "throttled": 0,
+            "errors": 0,
+            "retries": 0,
+            "circuit_trips": 0,
+            "min_limit": self.limit,
+            "max_limit": self.limit,
+        }
+        self._successes = 0
+        self._failures = 0
+        self._trips_in_a_row = 0
+        self._last_decrease = 0.0
+        self._latency: Optional[float] = None
+        self._best_latency: Optional[float] = None
+        self._cond = threading.Condition()
+
+    def _wait_time(self, now: float) -> float:
+        """Seconds until a request may start (0 = now). Call with the lock held."""
+        if self.state == "dead":
+            raise CircuitOpenError(f"{self.host} is failing, skipped for the rest of the run")
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.state == "open":
+            # Cooldown over: let one probe through
+            self.state = "half_open"
+        limit = 1 if self.state == "half_open" else int(self.limit)
+        return 0.0 if self.in_flight < limit else 0.05
+
+    def try_acquire(self) -> float:
+        """Take a slot if one is free. Returns 0 on success, else how long to wait."""
+        with self._cond:
+            wait = self._wait_time(time.monotonic())
+            if wait == 0:
+                self.in_flight += 1
+            return wait
+
+    def acquire(self):
+        """Block until the host accepts another request"""
+        with self._cond:
+            while True:
+                wait = self._wait_time(time.monotonic())
+                if wait == 0:
+                    self.in_flight += 1
+                    return
+                self._cond.wait(timeout=min(wait, 1.0))
+
+    async def acquire_async(self):
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return
+            await asyncio.sleep(min(wait, 1.0))
+
+    def _set_limit(self, limit: float):
+        self.limit = min(float(self.max_concurrency), max(float(self.min_concurrency), limit))
+        self.stats["min_limit"] = min(self.stats["min_limit"], self.limit)
+        self.stats["max_limit"] = max(self.stats["max_limit"], self.limit)
+
+    def _trip(self, now: float):
+        self._trips_in_a_row += 1
+        self.stats["circuit_trips"] += 1
+        self._failures = 0
+        self._set_limit(self.min_concurrency)
+        if self._trips_in_a_row >= self.max_trips:
+            self.state = "dead"
+            print(f"  Circuit open for {self.host}: giving up for this run")
+        else:
+            self.state = "open"
+            pause = self.cooldown * 2 ** (self._trips_in_a_row - 1)
+            self.blocked_until = max(self.blocked_until, now + pause)
+            print(f"  Circuit open for {self.host}: pausing {pause:.0f}s")
+
+    def release(self, outcome: Optional[str], started: Optional[float] = None, pause: Optional[float] = None):
+        """
+        Return a slot taken at `started` (time.monotonic()). outcome is "ok",
+        "throttled", "error" or None (a failure that says nothing about the
+        host's health, e.g. a 404).
+        """
+        now = time.monotonic()
+        latency = now - started if started is not None else None
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == "ok":
+                self._failures = 0
+                if self.state == "half_open":
+                    self.state = "closed"
+                    self._trips_in_a_row = 0
+                if latency is not None:
+                    self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+                    if self._best_latency is None or self._latency < self._best_latency:
+                        self._best_latency = self._latency
+                healthy = self._latency is None or self._latency <= self.latency_factor * self._best_latency
+                if healthy:
+                    # Additive increase: +1 per window of successes
+                    self._successes += 1
+                    if self._successes >= self.limit:
+                        self._successes = 0
+                        self._set_limit(self.limit + 1)
+            elif outcome in ("throttled", "error"):
+                self.stats["throttled" if outcome == "throttled" else "errors"] += 1
+                self._successes = 0
+                self._failures += 1
+                # Multiplicative decrease, once per burst: requests already
+                # in flight when the window last shrank don't shrink it again
+                if started is None or started >= self._last_decrease:
+                    self._set_limit(self.limit / 2)
+                    self._last_decrease = now
+                if pause:
+                    self.blocked_until = max(self.blocked_until, now + pause)
+                if self.state == "half_open" or self._failures >= self.failure_threshold:
+                    self._trip(now)
+            self._cond.notify_all()
+
+
+class HostThrottle:
+    """
+    Per-host HostControllers plus the retry loop around each request.
+    Transient failures are retried up to `max_retries` times with
+    jittered exponential backoff; throttles pause the host instead.
+    """
+
+    def __init__(self, max_concurrency: int, max_retries: int = 3, backoff: float = 1.0):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._controllers: Dict[str, HostController] = {}
+        self._lock = threading.Lock()
+
+    def controller(self, url: str) -> HostController:
+        host = urlparse(url).netloc
+        with self._lock:
+            controller = self._controllers.get(host)
+            if controller is None:
+                controller = self._controllers[host] = HostController(host, self.max_concurrency)
+            return controller
+
+    def _delay(self, attempt: int) -> float:
+        return self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+
+    def _settle(self, controller: HostController, error: Exception, attempt: int, started: float) -> float:
+        """Release a failed attempt; returns how long the caller itself should sleep"""
+        if isinstance(error, ThrottledError):
+            pause = min(error.retry_after, MAX_RETRY_AFTER) if error.retry_after else self._delay(attempt)
+            controller.release("throttled", started, pause=pause)
+            # The controller holds the whole host back for `pause`
+            return 0.0
+        controller.release("error", started)
+        return self._delay(attempt)
+
+    def call(self, url: str, fn: Callable[[], Any]) -> Any:
+        """Run a blocking request for url under its host's controller, with retries"""
+        controller = self.controller(url)
+        for attempt in range(self.max_retries + 1):
+            controller.acquire()
+            started = time.monotonic()
+            try:
+                result = fn()
+            except TransientError as e:
+                delay = self._settle(controller, e, attempt, started)
+                if attempt == self.max_retries:
+                    raise
+            except BaseException:
+                controller.release(None)
+                raise
+            else:
+                controller.release("ok", started)
+                return result
+            controller.stats["retries"] += 1
+            time.sleep(delay)
+
+    async def call_async(self, url: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async version of call()"""
+        controller = self.controller(url)
+        for attempt in range(self.max_retries + 1):
+            await controller.acquire_async()
+            started = time.monotonic()
+            try:
+                result = await fn()
+            except TransientError as e:
+                delay = self._settle(controller, e, attempt, started)
+                if attempt == self.max_retries:
+                    raise
+            except BaseException:
+                controller.release(None)
+                raise
+            else:
+                controller.release("ok", started)
+                return result
+            controller.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Current window, state and throttle counters per host"""
+        with self._lock:
+            controllers = list(self._controllers.values())
+        return {
+            controller.host: {"limit": controller.limit, "state": controller.state, **controller.stats}
+            for controller in controllers
+        }
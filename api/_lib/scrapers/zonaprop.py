@@ -1,14 +1,22 @@
 from typing import List, Dict, Any, Optional
 from bs4 import BeautifulSoup
 from .base import BaseScraper
+from .parsing import decode_html, find_json_assignment
 import re
-import json
 
 class ZonapropScraper(BaseScraper):
     """Scraper for Zonaprop"""
 
     BASE_URL = "https://www.zonaprop.com.ar"
     use_playwright = True  # Use Playwright to bypass bot detection
+    rate_limit = 0.3  # Aggressive bot detection, keep it slow
+    rate_burst = 1
+    max_concurrency = 2
+    ready_selector = "[data-qa='posting PROPERTY'], .postingCard, .posting-card"
+    empty_selector = "[data-qa='empty-result']"
+    # Detail pages sit behind the same bot protection as search pages, and
+    # the search JSON already carries the description
+    fetch_detail_pages = False
 
     @property
     def fuente(self) -> str:
@@ -73,44 +81,19 @@ class ZonapropScraper(BaseScraper):
                     fotos.append(img_url)
 
             # Attributes
-            ambientes = None
-            dormitorios = None
-            banos = None
-            metros_cuadrados = None
-            metros_totales = None
-
-            # Look for feature spans
             features = element.select("[data-qa='POSTING_CARD_FEATURES'] span, .postingCardMainFeatures span, .mainFeatures span")
-            for feature in features:
-                text = feature.get_text(strip=True).lower()
-
-                # Check for icons/labels nearby
-                if "m²" in text or "m2" in text:
-                    area = self.clean_area(text)
-                    if "tot" in text:
-                        metros_totales = area
-                    elif "cub" in text:
-                        metros_cuadrados = area
-                    elif metros_cuadrados is None:
-                        metros_cuadrados = area
-                elif "amb" in text:
-                    ambientes = self.clean_number(text)
-                elif "dorm" in text:
-                    dormitorios = self.clean_number(text)
-                elif "baño" in text:
-                    banos = self.clean_number(text)
+            attributes = self.parse_features(feature.get_text(strip=True) for feature in features)
 
             # Also try direct attribute spans
             for attr in element.select("span"):
                 text = attr.get_text(strip=True)
                 if re.match(r"^\d+\s*(m²|m2)", text, re.IGNORECASE):
                     area = self.clean_area(text)
-                    if metros_cuadrados is None:
-                        metros_cuadrados = area
+                    if attributes["metrosCuadrados"] is None:
+                        attributes["metrosCuadrados"] = area
 
             # Property type from title or features
-            titulo_lower = titulo.lower()
-            tipo = "casa" if any(word in titulo_lower for word in ["casa", "chalet", "ph"]) else "departamento"
+            tipo = self.tipo_from_text(titulo)
 
             return {
                 "externalId": external_id,
@@ -119,11 +102,7 @@ class ZonapropScraper(BaseScraper):
                 "precio": precio,
                 "moneda": moneda,
                 "tipo": tipo,
-                "ambientes": ambientes,
-                "dormitorios": dormitorios,
-                "banos": banos,
-                "metrosCuadrados": metros_cuadrados,
-                "metrosTotales": metros_totales,
+                **attributes,
                 "fotos": fotos,
                 "descripcion": None,
             }
@@ -131,3 +110,77 @@ class ZonapropScraper(BaseScraper):
         except Exception as e:
             print(f"Error parsing Zonaprop listing: {e}")
             return None
+
+    def extract_structured(self, content: bytes) -> Optional[List[Dict[str, Any]]]:
+        """Map the postings in window.__PRELOADED_STATE__ (listStore) to listing dicts"""
+        state = find_json_assignment(decode_html(content), "__PRELOADED_STATE__")
+        if not isinstance(state, dict):
+            return None
+
+        postings = state.get("listStore", {}).get("listPostings")
+        if not isinstance(postings, list):
+            return None
+
+        properties = []
+        for posting in postings:
+            prop = self._parse_posting(posting) if isinstance(posting, dict) else None
+            if prop is None:
+                # Unknown posting shape: let the DOM path handle the page
+                return None
+            properties.append(prop)
+        return properties
+
+    def _parse_posting(self, posting: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        href = posting.get("url", "")
+        if not href:
+            return None
+        url = href if href.startswith("http") else f"{self.BASE_URL}{href}"
+
+        # Same ID format as the DOM path ("zp-123")
+        external_id_match = re.search(r"-(\d+)\.html", url)
+        posting_id = external_id_match.group(1) if external_id_match else posting.get("postingId")
+        if not posting_id:
+            return None
+        external_id = f"zp-{posting_id}"
+
+        # The result card shows the address, so prefer it over the ad title
+        address = (posting.get("postingLocation") or {}).get("address") or {}
+        titulo = address.get("name") or posting.get("title")
+        if not titulo:
+            return None
+
+        precio = None
+        moneda = "USD"
+        operation_types = posting.get("priceOperationTypes") or []
+        prices = operation_types[0].get("prices", []) if operation_types else []
+        if prices and prices[0].get("amount") is not None:
+            precio = float(prices[0]["amount"])
+            moneda = "ARS" if prices[0].get("currency") in ("$", "ARS") else "USD"
+
+        # mainFeatures: {"CFT100": {"label": "ambientes", "measure": null, "value": "3"}, ...}
+        feature_texts = []
+        for feature in (posting.get("mainFeatures") or {}).values():
+            if isinstance(feature, dict) and feature.get("value"):
+                parts = [str(feature["value"]), feature.get("measure") or "", feature.get("label") or ""]
+                feature_texts.append(" ".join(part for part in parts if part))
+
+        fotos = []
+        pictures = (posting.get("visiblePictures") or {}).get("pictures") or []
+        if pictures:
+            img_url = pictures[0].get("url730x532") or pictures[0].get("url360x266")
+            if img_url:
+                fotos.append(img_url)
+
+        real_estate_type = (posting.get("realEstateType") or {}).get("name") or titulo
+
+        return {
+            "externalId": external_id,
+            "url": url,
+            "titulo": titulo,
+            "precio": precio,
+            "moneda": moneda,
+            "tipo": self.tipo_from_text(real_estate_type),
+            **self.parse_features(feature_texts),
+            "fotos": fotos,
+            "descripcion": posting.get("descriptionNormalized"),
+        }
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Run the scraper end-to-end offline and report how long each stage took.
+
+Pages come from an archive recorded with run_scraper.py --record, and the
+database is an in-process PostgREST stand-in, so runs are repeatable and
+touch neither the sites nor Supabase. Record with a fresh cache dir, so
+the barrio scheduler picks the same barrios a fresh replay will:
+
+    SCRAPER_CACHE_DIR=$(mktemp -d) python scripts/run_scraper.py --record bench.zip
+    python scripts/bench_offline.py bench.zip --latency 0.3 --runs 2 -- --sources argenprop
+
+The first run writes into an empty database; later runs see their own
+rows, as a steady-state run would.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api._lib.local_postgrest import LocalPostgrest
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end scraper benchmark")
+    parser.add_argument("archive", help="Page archive made with run_scraper.py --record")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds each replayed page takes, +/-50%% (default: 0)")
+    parser.add_argument("--runs", type=int, default=1, help="Consecutive runs against the same database (default: 1)")
+    parser.add_argument("--seed", help="JSON file of {table: [rows]} to preload the database with")
+    parser.add_argument("--no-rate-limits", action="store_true",
+                        help="Lift the scrapers' per-host request rates, to measure the pipeline rather than politeness")
+    parser.add_argument("--json", help="Also write the run reports to this file")
+    parser.epilog = "Arguments after -- are passed on to run_scraper.py"
+    argv = sys.argv[1:] if argv is None else list(argv)
+    scraper_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, scraper_args = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+    args.scraper_args = scraper_args
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    seed = None
+    if args.seed:
+        with open(args.seed, encoding="utf-8") as f:
+            seed = json.load(f)
+
+    with LocalPostgrest(seed=seed) as db:
+        # database.py reads these at import time
+        os.environ["SUPABASE_URL"] = db.url
+        os.environ["SUPABASE_KEY"] = "offline"
+        import run_scraper
+
+        if args.no_rate_limits:
+            for scraper_cls in run_scraper.SCRAPERS.values():
+                scraper_cls.rate_limit = scraper_cls.detail_rate_limit = 1000.0
+                scraper_cls.rate_burst = 1000
+
+        reports = []
+        for run in range(args.runs):
+            # Fresh scheduler, checkpoint and response cache each run
+            with tempfile.TemporaryDirectory(prefix="scraper-bench-") as cache_dir:
+                os.environ["SCRAPER_CACHE_DIR"] = cache_dir
+                report = run_scraper.main(
+                    args.scraper_args + ["--replay", args.archive, "--replay-latency", str(args.latency)]
+                )
+            reports.append(report)
+
+    print("\n" + "=" * 50)
+    print(f"OFFLINE BENCHMARK ({args.runs} run{'s' if args.runs != 1 else ''}, {args.latency:.2f}s page latency)")
+    stages = list(reports[0]["stages"])
+    print(f"{'stage':<14}" + "".join(f"{'run ' + str(i + 1):>10}" for i in range(len(reports))))
+    for stage in stages:
+        print(f"{stage:<14}" + "".join(f"{report['stages'].get(stage, 0.0):>9.2f}s" for report in reports))
+    for key in ("inserted", "updated", "unchanged", "errors"):
+        print(f"{key:<14}" + "".join(f"{report['totals'][key]:>10}" for report in reports))
+    print(f"{'db requests':<14}" + "".join(f"{report['database']['requests']:>10}" for report in reports))
+    print(f"Stand-in: {db.stats['requests']} requests, {db.stats['rows_read']} rows read, "
+          f"{db.stats['rows_written']} rows written, {len(db.tables['propiedades'])} propiedades stored")
+    print("=" * 50)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Benchmark the scrapers' parsers over a corpus of saved pages.
+
+The corpus is a page archive recorded with run_scraper.py --record; each
+page is routed to its scraper by site (any subdomain of its BASE_URL's
+domain), and to the search or detail parser by whether its URL is a
+search URL. Stages measured per scraper:
+
+    search  _parse_page(): embedded JSON first, DOM fallback (what a run does)
+    dom     parse_html() + get_listings_from_page() + parse_listing()
+    detail  parse_html() + parse_detail(), for scrapers that parse detail pages
+
+plus the clean_* helpers over a fixed set of sample strings. Each stage
+reports items/s (listings, detail pages or helper calls), µs per item,
+and per page the peak traced memory and the Python memory blocks still
+allocated after the parse (what the output keeps alive; lxml's own C
+allocations are not traced).
+
+    python scripts/bench_parsers.py bench.zip --save-baseline parsers.json
+    python scripts/bench_parsers.py bench.zip --baseline parsers.json
+
+With --baseline the run fails (exit status 1) when a stage's throughput
+drops more than --max-regression below the baseline, or when any parser
+output differs from the baseline's.
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import date
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api._lib.scrapers import base as base_module
+from api._lib.scrapers import ArgenpropScraper, BaseScraper, MercadoLibreScraper, ZonapropScraper
+from api._lib.scrapers.replay import ResponseArchive
+
+SCRAPERS = {
+    "mercadolibre": MercadoLibreScraper,
+    "zonaprop": ZonapropScraper,
+    "argenprop": ArgenpropScraper,
+}
+
+# Barrio tag given to parsed search pages; the real one isn't in the archive
+BENCH_BARRIO = "bench"
+
+# clean_date resolves "hace 3 días" against today; pin it so outputs are comparable
+FROZEN_TODAY = date(2024, 6, 1)
+
+HELPER_SAMPLES = {
+    "clean_price": [
+        "USD 125.000", "U$S 89.900", "$ 45.000.000", "US$ 1.250.000", "Consultar precio",
+        "USD 210.000 + $ 85.000 expensas", "$ 180.000,50", "",
+    ],
+    "clean_number": ["3 amb.", "2 dormitorios", "1 baño", "Monoambiente", "4", "12 ambientes", ""],
+    "clean_area": ["65 m² cub.", "120m2 totales", "48,5 m²", "1.200 m2", "sin datos", ""],
+    "clean_date": [
+        "Publicado hace 3 días", "Publicado hoy", "Publicado ayer", "15/03/2024",
+        "Publicado hace 2 meses", "Publicado hace 1 año", "",
+    ],
+}
+
+
+class _FrozenDate(date):
+    @classmethod
+    def today(cls):
+        return FROZEN_TODAY
+
+
+def digest(value) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def site_domain(host: str) -> str:
+    """Registrable domain of a host: www.zonaprop.com.ar -> zonaprop.com.ar"""
+    labels = host.lower().split(".")
+    # Second-level public suffixes such as com.ar
+    keep = 3 if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in ("com", "net", "org", "gob", "gov") else 2
+    return ".".join(labels[-keep:])
+
+
+def scraper_for(url: str, domains: dict):
+    # MercadoLibre detail pages live on casa./departamento.mercadolibre.com.ar
+    host = urlparse(url).hostname or ""
+    for domain, scraper in domains.items():
+        if host == domain or host.endswith("." + domain):
+            return scraper
+    return None
+
+
+def load_corpus(path: str, scrapers: dict) -> dict:
+    """{(fuente, "search"|"detail"): [(url, body)]} from a recorded archive"""
+    archive = ResponseArchive(path, "replay")
+    domains = {site_domain(urlparse(scraper.BASE_URL).hostname): scraper for scraper in scrapers.values()}
+    # Everything of a search URL before the barrio: "\x00" marks where it goes
+    prefixes = {scraper.fuente: scraper.get_search_url("\x00").split("\x00")[0] for scraper in scrapers.values()}
+    corpus = {}
+    skipped = 0
+    for url in sorted(archive.urls()):
+        scraper = scraper_for(url, domains)
+        if scraper is None:
+            skipped += 1
+            continue
+        kind = "search" if url.startswith(prefixes[scraper.fuente]) else "detail"
+        corpus.setdefault((scraper.fuente, kind), []).append((url, archive.replay(url)))
+    archive.close()
+    if skipped:
+        print(f"Skipped {skipped} pages from sites no scraper handles")
+    return corpus
+
+
+def dom_listings(scraper: BaseScraper, body: bytes) -> list:
+    soup = scraper.parse_html(body)
+    listings = scraper.get_listings_from_page(soup) if soup is not None else []
+    properties = []
+    for listing in listings:
+        prop = scraper.parse_listing(listing)
+        if prop:
+            properties.append(prop)
+    return properties
+
+
+def parse_detail(scraper: BaseScraper, body: bytes, url: str) -> dict:
+    soup = scraper.parse_html(body)
+    return scraper.parse_detail(soup, url) if soup is not None else {}
+
+
+def stages_for(scraper: BaseScraper, corpus: dict) -> dict:
+    """{stage: (pages, parse(url, body) -> output, count(output) -> items)}"""
+    stages = {}
+    search = corpus.get((scraper.fuente, "search"))
+    if search:
+        stages["search"] = (search, lambda url, body: scraper._parse_page(body, BENCH_BARRIO) or [], len)
+        stages["dom"] = (search, lambda url, body: dom_listings(scraper, body), len)
+    detail = corpus.get((scraper.fuente, "detail"))
+    if detail and type(scraper).parse_detail is not BaseScraper.parse_detail:
+        stages["detail"] = (detail, lambda url, body: parse_detail(scraper, body, url), lambda output: 1)
+    return stages
+
+
+def best_time(run, repeat: int, min_time: float) -> float:
+    """Fastest of at least `repeat` passes, and of enough passes to fill min_time seconds"""
+    best = None
+    passes = 0
+    spent = 0.0
+    while passes < repeat or spent < min_time:
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        passes += 1
+        spent += elapsed
+    return best
+
+
+def measure(pages: list, parse, count, repeat: int, min_time: float) -> dict:
+    """Best-of-repeat timing over all pages, then one traced pass for memory"""
+    def run():
+        for url, body in pages:
+            parse(url, body)
+
+    best = best_time(run, repeat, min_time)
+
+    outputs = {}
+    items = 0
+    peaks = []
+    blocks = []
+    tracemalloc.start()
+    try:
+        for url, body in pages:
+            gc.collect()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            blocks_before = sys.getallocatedblocks()
+            output = parse(url, body)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+            blocks.append(sys.getallocatedblocks() - blocks_before)
+            outputs[url] = digest(output)
+            items += count(output)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "pages": len(pages),
+        "items": items,
+        "seconds": best,
+        "rate": items / best if best else 0.0,
+        "us_per_item": best / items * 1e6 if items else 0.0,
+        "peak_kb_per_page": sum(peaks) / len(peaks) / 1024,
+        "max_peak_kb": max(peaks) / 1024,
+        "blocks_per_page": sum(blocks) / len(blocks),
+        "digest": digest(sorted(outputs.items())),
+        "outputs": outputs,
+    }
+
+
+def measure_helper(name: str, repeat: int, min_time: float, loops: int = 2000) -> dict:
+    fn = getattr(BaseScraper, name)
+    samples = HELPER_SAMPLES[name]
+
+    def run():
+        for _ in range(loops):
+            for sample in samples:
+                fn(sample)
+
+    best = best_time(run, repeat, min_time)
+    calls = loops * len(samples)
+    outputs = {sample: digest(fn(sample)) for sample in samples}
+    return {
+        "items": calls,
+        "seconds": best,
+        "rate": calls / best,
+        "us_per_item": best / calls * 1e6,
+        "digest": digest(sorted(outputs.items())),
+        "outputs": outputs,
+    }
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list:
+    """Failure messages for regressions against the baseline's results"""
+    failures = []
+    for key, result in results.items():
+        previous = baseline["results"].get(key)
+        if previous is None:
+            print(f"  {key}: not in baseline")
+            continue
+        change = result["rate"] / previous["rate"] - 1 if previous["rate"] else 0.0
+        print(f"  {key}: {previous['rate']:,.0f} -> {result['rate']:,.0f} items/s ({change:+.1%})")
+        if change < -max_regression:
+            failures.append(f"{key}: throughput down {-change:.1%} (limit {max_regression:.0%})")
+        if result["digest"] != previous["digest"]:
+            changed = sorted(
+                name for name, value in result["outputs"].items() if previous["outputs"].get(name) != value
+            )
+            missing = sorted(set(previous["outputs"]) - set(result["outputs"]))
+            detail = ", ".join(repr(name) for name in (changed + missing)[:3])
+            failures.append(f"{key}: output changed for {len(changed) + len(missing)} inputs (e.g. {detail})")
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Parser throughput benchmark over saved pages")
+    parser.add_argument("archive", help="Page archive made with run_scraper.py --record")
+    parser.add_argument("--sources", type=str, help="Comma-separated sources to benchmark (default: all)")
+    parser.add_argument("--backend", choices=["lxml", "bs4"], help="Parser backend (default: SCRAPER_PARSER or lxml)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed passes per stage; the fastest counts (default: 5)")
+    parser.add_argument("--min-time", type=float, default=1.0,
+                        help="Keep repeating each stage until it has run this many seconds (default: 1.0)")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="Write this run's results as a baseline")
+    parser.add_argument("--max-regression", type=float, default=0.15,
+                        help="Allowed throughput drop vs the baseline, as a fraction (default: 0.15)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    sources = args.sources.split(",") if args.sources else list(SCRAPERS)
+    scrapers = {}
+    for source in sources:
+        scraper = SCRAPERS[source]()
+        if args.backend:
+            scraper.parser_backend = args.backend
+        scrapers[source] = scraper
+
+    base_module.date = _FrozenDate
+    corpus = load_corpus(args.archive, scrapers)
+
+    results = {}
+    print(f"{'stage':<22}{'pages':>7}{'items':>8}{'items/s':>11}{'us/item':>10}{'peak KB':>10}{'blocks':>9}")
+    for source, scraper in scrapers.items():
+        for stage, (pages, parse, count) in stages_for(scraper, corpus).items():
+            key = f"{source}.{stage}"
+            result = results[key] = measure(pages, parse, count, args.repeat, args.min_time)
+            print(
+                f"{key:<22}{result['pages']:>7}{result['items']:>8}{result['rate']:>11,.0f}"
+                f"{result['us_per_item']:>10.1f}{result['peak_kb_per_page']:>10.1f}{result['blocks_per_page']:>9.0f}"
+            )
+    for name in HELPER_SAMPLES:
+        key = f"helpers.{name}"
+        result = results[key] = measure_helper(name, args.repeat, args.min_time)
+        print(f"{key:<22}{'':>7}{result['items']:>8}{result['rate']:>11,.0f}{result['us_per_item']:>10.2f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "archive": os.path.basename(args.archive),
+                "python": platform.python_version(),
+                "backend": args.backend or base_module.DEFAULT_BACKEND,
+                "results": results,
+            }, f, indent=1)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\nAgainst baseline {args.baseline} (python {baseline.get('python')}, {baseline.get('backend')}):")
+        failures = compare(results, baseline, args.max_regression)
+        if failures:
+            print("\nFAILED:")
+            for failure in failures:
+                print(f"  {failure}")
+            return 1
+        print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
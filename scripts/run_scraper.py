@@ -4,8 +4,14 @@ Script to run all scrapers and save properties to Supabase.
 Designed to be run via GitHub Actions cron job.
 """
 
+import argparse
 import os
+import queue
 import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
@@ -15,124 +21,726 @@ load_dotenv()
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from api._lib.database import get_supabase
-from api._lib.scrapers import MercadoLibreScraper, ArgenpropScraper
+from api._lib.database import (
+    deactivate_unseen,
+    fetch_content_hashes,
+    fetch_existing_ids,
+    fetch_existing_listings,
+    get_supabase,
+    touch_properties,
+)
+from api._lib.fingerprint import content_hash
+from api._lib.metrics import get_metrics
+from api._lib.profiling import STAGES, get_profiler, start_profiling, stop_profiling
+from api._lib.scrapers import MercadoLibreScraper, ArgenpropScraper, ZonapropScraper
+from api._lib.scrapers.browser import get_browser_pool, close_browser_pool
+from api._lib.scrapers.cache import close_response_cache, get_response_cache
+from api._lib.scrapers.checkpoint import open_checkpoint
+from api._lib.scrapers.replay import close_archive, open_archive
+from api._lib.scrapers.deadline import Deadline
+from api._lib.scrapers.scheduler import load_barrio_scheduler
+from api._lib.scrapers.seen import load_seen_index
 from api._lib.models import BARRIOS_CABA
+from api._lib.postgrest import PostgrestError
 
-def save_properties(properties: list, supabase) -> dict:
+# Zonaprop is off by default (aggressive bot detection); pass --sources to enable it
+SCRAPERS = {
+    "mercadolibre": MercadoLibreScraper,
+    "argenprop": ArgenpropScraper,
+    "zonaprop": ZonapropScraper,
+}
+DEFAULT_SOURCES = "mercadolibre,argenprop"
+
+# Statuses that blame the rows themselves (bad value, constraint violation)
+ROW_ERROR_STATUSES = (400, 409, 422)
+
+# Host circuit breaker states, each exported as a 0/1 gauge
+CIRCUIT_STATES = ("closed", "open", "half_open", "dead")
+
+def property_row(prop: dict) -> dict:
+    """Map a scraped property to a propiedades row (snake_case)"""
+    data = {
+        "external_id": prop["externalId"],
+        "url": prop["url"],
+        "titulo": prop["titulo"],
+        "precio": prop.get("precio"),
+        "moneda": prop.get("moneda", "USD"),
+        "barrio": prop["barrio"],
+        "tipo": prop["tipo"],
+        "ambientes": prop.get("ambientes"),
+        "dormitorios": prop.get("dormitorios"),
+        "banos": prop.get("banos"),
+        "metros_cuadrados": prop.get("metrosCuadrados"),
+        "metros_totales": prop.get("metrosTotales"),
+        "fotos": prop.get("fotos", []),
+        "descripcion": prop.get("descripcion"),
+        "fuente": prop["fuente"],
+        "operacion": prop.get("operacion", "venta"),
+        "activo": True
+    }
+    # Only known from the detail page; don't clear a stored date
+    if prop.get("fechaPublicacion"):
+        data["fecha_publicacion"] = prop["fechaPublicacion"]
+    return data
+
+def upsert_rows(supabase, rows: list) -> list:
     """
-    Save properties to Supabase, handling duplicates with upsert.
-    Returns stats about inserted/updated properties.
+    Upsert rows in one request. If a row is rejected (400/409/422), split
+    in half and retry each half, so a bad row only costs itself. Any other
+    failure (connection errors, 5xx after the client's own retries) fails
+    the whole chunk at once. Returns the rows that failed.
+    """
+    try:
+        supabase.table("propiedades").upsert(rows, on_conflict="external_id,fuente", returning="minimal").execute()
+        return []
+    except Exception as e:
+        if not isinstance(e, PostgrestError) or e.status not in ROW_ERROR_STATUSES:
+            # Splitting won't help while the database is unreachable
+            print(f"Error saving {len(rows)} properties: {e}")
+            return rows
+        if len(rows) == 1:
+            print(f"Error saving property {rows[0]['external_id']}: {e}")
+            return rows
+        middle = len(rows) // 2
+        return upsert_rows(supabase, rows[:middle]) + upsert_rows(supabase, rows[middle:])
+
+def save_properties(properties: list, supabase, chunk_size: int = 500, known_hashes: dict = None, run_id: str = None) -> tuple:
+    """
+    Save properties to Supabase with bulk upserts of up to chunk_size rows.
+    Duplicates within the batch are collapsed (last one wins).
+
+    known_hashes maps (external_id, fuente) to the stored content_hash.
+    Rows whose hash is unchanged are only marked as seen; the map is
+    updated with every row written. Every row, written or marked seen,
+    gets run_id as its ultima_corrida.
+    Returns stats about inserted/updated/unchanged properties and the
+    (external_id, fuente) keys of the properties that were not saved.
     """
     stats = {
         "inserted": 0,
         "updated": 0,
+        "unchanged": 0,
         "errors": 0
     }
+    known_hashes = {} if known_hashes is None else known_hashes
+    seen_at = datetime.utcnow().isoformat()
+    failed = set()
 
+    rows = {}
     for prop in properties:
         try:
-            # Prepare data for Supabase (snake_case)
-            data = {
-                "external_id": prop["externalId"],
-                "url": prop["url"],
-                "titulo": prop["titulo"],
-                "precio": prop.get("precio"),
-                "moneda": prop.get("moneda", "USD"),
-                "barrio": prop["barrio"],
-                "tipo": prop["tipo"],
-                "ambientes": prop.get("ambientes"),
-                "dormitorios": prop.get("dormitorios"),
-                "banos": prop.get("banos"),
-                "metros_cuadrados": prop.get("metrosCuadrados"),
-                "metros_totales": prop.get("metrosTotales"),
-                "fotos": prop.get("fotos", []),
-                "descripcion": prop.get("descripcion"),
-                "fuente": prop["fuente"],
-                "operacion": prop.get("operacion", "venta"),
-                "activo": True
-            }
-
-            # Try to upsert (insert or update on conflict)
-            result = supabase.table("propiedades").upsert(
-                data,
-                on_conflict="external_id,fuente"
-            )
-
-            if result.data:
-                stats["inserted"] += 1
-            else:
-                stats["updated"] += 1
-
+            row = property_row(prop)
         except Exception as e:
             print(f"Error saving property {prop.get('externalId')}: {e}")
             stats["errors"] += 1
+            failed.add((prop.get("externalId"), prop.get("fuente")))
+            continue
+        row["content_hash"] = content_hash(row)
+        row["fecha_ultimo_visto"] = seen_at
+        if run_id:
+            row["ultima_corrida"] = run_id
+        rows[(row["external_id"], row["fuente"])] = row
+
+    # Unchanged since the last write: a cheap "seen" touch instead of a rewrite
+    unchanged = {}
+    for key, row in list(rows.items()):
+        if known_hashes.get(key) == row["content_hash"]:
+            unchanged.setdefault(row["fuente"], []).append(row["external_id"])
+            del rows[key]
+    for fuente, external_ids in unchanged.items():
+        try:
+            stats["unchanged"] += touch_properties(supabase, fuente, external_ids, seen_at, run_id)
+        except Exception as e:
+            print(f"Error marking {len(external_ids)} {fuente} properties as seen: {e}")
+            stats["errors"] += len(external_ids)
+            failed.update((external_id, fuente) for external_id in external_ids)
 
-    return stats
+    # Bulk upserts don't say which rows were new, so ask before writing
+    # (rows with a known hash are stored already)
+    existing = {key for key in rows if key in known_hashes}
+    by_source = {}
+    for external_id, fuente in rows:
+        if (external_id, fuente) not in existing:
+            by_source.setdefault(fuente, []).append(external_id)
+    for fuente, external_ids in by_source.items():
+        existing.update((external_id, fuente) for external_id in fetch_existing_ids(supabase, fuente, external_ids))
+
+    # Every row of a bulk request must have the same columns
+    by_columns = {}
+    for row in rows.values():
+        by_columns.setdefault(tuple(sorted(row)), []).append(row)
+
+    # Chunks go out concurrently over the client's connection pool
+    chunks = [group[start:start + chunk_size] for group in by_columns.values() for start in range(0, len(group), chunk_size)]
+    upsert = get_profiler().wrap("save", lambda chunk: upsert_rows(supabase, chunk))
+    for failed_rows in supabase.map(upsert, chunks):
+        for row in failed_rows:
+            failed.add((row["external_id"], row["fuente"]))
+
+    for key, row in rows.items():
+        if key in failed:
+            stats["errors"] += 1
+            continue
+        known_hashes[key] = row["content_hash"]
+        if key in existing:
+            stats["updated"] += 1
+        else:
+            stats["inserted"] += 1
 
-def mark_inactive_properties(supabase, hours: int = 48):
+    return stats, failed
+
+_WRITER_DONE = object()
+
+class PropertyWriter:
+    """
+    Writer stage: saves streamed properties to Supabase in batches on a
+    background thread. The queue in front of it is bounded, so put()
+    blocks (and the crawl slows down) when the database falls behind.
+    """
+
+    def __init__(
+        self, supabase, batch_size: int = 500, max_pending: int = 1000, flush_interval: float = 2.0, checkpoint=None, run_id=None
+    ):
+        self.supabase = supabase
+        self.run_id = run_id
+        # One batch is at most one bulk upsert per column set
+        self.chunk_size = batch_size
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = {"inserted": 0, "updated": 0, "unchanged": 0, "errors": 0}
+        # Same counters per fuente, for writers shared by several scrapers
+        self.source_stats = {}
+        # fuente -> barrios with rows that failed to save
+        self.failed_barrios = {}
+        # Time spent saving batches (runs alongside the crawl)
+        self.busy_seconds = 0.0
+        # (external_id, fuente) -> stored content_hash, see load_content_hashes
+        self.content_hashes = {}
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="property-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, prop: dict):
+        """Queue a property for saving. Safe to call from several threads."""
+        self._queue.put(prop)
+
+    def load_content_hashes(self, fuente: str, hashes: dict):
+        """Stored content hashes of a source (external_id -> hash), so unchanged rows skip the rewrite"""
+        self.content_hashes.update(((external_id, fuente), value) for external_id, value in hashes.items())
+
+    def _record(self, fuente: str, stats: dict):
+        source = self.source_stats.setdefault(fuente, {"inserted": 0, "updated": 0, "unchanged": 0, "errors": 0})
+        metrics = get_metrics()
+        for key in self.stats:
+            self.stats[key] += stats[key]
+            source[key] += stats[key]
+            if stats[key]:
+                metrics.inc("rows_written", stats[key], source=fuente, outcome=key)
+
+    def _record_failed(self, fuente: str, props: list):
+        if props:
+            self.failed_barrios.setdefault(fuente, set()).update(prop.get("barrio") for prop in props)
+
+    def _flush(self, batch: list):
+        if not batch:
+            return
+        started = time.monotonic()
+        by_source = {}
+        for prop in batch:
+            by_source.setdefault(prop["fuente"], []).append(prop)
+        for fuente, props in by_source.items():
+            try:
+                with get_metrics().timer("save_seconds", source=fuente), get_profiler().stage("save"):
+                    stats, failed = save_properties(props, self.supabase, self.chunk_size, self.content_hashes, self.run_id)
+                self._record(fuente, stats)
+                self._record_failed(fuente, [prop for prop in props if (prop.get("externalId"), prop.get("fuente")) in failed])
+                if self.checkpoint is not None:
+                    # Failed rows stay unsaved, so --resume retries them
+                    self.checkpoint.record_saved(
+                        prop for prop in props if (prop.get("externalId"), prop.get("fuente")) not in failed
+                    )
+            except Exception as e:
+                # Keep draining the queue so the crawl never blocks on a dead writer
+                print(f"Error saving batch of {len(props)} {fuente} properties: {e}")
+                self._record(fuente, {"inserted": 0, "updated": 0, "unchanged": 0, "errors": len(props)})
+                self._record_failed(fuente, props)
+        batch.clear()
+        self.busy_seconds += time.monotonic() - started
+
+    def _run(self):
+        batch = []
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                # Crawl is between pages: write what we have
+                self._flush(batch)
+                continue
+            if item is _WRITER_DONE:
+                break
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+        self._flush(batch)
+
+    def close(self) -> dict:
+        """Flush everything still queued and return the write stats"""
+        self._queue.put(_WRITER_DONE)
+        self._thread.join()
+        return self.stats
+
+def mark_inactive_properties(
+    supabase, run_id: str, units: dict, hours: float = 48, partial_units: dict = None, partial_hours: float = 144
+):
     """
-    Mark properties as inactive if they haven't been updated recently.
+    Mark properties as inactive in the (fuente, barrio) units this run
+    crawled completely (units maps fuente -> barrios) when this run didn't
+    see them and they haven't been seen for `hours`. In partial_units,
+    crawled but not to the end (e.g. stopped at --max-pages), a listing
+    may just be past the last page fetched, so it must have gone unseen
+    for `partial_hours` instead. Barrios that weren't crawled are left alone.
     """
     cutoff = (datetime.utcnow() - timedelta(hours=hours)).isoformat()
+    count = deactivate_unseen(supabase, run_id, units, cutoff)
+    if partial_units:
+        cutoff = (datetime.utcnow() - timedelta(hours=max(hours, partial_hours))).isoformat()
+        count += deactivate_unseen(supabase, run_id, partial_units, cutoff)
+    return count
+
+def record_run(supabase, run_id: str, started_at: datetime, units: dict, deactivated: int):
+    """Log the run and the units it completed in the corridas table"""
+    supabase.table("corridas").upsert({
+        "id": run_id,
+        "inicio": started_at.isoformat(),
+        "fin": datetime.utcnow().isoformat(),
+        "unidades": units,
+        "desactivadas": deactivated,
+    }, on_conflict="id", returning="minimal").execute()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape properties and save them to Supabase")
+    parser.add_argument("--max-pages", type=int, default=2,
+                        help="Maximum result pages per barrio (default: 2)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Stop paginating a barrio once a page only holds listings seen by earlier runs")
+    parser.add_argument("--parse-workers", type=int, default=0,
+                        help="Parse pages in this many worker processes while fetching continues (default: parse inline)")
+    parser.add_argument("--page-budget", type=int, default=20,
+                        help="Result pages per source per run; the scheduler picks barrios to fit (default: 20)")
+    parser.add_argument("--max-staleness", type=float, default=48.0,
+                        help="Hours after which a barrio is crawled regardless of its churn (default: 48)")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="Wall-clock budget for the whole run in seconds; extra pages, then detail pages "
+                             "are skipped as it runs out (default: no limit)")
+    parser.add_argument("--time-reserve", type=float, default=120.0,
+                        help="Seconds of the budget kept for flushing writes and deactivation (default: 120)")
+    parser.add_argument("--upsert-chunk", type=int, default=500,
+                        help="Rows per bulk upsert request (default: 500)")
+    parser.add_argument("--inactive-after", type=float, default=48.0,
+                        help="Hours a listing may go unseen in completely crawled barrios before it is "
+                             "marked inactive; 0 deactivates on the first miss (default: 48)")
+    parser.add_argument("--stale-after", type=float, default=144.0,
+                        help="Hours a listing may go unseen in barrios crawled only partly (e.g. up to "
+                             "--max-pages) before it is marked inactive (default: 144)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from its checkpoint: save its unsaved properties first, "
+                             "then skip the pages it finished")
+    parser.add_argument("--record", metavar="ARCHIVE",
+                        help="Store every fetched page body in this zip archive, for --replay")
+    parser.add_argument("--replay", metavar="ARCHIVE",
+                        help="Serve pages from an archive made with --record instead of the network")
+    parser.add_argument("--replay-latency", type=float, default=0.0,
+                        help="Seconds each replayed page takes, +/-50%% (default: 0)")
+    parser.add_argument("--metrics-json", metavar="PATH",
+                        help="Write the run summary and every metric (per source, barrio and stage) as JSON")
+    parser.add_argument("--metrics-prom", metavar="PATH",
+                        help="Write the run's metrics as a Prometheus textfile, e.g. into node_exporter's "
+                             "textfile collector directory")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="Profile the run's stages (cProfile and tracemalloc) and write per-stage pstats, "
+                             "collapsed stacks for flamegraphs and an allocation report into DIR")
+    parser.add_argument("--profile-stages", default=",".join(STAGES),
+                        help=f"Comma-separated stages to profile (default: {','.join(STAGES)})")
+    parser.add_argument("--profile-every", type=int, default=1,
+                        help="Profile every Nth entry into a stage, to keep whole-crawl profiles cheap (default: 1)")
+    parser.add_argument("--profile-memory-top", type=int, default=25,
+                        help="Allocation sites listed per stage; 0 turns tracemalloc off, which otherwise slows "
+                             "the whole process (default: 25)")
+    parser.add_argument("--sources", default=DEFAULT_SOURCES,
+                        help=f"Comma-separated sources to scrape, each in its own thread (default: {DEFAULT_SOURCES}; "
+                             f"available: {', '.join(SCRAPERS)})")
+    args = parser.parse_args(argv)
+    args.sources = [source.strip() for source in args.sources.split(",") if source.strip()]
+    unknown = [source for source in args.sources if source not in SCRAPERS]
+    if unknown:
+        parser.error(f"unknown source(s): {', '.join(unknown)}")
+    if args.record and args.replay:
+        parser.error("--record and --replay are mutually exclusive")
+    args.profile_stages = [stage.strip() for stage in args.profile_stages.split(",") if stage.strip()]
+    unknown = [stage for stage in args.profile_stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown profile stage(s): {', '.join(unknown)}")
+    return args
+
+def run_source(scraper, args, barrios: list, writer: PropertyWriter, seen_index, scheduler, checkpoint, supabase, deadline=None) -> dict:
+    """
+    Crawl one source into the shared writer. Runs on its own thread;
+    each scraper keeps its own rate limits and connection pool.
+    """
+    result = {"found": 0, "errors": 0, "seconds": 0.0, "hash_seconds": 0.0, "deadline": deadline, "completed": [], "crawled": []}
+    ids_by_barrio = {barrio: [] for barrio in barrios}
+    started = time.monotonic()
+    existing_lookup = lambda fuente, ids: fetch_existing_listings(supabase, fuente, ids)
+    resumed_saved = False
+    try:
+        # Stored hashes of the barrios about to be crawled, in one bulk query
+        try:
+            writer.load_content_hashes(scraper.fuente, fetch_content_hashes(supabase, scraper.fuente, barrios))
+        except Exception as e:
+            print(f"Could not load content hashes for {scraper.fuente}, every listing will be written: {e}")
+        result["hash_seconds"] = time.monotonic() - started
+
+        # Resuming: finish the interrupted run's unsaved properties (and their detail pages) first
+        unsaved = checkpoint.unsaved(scraper.fuente)
+        if unsaved:
+            print(f"Resuming {scraper.fuente}: saving {len(unsaved)} properties from the interrupted run")
+            if scraper.fetch_detail_pages:
+                unsaved = scraper.enrich_with_details(unsaved, existing_lookup)
+            for prop in unsaved:
+                writer.put(prop)
+                result["found"] += 1
+        resumed_saved = True
+
+        print(f"Running {scraper.fuente} scraper on {len(barrios)} barrios: {', '.join(barrios)}")
+        for prop in scraper.iter_properties(
+            barrios,
+            max_pages_per_barrio=args.max_pages,
+            seen_index=seen_index,
+            parse_workers=args.parse_workers,
+            existing_lookup=existing_lookup,
+            deadline=deadline,
+            checkpoint=checkpoint,
+        ):
+            writer.put(prop)
+            ids_by_barrio.setdefault(prop["barrio"], []).append(prop["externalId"])
+            result["found"] += 1
+            if deadline is not None and deadline.expired():
+                # Into the reserve: stop here so writes and deactivation still run
+                deadline.stats["stopped_early"] = True
+                break
+    except Exception as e:
+        print(f"Error running {scraper.fuente} scraper: {e}")
+        result["errors"] += 1
+
+    # Barrios whose first page failed stay due and are retried next run
+    for barrio, external_ids in ids_by_barrio.items():
+        pages = scraper.barrio_stats.get(barrio, {}).get("pages", 0)
+        if pages:
+            scheduler.record(scraper.fuente, barrio, external_ids, pages)
+
+    # Units crawled to the end whose every listing reached the writer, even if the
+    # crawl stopped early or failed later on: only these may deactivate listings
+    # seen a run ago. Units crawled only partly wait longer (see mark_inactive_properties).
+    for barrio in barrios:
+        stats = scraper.barrio_stats.get(barrio, {})
+        if stats.get("complete") and len(ids_by_barrio.get(barrio, [])) >= stats.get("found", 0):
+            result["completed"].append(barrio)
+        elif resumed_saved and checkpoint.barrio_complete(scraper.fuente, barrio):
+            # Finished by the interrupted run; its unsaved listings went to the writer above
+            result["completed"].append(barrio)
+        elif stats.get("pages") or checkpoint.barrio_done(scraper.fuente, barrio):
+            result["crawled"].append(barrio)
+    result["seconds"] = time.monotonic() - started
+    print(f"Finished {scraper.fuente} scraper in {result['seconds']:.1f}s")
+    return result
+
+def print_source_summary(scraper, result: dict, stats: dict):
+    print(f"\n{'='*30}")
+    print(f"{scraper.fuente} ({result['seconds']:.1f}s)")
+    print(f"{'='*30}")
+
+    print(f"Found {result['found']} properties from {scraper.fuente}, "
+          f"{len(result['completed'])} barrios crawled completely")
+    parse_stats = scraper.parse_stats
+    print(f"Search pages parsed from embedded JSON: {parse_stats['structured']}, "
+          f"from DOM: {parse_stats['dom']} (JSON rejected: {parse_stats['structured_rejected']})")
+    detail_stats = scraper.detail_stats
+    if detail_stats["fetched"]:
+        avg_parse_ms = detail_stats["parse_seconds"] / detail_stats["fetched"] * 1000
+    else:
+        avg_parse_ms = 0.0
+    print(f"Detail pages fetched: {detail_stats['fetched']}, "
+          f"skipped (unchanged): {detail_stats['skipped']}, errors: {detail_stats['errors']} "
+          f"(parse avg {avg_parse_ms:.1f} ms, max {detail_stats['parse_max_seconds'] * 1000:.1f} ms)")
+
+    if scraper.use_playwright:
+        route_stats = scraper.route_filter.stats
+        print(f"Blocked {route_stats['requests_blocked']} of "
+              f"{route_stats['requests_blocked'] + route_stats['requests_allowed']} requests "
+              f"(~{route_stats['bytes_saved_estimate'] / 1e6:.1f} MB saved, "
+              f"{route_stats['bytes_loaded'] / 1e6:.1f} MB loaded)")
+
+    for host, host_stats in scraper.throttle.stats().items():
+        print(f"{host}: concurrency {host_stats['limit']:.1f} "
+              f"(range {host_stats['min_limit']:.1f}-{host_stats['max_limit']:.1f}), "
+              f"throttled {host_stats['throttled']}, errors {host_stats['errors']}, "
+              f"retries {host_stats['retries']}, circuit trips {host_stats['circuit_trips']}"
+              + (f" [{host_stats['state']}]" if host_stats["state"] != "closed" else ""))
+
+    deadline = result["deadline"]
+    if deadline is not None:
+        deadline_stats = deadline.stats
+        print(f"Time budget: skipped {deadline_stats['pages_skipped']} extra pages, "
+              f"{deadline_stats['barrios_skipped']} barrios, "
+              f"{deadline_stats['details_skipped']} detail pages"
+              + (", stopped early" if deadline_stats["stopped_early"] else ""))
+
+    print(f"Inserted: {stats['inserted']}, Updated: {stats['updated']}, "
+          f"Unchanged (marked seen): {stats['unchanged']}, Errors: {stats['errors']}")
+
+def record_source_metrics(scraper, result: dict):
+    """Record the source's throttle, route filter and time budget stats as metrics"""
+    metrics = get_metrics()
+    source = scraper.fuente
+
+    for host, host_stats in scraper.throttle.stats().items():
+        metrics.set("host_concurrency_limit", host_stats["limit"], source=source, host=host)
+        metrics.set("host_concurrency_min_limit", host_stats["min_limit"], source=source, host=host)
+        metrics.set("host_concurrency_max_limit", host_stats["max_limit"], source=source, host=host)
+        for state in CIRCUIT_STATES:
+            metrics.set("host_circuit_state", 1 if host_stats["state"] == state else 0, source=source, host=host, state=state)
+        for key in ("throttled", "errors", "retries", "circuit_trips"):
+            metrics.inc(f"host_{key}", host_stats[key], source=source, host=host)
+
+    if scraper.use_playwright:
+        route_stats = scraper.route_filter.stats
+        metrics.inc("browser_requests_blocked", route_stats["requests_blocked"], source=source)
+        metrics.inc("browser_requests_allowed", route_stats["requests_allowed"], source=source)
+        metrics.inc("browser_bytes_saved_estimate", route_stats["bytes_saved_estimate"], source=source)
+        metrics.inc("browser_bytes_loaded", route_stats["bytes_loaded"], source=source)
 
-    result = supabase.table("propiedades").update(
-        {"activo": False}
-    ).eq("activo", True).lt("fecha_ultima_actualizacion", cutoff).execute()
+    deadline = result["deadline"]
+    if deadline is not None:
+        deadline_stats = deadline.stats
+        for kind in ("pages", "barrios", "details"):
+            metrics.inc("deadline_skipped", deadline_stats[f"{kind}_skipped"], source=source, kind=kind)
+        metrics.set("deadline_stopped_early", 1 if deadline_stats["stopped_early"] else 0, source=source)
 
-    return len(result.data) if result.data else 0
+def record_browser_metrics(browser_stats: dict):
+    """Record the shared browser pool's stats as metrics"""
+    metrics = get_metrics()
+    for key in ("launches", "contexts_created", "context_reuses", "contexts_recycled", "ready_timeouts", "errors"):
+        metrics.inc(f"browser_{key}", browser_stats[key])
+    metrics.set("browser_render_max_seconds", browser_stats["render_max_seconds"])
+
+def record_cache_metrics(cache_stats: dict):
+    """Record the response cache's stats as metrics"""
+    metrics = get_metrics()
+    for key in ("hits", "revalidated", "misses"):
+        metrics.inc("response_cache_lookups", cache_stats[key], result=key)
+    metrics.inc("response_cache_evicted", cache_stats["evicted"])
+    metrics.inc("response_cache_bytes_served", cache_stats["bytes_served"])
+    metrics.inc("response_cache_bytes_stored", cache_stats["bytes_stored"])
+
+def main(argv=None) -> dict:
+    """Run the scrapers; returns the run report (totals and stage timings)"""
+    args = parse_args(argv)
+    started = time.monotonic()
+    started_at = datetime.utcnow()
+    deadline_end = started + args.time_budget if args.time_budget else None
+    stages = {}
+    metrics = get_metrics()
+    metrics.reset()
+    if args.profile:
+        start_profiling(args.profile, args.profile_stages, args.profile_every, args.profile_memory_top)
 
-def main():
     print("=" * 50)
     print(f"Starting scraper at {datetime.now().isoformat()}")
     print("=" * 50)
 
+    archive = None
+    if args.record or args.replay:
+        archive = open_archive(args.record or args.replay, "record" if args.record else "replay", args.replay_latency)
+        print(f"{'Recording to' if args.record else 'Replaying'} {archive.path} ({len(archive)} pages archived)")
+
     # Get Supabase client
     supabase = get_supabase()
 
-    # Initialize scrapers (Zonaprop disabled - aggressive bot detection)
-    scrapers = [
-        MercadoLibreScraper(),
-        ArgenpropScraper()
-    ]
+    # Each source crawls on its own thread
+    scrapers = [SCRAPERS[source]() for source in args.sources]
+
+    # Pick each source's barrios by churn and staleness, within the page budget.
+    # A resumed run keeps the interrupted run's picks.
+    scheduler = load_barrio_scheduler(args.max_staleness, default_pages=args.max_pages)
+    checkpoint = open_checkpoint(resume=args.resume)
+    if args.resume:
+        print("Resuming interrupted run" if checkpoint.resumed else "No interrupted run to resume")
+    # Rows written or marked seen carry the run ID; a resumed run keeps the interrupted one's
+    run_id = checkpoint.run_id()
+    if run_id is None:
+        run_id = f"{started_at:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+        checkpoint.record_run(run_id)
+    print(f"Run ID: {run_id}")
+    barrios_by_source = {}
+    for scraper in scrapers:
+        barrios = checkpoint.plan(scraper.fuente)
+        if barrios is None:
+            barrios = scheduler.plan(scraper.fuente, BARRIOS_CABA, args.page_budget)
+            checkpoint.record_plan(scraper.fuente, barrios)
+        barrios_by_source[scraper.fuente] = barrios
 
-    # Select a subset of barrios to scrape (to stay within time limits)
-    barrios_to_scrape = BARRIOS_CABA[:10]  # Scrape 10 barrios per run
+    total_stats = {"inserted": 0, "updated": 0, "unchanged": 0, "errors": 0}
 
-    total_stats = {"inserted": 0, "updated": 0, "errors": 0}
+    seen_index = load_seen_index() if args.incremental else None
+    if seen_index is not None:
+        print(f"Incremental mode: {len(seen_index)} listings already known")
 
-    for scraper in scrapers:
-        print(f"\n{'='*30}")
-        print(f"Running {scraper.fuente} scraper")
-        print(f"{'='*30}")
+    stages["plan"] = time.monotonic() - started
 
-        try:
-            properties = scraper.scrape_all(barrios_to_scrape, max_pages_per_barrio=2)
-            print(f"\nFound {len(properties)} properties from {scraper.fuente}")
+    # Properties from every source are saved while the crawls are still running
+    crawl_started = time.monotonic()
+    writer = PropertyWriter(
+        supabase, batch_size=args.upsert_chunk, max_pending=args.upsert_chunk * 2, checkpoint=checkpoint, run_id=run_id
+    )
+    try:
+        with ThreadPoolExecutor(max_workers=len(scrapers), thread_name_prefix="source") as executor:
+            futures = [
+                executor.submit(
+                    run_source, scraper, args, barrios_by_source[scraper.fuente], writer, seen_index, scheduler, checkpoint, supabase,
+                    Deadline(deadline_end, args.time_reserve) if deadline_end else None,
+                )
+                for scraper in scrapers
+            ]
+            results = [future.result() for future in futures]
+        stages["crawl"] = time.monotonic() - crawl_started
+        # Parsed pages, caches and queued writes are all still held here
+        get_profiler().snapshot_memory()
+    finally:
+        flush_started = time.monotonic()
+        writer.close()
+        stages["final_flush"] = time.monotonic() - flush_started
+    stages["writer_busy"] = writer.busy_seconds
 
-            if properties:
-                stats = save_properties(properties, supabase)
-                print(f"Inserted: {stats['inserted']}, Updated: {stats['updated']}, Errors: {stats['errors']}")
+    for scraper, result in zip(scrapers, results):
+        stats = writer.source_stats.get(scraper.fuente, {"inserted": 0, "updated": 0, "unchanged": 0, "errors": 0})
+        print_source_summary(scraper, result, stats)
+        record_source_metrics(scraper, result)
+        total_stats["inserted"] += stats["inserted"]
+        total_stats["updated"] += stats["updated"]
+        total_stats["unchanged"] += stats["unchanged"]
+        total_stats["errors"] += stats["errors"] + result["errors"]
 
-                total_stats["inserted"] += stats["inserted"]
-                total_stats["updated"] += stats["updated"]
-                total_stats["errors"] += stats["errors"]
+    print(f"\nWall clock: {time.monotonic() - started:.1f}s total, "
+          + ", ".join(f"{scraper.fuente} {result['seconds']:.1f}s" for scraper, result in zip(scrapers, results)))
 
-        except Exception as e:
-            print(f"Error running {scraper.fuente} scraper: {e}")
-            total_stats["errors"] += 1
+    if seen_index is not None:
+        seen_index.save()
+    scheduler.save()
 
-    # Mark old properties as inactive
-    print("\nMarking inactive properties...")
-    inactive_count = mark_inactive_properties(supabase)
+    # One browser serves every Playwright scraper for the whole run
+    browser_stats = get_browser_pool().stats
+    close_browser_pool()
+    record_browser_metrics(browser_stats)
+    print(f"\nBrowser launches: {browser_stats['launches']}, "
+          f"contexts created: {browser_stats['contexts_created']}, "
+          f"reused: {browser_stats['context_reuses']}, "
+          f"recycled: {browser_stats['contexts_recycled']}")
+    if browser_stats["pages_rendered"]:
+        avg_render = browser_stats["render_seconds"] / browser_stats["pages_rendered"]
+        print(f"Rendered {browser_stats['pages_rendered']} pages, "
+              f"avg {avg_render:.2f}s, max {browser_stats['render_max_seconds']:.2f}s, "
+              f"readiness timeouts: {browser_stats['ready_timeouts']}")
+
+    cache = get_response_cache()
+    if cache:
+        cache_stats = cache.stats
+        record_cache_metrics(cache_stats)
+        print(f"Response cache: {cache_stats['hits']} hits, {cache_stats['revalidated']} revalidated, "
+              f"{cache_stats['misses']} misses, {cache_stats['evicted']} evicted, "
+              f"{cache_stats['bytes_served'] / 1e6:.1f} MB served from cache")
+        close_response_cache()
+
+    # Mark listings that disappeared from crawled barrios as inactive. Leave barrios
+    # alone where rows failed to save: their listings may just not be marked seen.
+    units = {}
+    partial_units = {}
+    for scraper, result in zip(scrapers, results):
+        failed = writer.failed_barrios.get(scraper.fuente, set())
+        if failed:
+            print(f"Not deactivating {scraper.fuente} listings in {', '.join(sorted(failed, key=str))}: "
+                  f"some of their rows failed to save")
+        units[scraper.fuente] = [barrio for barrio in result["completed"] if barrio not in failed]
+        partial_units[scraper.fuente] = [barrio for barrio in result["crawled"] if barrio not in failed]
+    print(f"\nMarking inactive properties in {sum(len(barrios) for barrios in units.values())} completely crawled "
+          f"and {sum(len(barrios) for barrios in partial_units.values())} partly crawled barrios...")
+    deactivate_started = time.monotonic()
+    inactive_count = mark_inactive_properties(
+        supabase, run_id, units, args.inactive_after, partial_units, args.stale_after
+    )
+    stages["deactivate"] = time.monotonic() - deactivate_started
     print(f"Marked {inactive_count} properties as inactive")
+    try:
+        record_run(supabase, run_id, started_at, units, inactive_count)
+    except Exception as e:
+        print(f"Could not record run {run_id}: {e}")
+
+    db_stats = supabase.stats
+    print(f"Database: {db_stats['requests']} requests in {db_stats['seconds']:.1f}s, {db_stats['retries']} retries")
+    supabase.close()
+
+    if archive is not None:
+        print(f"Archive: {archive.stats['recorded']} recorded, {archive.stats['replayed']} replayed, "
+              f"{archive.stats['misses']} missing")
+        close_archive()
+
+    # The run got to the end: nothing left to resume
+    checkpoint.finish()
 
     print("\n" + "=" * 50)
     print("SCRAPER COMPLETE")
     print(f"Total inserted: {total_stats['inserted']}")
     print(f"Total updated: {total_stats['updated']}")
+    print(f"Total unchanged: {total_stats['unchanged']}")
     print(f"Total errors: {total_stats['errors']}")
+    if deadline_end:
+        skipped = [result["deadline"].stats for result in results]
+        print(f"Skipped for time: {sum(d['pages_skipped'] for d in skipped)} extra pages, "
+              f"{sum(d['barrios_skipped'] for d in skipped)} barrios, "
+              f"{sum(d['details_skipped'] for d in skipped)} detail pages "
+              f"({time.monotonic() - started:.0f}s of {args.time_budget:.0f}s budget used)")
+    stages["total"] = time.monotonic() - started
+
+    sources = {
+        scraper.fuente: {
+            "crawl": result["seconds"],
+            "hash_load": result["hash_seconds"],
+            "detail_parse": scraper.detail_stats["parse_seconds"],
+        }
+        for scraper, result in zip(scrapers, results)
+    }
+    print("Stage timings: " + ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in stages.items()))
+    for fuente, timings in sources.items():
+        print(f"  {fuente}: " + ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in timings.items()))
     print("=" * 50)
 
+    for stage, seconds in stages.items():
+        metrics.set("stage_seconds", seconds, stage=stage)
+    for fuente, timings in sources.items():
+        for stage, seconds in timings.items():
+            metrics.set("stage_seconds", seconds, stage=stage, source=fuente)
+    metrics.set("last_run_timestamp_seconds", time.time())
+    if args.profile:
+        for path in stop_profiling():
+            print(f"Profile written to {path}")
+    report = {"run_id": run_id, "totals": total_stats, "stages": stages, "sources": sources, "database": dict(db_stats)}
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json, report)
+        print(f"Metrics written to {args.metrics_json}")
+    if args.metrics_prom:
+        metrics.write_prometheus(args.metrics_prom)
+        print(f"Metrics written to {args.metrics_prom}")
+    return report
+
 if __name__ == "__main__":
     main()
@@ -20,12 +20,22 @@ CREATE TABLE IF NOT EXISTS propiedades (
     fecha_publicacion TIMESTAMPTZ,
     fecha_primer_visto TIMESTAMPTZ DEFAULT NOW(),
     fecha_ultima_actualizacion TIMESTAMPTZ DEFAULT NOW(),
+    fecha_ultimo_visto TIMESTAMPTZ DEFAULT NOW(),
     activo BOOLEAN DEFAULT TRUE,
+    -- Hash de los campos visibles; si no cambió, el scraper solo actualiza fecha_ultimo_visto
+    content_hash TEXT,
+    -- Última corrida del scraper que vio la propiedad (ver tabla corridas)
+    ultima_corrida TEXT NOT NULL DEFAULT '',
 
     -- Unique constraint para evitar duplicados
     UNIQUE(external_id, fuente)
 );
 
+-- Columnas agregadas después de la versión inicial
+ALTER TABLE propiedades ADD COLUMN IF NOT EXISTS fecha_ultimo_visto TIMESTAMPTZ DEFAULT NOW();
+ALTER TABLE propiedades ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE propiedades ADD COLUMN IF NOT EXISTS ultima_corrida TEXT NOT NULL DEFAULT '';
+
 -- Índices para búsquedas eficientes
 CREATE INDEX IF NOT EXISTS idx_propiedades_barrio ON propiedades(barrio);
 CREATE INDEX IF NOT EXISTS idx_propiedades_precio ON propiedades(precio);
@@ -34,6 +44,9 @@ CREATE INDEX IF NOT EXISTS idx_propiedades_fuente ON propiedades(fuente);
 CREATE INDEX IF NOT EXISTS idx_propiedades_activo ON propiedades(activo);
 CREATE INDEX IF NOT EXISTS idx_propiedades_fecha_primer_visto ON propiedades(fecha_primer_visto DESC);
 CREATE INDEX IF NOT EXISTS idx_propiedades_activo_fecha ON propiedades(activo, fecha_primer_visto DESC);
+-- Carga de content_hash por fuente y barrios al inicio de cada corrida
+CREATE INDEX IF NOT EXISTS idx_propiedades_fuente_barrio ON propiedades(fuente, barrio);
+CREATE INDEX IF NOT EXISTS idx_propiedades_activo_visto ON propiedades(activo, fecha_ultimo_visto);
 
 -- Función para actualizar fecha_ultima_actualizacion automáticamente
 CREATE OR REPLACE FUNCTION update_fecha_ultima_actualizacion()
@@ -44,11 +57,14 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
--- Trigger para actualizar automáticamente
+-- Trigger para actualizar automáticamente. No corre cuando solo se marca
+-- la propiedad como vista (cambia fecha_ultimo_visto pero no content_hash).
 DROP TRIGGER IF EXISTS trigger_update_fecha ON propiedades;
 CREATE TRIGGER trigger_update_fecha
     BEFORE UPDATE ON propiedades
     FOR EACH ROW
+    WHEN (OLD.fecha_ultimo_visto IS NOT DISTINCT FROM NEW.fecha_ultimo_visto
+          OR OLD.content_hash IS DISTINCT FROM NEW.content_hash)
     EXECUTE FUNCTION update_fecha_ultima_actualizacion();
 
 -- Enable Row Level Security (opcional, para mayor seguridad)
@@ -62,6 +78,24 @@ CREATE POLICY "Permitir lectura publica" ON propiedades
 CREATE POLICY "Permitir escritura con service key" ON propiedades
     FOR ALL USING (true) WITH CHECK (true);
 
+-- =============================================
+-- CORRIDAS DEL SCRAPER
+-- =============================================
+
+-- Una fila por corrida: qué unidades (fuente, barrio) se recorrieron
+-- completas. Solo en esas se desactivan las propiedades que no aparecieron.
+CREATE TABLE IF NOT EXISTS corridas (
+    id TEXT PRIMARY KEY,
+    inicio TIMESTAMPTZ NOT NULL,
+    fin TIMESTAMPTZ,
+    unidades JSONB NOT NULL DEFAULT '{}',
+    desactivadas INTEGER DEFAULT 0
+);
+
+ALTER TABLE corridas ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Permitir lectura corridas" ON corridas FOR SELECT USING (true);
+CREATE POLICY "Permitir escritura corridas" ON corridas FOR ALL USING (true) WITH CHECK (true);
+
 -- =============================================
 -- HISTORIAL DE PRECIOS
 -- =============================================
@@ -109,6 +143,7 @@ DROP TRIGGER IF EXISTS trigger_cambio_precio ON propiedades;
 CREATE TRIGGER trigger_cambio_precio
     AFTER UPDATE ON propiedades
     FOR EACH ROW
+    WHEN (OLD.precio IS DISTINCT FROM NEW.precio)
     EXECUTE FUNCTION registrar_cambio_precio();
 
 -- Políticas para historial_precios
@@ -0,0 +1,69 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# api._lib as a package, and the scripts as top-level modules
+sys.path[:0] = [ROOT, os.path.join(ROOT, "scripts")]
+
+from api._lib.local_postgrest import LocalPostgrest, PostgrestRequestError  # noqa: E402
+from api._lib.postgrest import PostgrestClient  # noqa: E402
+
+
+class FlakyPostgrest(LocalPostgrest):
+    """LocalPostgrest that rejects writes of chosen rows (400 by default), or of everything (503) while down"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.rejected_ids = set()
+        self.reject_status = 400
+        self.down = False
+        self.writes = 0
+
+    def _write(self, table, params, preferences, body):
+        self.writes += 1
+        if self.down:
+            raise PostgrestRequestError(503, "PGRST000", "database unavailable")
+        rows = body if isinstance(body, list) else [body]
+        if any(row.get("external_id") in self.rejected_ids for row in rows):
+            raise PostgrestRequestError(self.reject_status, "22P02", "invalid input syntax")
+        return super()._write(table, params, preferences, body)
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(monkeypatch):
+    # Never read or fill the developer's on-disk cache
+    monkeypatch.setenv("SCRAPER_CACHE", "0")
+
+
+@pytest.fixture
+def db():
+    with FlakyPostgrest() as server:
+        yield server
+
+
+@pytest.fixture
+def supabase(db):
+    # No retries: a 503 should fail at once
+    client = PostgrestClient(db.url, "test-key", pool_size=2, max_retries=0)
+    yield client
+    client.close()
+
+
+def make_property(external_id: str, fuente: str = "argenprop", barrio: str = "Palermo", **fields) -> dict:
+    prop = {
+        "externalId": external_id,
+        "url": f"https://www.example.com/{external_id}",
+        "titulo": f"Departamento {external_id}",
+        "precio": 100000.0,
+        "moneda": "USD",
+        "barrio": barrio,
+        "tipo": "departamento",
+        "fotos": [],
+        "descripcion": None,
+        "fuente": fuente,
+        "operacion": "venta",
+    }
+    prop.update(fields)
+    return prop
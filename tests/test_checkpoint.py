@@ -0,0 +1,95 @@
+from api._lib.scrapers.checkpoint import Checkpoint
+from conftest import make_property
+from run_scraper import PropertyWriter
+
+
+def test_resume_replays_the_journal(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = Checkpoint(path)
+    checkpoint.record_run("run-1")
+    checkpoint.record_plan("argenprop", ["Palermo", "Belgrano"])
+    page = [make_property("a1"), make_property("a2")]
+    checkpoint.record_page("argenprop", "Palermo", 1, page)
+    checkpoint.record_barrio("argenprop", "Palermo", complete=True)
+    checkpoint.record_page("argenprop", "Belgrano", 1, [make_property("b1", barrio="Belgrano")])
+    checkpoint.record_saved([page[0]])
+    checkpoint.close()
+
+    resumed = Checkpoint(path, resume=True)
+    assert resumed.resumed
+    assert resumed.run_id() == "run-1"
+    assert resumed.plan("argenprop") == ["Palermo", "Belgrano"]
+    assert resumed.page_done("argenprop", "Palermo", 1)
+    assert not resumed.page_done("argenprop", "Palermo", 2)
+    assert resumed.barrio_done("argenprop", "Palermo")
+    assert resumed.barrio_complete("argenprop", "Palermo")
+    assert not resumed.barrio_done("argenprop", "Belgrano")
+    assert sorted(prop["externalId"] for prop in resumed.unsaved("argenprop")) == ["a2", "b1"]
+    assert resumed.unsaved("mercadolibre") == []
+    resumed.close()
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = Checkpoint(path)
+    checkpoint.record_plan("argenprop", ["Palermo"])
+    checkpoint.record_page("argenprop", "Palermo", 1, [make_property("a1")])
+    checkpoint.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"t": "saved", "keys": ["argenprop\\ta1"')
+
+    resumed = Checkpoint(path, resume=True)
+    assert [prop["externalId"] for prop in resumed.unsaved("argenprop")] == ["a1"]
+    resumed.close()
+
+
+def test_without_resume_the_journal_starts_over(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = Checkpoint(path)
+    checkpoint.record_plan("argenprop", ["Palermo"])
+    checkpoint.close()
+
+    fresh = Checkpoint(path)
+    assert not fresh.resumed
+    assert fresh.plan("argenprop") is None
+    fresh.close()
+
+
+def _write_through(supabase, checkpoint, props):
+    writer = PropertyWriter(supabase, batch_size=10, checkpoint=checkpoint, run_id="run-1")
+    for prop in props:
+        writer.put(prop)
+    writer.close()
+    checkpoint.close()
+    return writer
+
+
+def test_writer_journals_only_saved_rows(tmp_path, db, supabase):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = Checkpoint(path)
+    props = [make_property(f"a{i}") for i in range(6)]
+    checkpoint.record_page("argenprop", "Palermo", 1, props)
+    db.rejected_ids.add("a3")
+
+    writer = _write_through(supabase, checkpoint, props)
+
+    assert writer.stats["inserted"] == 5
+    assert writer.stats["errors"] == 1
+    resumed = Checkpoint(path, resume=True)
+    assert [prop["externalId"] for prop in resumed.unsaved("argenprop")] == ["a3"]
+    resumed.close()
+
+
+def test_writer_journals_nothing_while_the_database_is_down(tmp_path, db, supabase):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = Checkpoint(path)
+    props = [make_property(f"a{i}") for i in range(4)]
+    checkpoint.record_page("argenprop", "Palermo", 1, props)
+    db.down = True
+
+    writer = _write_through(supabase, checkpoint, props)
+
+    assert writer.stats["errors"] == 4
+    resumed = Checkpoint(path, resume=True)
+    assert sorted(prop["externalId"] for prop in resumed.unsaved("argenprop")) == ["a0", "a1", "a2", "a3"]
+    resumed.close()
@@ -0,0 +1,183 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from api._lib.scrapers import ArgenpropScraper
+from api._lib.scrapers.base import BaseScraper, _Crawl
+from api._lib.scrapers.checkpoint import Checkpoint
+from api._lib.scrapers.deadline import Deadline
+from api._lib.scrapers.scheduler import BarrioScheduler
+from run_scraper import PropertyWriter, mark_inactive_properties, run_source
+
+# Listing cards per results page, by barrio; "marker" is the no-results
+# page, "captcha" a page with neither cards nor marker, None a failed fetch
+PAGES = {
+    "full": [3, 3, 3],
+    "short": [3, 1],
+    "marker": [3, "marker"],
+    "captcha": [3, "captcha"],
+    "failed": [3, None],
+    "first-failed": [None, 3],
+    "single": [3, 3, "marker"],
+}
+
+
+def page_for(url: str):
+    _, barrio, page = url.rsplit("/", 2)
+    pages = PAGES[barrio]
+    value = pages[int(page) - 1] if int(page) <= len(pages) else None
+    return None if value is None else page_body(barrio, int(page), value)
+
+
+class PagedScraper(BaseScraper):
+    empty_selector = ".no-results"
+    fetch_detail_pages = False
+    rate_limit = 1000.0
+
+    @property
+    def fuente(self) -> str:
+        return "test"
+
+    def get_search_url(self, barrio: str, page: int = 1) -> str:
+        return f"https://example.com/{barrio}/{page}"
+
+    def get_listings_from_page(self, soup):
+        return soup.select("li")
+
+    def parse_listing(self, element):
+        external_id = element.get_text(strip=True)
+        return {"externalId": external_id, "url": f"https://example.com/p/{external_id}", "titulo": "Depto", "tipo": "departamento"}
+
+    def _fetch_raw(self, url: str):
+        return page_for(url)
+
+
+def page_body(barrio: str, page: int, value) -> bytes:
+    if value == "marker":
+        return b"<html><body><div class='no-results'>Sin resultados</div></body></html>"
+    if value == "captcha":
+        return b"<html><body><form>Verify you are human</form></body></html>"
+    cards = "".join(f"<li>{barrio}-{page}-{i}</li>" for i in range(value))
+    return f"<html><body><ul>{cards}</ul></body></html>".encode()
+
+
+class FakeFetcher:
+    async def fetch(self, url: str, admit=None):
+        return page_for(url)
+
+
+class NothingSeen:
+    def known_share(self, fuente, external_ids):
+        return 0.0
+
+    def add(self, fuente, external_ids):
+        pass
+
+
+async def _emit(page_properties):
+    pass
+
+
+def crawl_completeness(barrio: str, max_pages: int, incremental: bool) -> bool:
+    scraper = PagedScraper()
+    crawl = _Crawl(FakeFetcher(), _emit, NothingSeen() if incremental else None)
+    asyncio.run(scraper._scrape_barrio_async(crawl, barrio, max_pages))
+    return scraper.barrio_stats[barrio]["complete"]
+
+
+@pytest.mark.parametrize("incremental", [False, True], ids=["concurrent", "incremental"])
+@pytest.mark.parametrize("barrio, max_pages, complete", [
+    ("full", 2, False),          # stopped at the cap with full pages
+    ("short", 2, True),          # page 2 shorter than page 1: the last one
+    ("marker", 2, True),         # page 2 shows the no-results marker
+    ("captcha", 2, False),       # empty, but not the marker: blocked
+    ("failed", 2, False),
+    ("first-failed", 2, False),
+    ("single", 3, True),
+    ("single", 2, False),
+])
+def test_barrio_completeness(barrio, max_pages, complete, incremental):
+    assert crawl_completeness(barrio, max_pages, incremental) is complete
+
+
+def test_argenprop_recognizes_its_no_results_page():
+    scraper = ArgenpropScraper()
+    assert scraper._shows_no_results(b"<html><body><div class='listing-no-results'>No hay resultados</div></body></html>")
+    assert not scraper._shows_no_results(b"<html><body><div class='captcha'></div></body></html>")
+
+
+def _listing(external_id: str, barrio: str, hours_ago: float) -> dict:
+    return {
+        "external_id": external_id,
+        "fuente": "argenprop",
+        "barrio": barrio,
+        "titulo": external_id,
+        "tipo": "departamento",
+        "url": f"https://example.com/{external_id}",
+        "activo": True,
+        "ultima_corrida": "old-run",
+        "fecha_ultimo_visto": (datetime.utcnow() - timedelta(hours=hours_ago)).isoformat(),
+    }
+
+
+def test_partly_crawled_barrios_deactivate_only_long_unseen_listings(db, supabase):
+    db.tables["propiedades"] = [
+        _listing("complete-recent", "Palermo", 1),
+        _listing("complete-old", "Palermo", 72),
+        _listing("partial-old", "Recoleta", 72),
+        _listing("partial-ancient", "Recoleta", 200),
+        _listing("uncrawled-ancient", "Belgrano", 200),
+    ]
+
+    count = mark_inactive_properties(
+        supabase, "this-run", {"argenprop": ["Palermo"]}, 48, {"argenprop": ["Recoleta"]}, 144
+    )
+
+    active = {row["external_id"]: row["activo"] for row in db.tables["propiedades"]}
+    assert count == 2
+    assert active == {
+        "complete-recent": True,
+        "complete-old": False,
+        "partial-old": True,
+        "partial-ancient": False,
+        "uncrawled-ancient": True,
+    }
+
+
+class StopAfter(Deadline):
+    """A budget that runs out once `calls` listings have gone to the writer"""
+
+    def __init__(self, calls: int):
+        super().__init__(time.monotonic() + 3600, reserve=0)
+        self.calls = calls
+
+    def expired(self) -> bool:
+        self.calls -= 1
+        return self.calls <= 0
+
+
+@pytest.mark.parametrize("stop_after, completed, crawled", [
+    (4, ["short"], []),     # every listing reached the writer before the stop
+    (2, [], ["short"]),     # two listings of the complete barrio never did
+])
+def test_stopping_early_keeps_barrios_whose_listings_were_all_written(
+    tmp_path, supabase, stop_after, completed, crawled
+):
+    scraper = PagedScraper()
+    args = SimpleNamespace(max_pages=2, parse_workers=0)
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    scheduler = BarrioScheduler(str(tmp_path / "schedule.json"))
+    writer = PropertyWriter(supabase, batch_size=10, run_id="run-1")
+
+    result = run_source(
+        scraper, args, ["short"], writer, None, scheduler, checkpoint, supabase, StopAfter(stop_after)
+    )
+    writer.close()
+    checkpoint.close()
+
+    assert result["deadline"].stats["stopped_early"]
+    assert result["completed"] == completed
+    assert result["crawled"] == crawled
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import pytest
+
+from api._lib.scrapers import deadline as deadline_module
+from api._lib.scrapers.deadline import Deadline
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(deadline_module, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def crawl_first_barrio(clock) -> Deadline:
+    """Four barrios to crawl; the first page took 10s and its first detail page 10s more"""
+    deadline = Deadline(1000.0, reserve=0)
+    deadline.expect_first_pages(4)
+    clock.now = 10.0
+    assert deadline.allow_page(first=True)
+    deadline.page_done(first=True, properties=5)
+    deadline.expect_details(5)
+    assert deadline.allow_detail()
+    clock.now = 20.0
+    deadline.detail_done()
+    return deadline
+
+
+# At time t, with rates observed since the start: the three outstanding first
+# pages need 3t, the 19 outstanding details (4 queued, 5 for each first page)
+# need 19(t - 10), and one more result page t
+@pytest.mark.parametrize("now, extra_page, detail, first_page", [
+    (40, True, True, True),
+    (100, False, True, True),       # extra pages go first
+    (500, False, False, True),      # then detail pages
+    (1000, False, False, False),    # first pages only once the time is up
+])
+def test_work_is_shed_in_priority_order(clock, now, extra_page, detail, first_page):
+    deadline = crawl_first_barrio(clock)
+    clock.now = now
+
+    assert deadline.allow_page(first=False) is extra_page
+    assert deadline.allow_detail() is detail
+    assert deadline.allow_page(first=True) is first_page
+
+
+def test_shed_work_is_counted(clock):
+    deadline = crawl_first_barrio(clock)
+    clock.now = 1000.0
+
+    deadline.allow_page(first=False)
+    deadline.allow_detail()
+    deadline.allow_page(first=True)
+
+    assert deadline.expired()
+    assert deadline.stats["pages_skipped"] == 1
+    assert deadline.stats["details_skipped"] == 1
+    assert deadline.stats["barrios_skipped"] == 1
@@ -0,0 +1,65 @@
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from api._lib.scrapers import ArgenpropScraper
+from api._lib.scrapers import cache as cache_module
+from api._lib.scrapers.base import BaseScraper
+from api._lib.scrapers.cache import ResponseCache, response_time
+from api._lib.scrapers.replay import close_archive, open_archive
+
+DETAIL_URL = "https://www.argenprop.com/departamento-en-venta-en-palermo--123"
+DETAIL_PAGE = (
+    "<html><body><div class='section-description--content'>Lindo</div>"
+    "<p class='section-date'>Publicado hace 3 días</p></body></html>"
+).encode()
+
+DAY = 24 * 3600
+
+
+def test_relative_dates_count_back_from_the_given_day():
+    fetched_on = date(2024, 6, 10)
+    assert BaseScraper.clean_date("Publicado hace 3 días", fetched_on) == "2024-06-07"
+    assert BaseScraper.clean_date("Publicado hoy", fetched_on) == "2024-06-10"
+    assert BaseScraper.clean_date("Publicado ayer", fetched_on) == "2024-06-09"
+    assert BaseScraper.clean_date("15/03/2024", fetched_on) == "2024-03-15"
+    assert BaseScraper.clean_date("Publicado hace 3 días") == (date.today() - timedelta(days=3)).isoformat()
+
+
+def test_response_time_reads_the_date_header():
+    assert response_time("Wed, 05 Jun 2024 12:00:00 GMT") == 1717588800.0
+    assert abs(response_time(None) - time.time()) < 5
+    assert abs(response_time("not a date") - time.time()) < 5
+
+
+def test_cached_detail_page_dates_from_when_it_was_fetched(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    fetched_at = time.time() - 5 * DAY
+    cache.put(DETAIL_URL, "detail", DETAIL_PAGE, fetched_at=fetched_at)
+    monkeypatch.setenv("SCRAPER_CACHE", "1")
+    monkeypatch.setattr(cache_module, "_cache", cache)
+
+    detail = ArgenpropScraper().fetch_detail(DETAIL_URL)
+
+    assert cache.stats["hits"] == 1
+    assert detail["fechaPublicacion"] == (date.fromtimestamp(fetched_at) - timedelta(days=3)).isoformat()
+    cache.close()
+
+
+@pytest.fixture
+def archive_path(tmp_path):
+    yield str(tmp_path / "pages.zip")
+    close_archive()
+
+
+def test_replayed_detail_page_dates_from_when_it_was_recorded(archive_path):
+    fetched_at = time.time() - 10 * DAY
+    archive = open_archive(archive_path, "record")
+    archive.record(DETAIL_URL, DETAIL_PAGE, fetched_at)
+    close_archive()
+
+    open_archive(archive_path, "replay")
+    detail = ArgenpropScraper().fetch_detail(DETAIL_URL)
+
+    assert detail["fechaPublicacion"] == (date.fromtimestamp(fetched_at) - timedelta(days=3)).isoformat()
@@ -0,0 +1,36 @@
+from datetime import date, datetime, timezone
+
+from api._lib.database import fetch_existing_listings
+from api._lib.fingerprint import content_hash, normalize_date
+from api._lib.scrapers.base import BaseScraper
+from conftest import make_property
+from run_scraper import property_row
+
+
+def test_normalize_date():
+    assert normalize_date("2024-03-15") == "2024-03-15"
+    assert normalize_date("2024-03-15T00:00:00+00:00") == "2024-03-15"
+    assert normalize_date(date(2024, 3, 15)) == "2024-03-15"
+    assert normalize_date(datetime(2024, 3, 15, tzinfo=timezone.utc)) == "2024-03-15"
+    assert normalize_date(None) is None
+
+
+def test_hash_ignores_how_the_date_is_formatted():
+    row = property_row(make_property("a1", fechaPublicacion="2024-03-15"))
+    stored = dict(row, fecha_publicacion="2024-03-15T00:00:00+00:00")
+    assert content_hash(stored) == content_hash(row)
+
+
+def test_round_tripped_row_keeps_its_hash(db, supabase):
+    scraped = make_property("a1", fotos=["https://x/1.jpg", "https://x/2.jpg"], descripcion="Lindo", fechaPublicacion="2024-03-15")
+    row = property_row(scraped)
+    row["content_hash"] = content_hash(row)
+    # As PostgREST returns a TIMESTAMPTZ column
+    db.tables["propiedades"] = [dict(row, fecha_publicacion="2024-03-15T00:00:00+00:00")]
+
+    # Next run: the card is unchanged, so the stored detail fields are reused
+    stored = fetch_existing_listings(supabase, "argenprop", ["a1"])["a1"]
+    assert stored["detail"]["fechaPublicacion"] == "2024-03-15"
+    prop = BaseScraper.merge_detail(make_property("a1"), stored["detail"])
+
+    assert content_hash(property_row(prop)) == row["content_hash"]
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from api._lib.scrapers import ZonapropScraper
+from api._lib.scrapers import base
+from api._lib.scrapers import cache as cache_module
+from api._lib.scrapers.cache import close_response_cache, get_response_cache
+
+SEARCH_URL = "https://www.zonaprop.com.ar/departamentos-venta-palermo.html"
+
+
+class FakeBrowserPool:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    async def fetch(self, url, **kwargs):
+        return self.content
+
+
+@pytest.fixture
+def response_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCRAPER_CACHE", "1")
+    monkeypatch.setenv("SCRAPER_CACHE_DIR", str(tmp_path))
+    yield get_response_cache()
+    close_response_cache()
+
+
+def render(monkeypatch, content: bytes) -> bytes:
+    monkeypatch.setattr(base, "get_browser_pool", lambda: FakeBrowserPool(content))
+    return asyncio.run(ZonapropScraper()._fetch_with_playwright(SEARCH_URL))
+
+
+@pytest.mark.parametrize("content, cached", [
+    (b"<html><body><div class='postingCard'><a href='/propiedades/x-1.html'>Depto</a></div></body></html>", True),
+    (b"<html><body><div data-qa='empty-result'>No hay resultados</div></body></html>", True),
+    (b"<html><body><form>Verify you are human</form></body></html>", False),
+    (b"<html><body><div id='app'></div></body></html>", False),
+])
+def test_only_recognizable_renders_are_cached(response_cache, monkeypatch, content, cached):
+    assert render(monkeypatch, content) == content
+    assert (response_cache.lookup(SEARCH_URL, "search") is not None) is cached
+
+
+def test_closing_the_response_cache_drops_the_singleton(response_cache):
+    assert get_response_cache() is response_cache
+    close_response_cache()
+    assert cache_module._cache is None
+
+    reopened = get_response_cache()
+    assert reopened is not response_cache
+    assert reopened.lookup(SEARCH_URL, "search") is None
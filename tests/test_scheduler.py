@@ -0,0 +1,58 @@
+import pytest
+
+from api._lib.scrapers.scheduler import BarrioScheduler
+
+HOUR = 3600
+NOW = 1_000_000.0
+
+
+def visit_twice(scheduler, barrio: str, pages: int, new_listings: int, last_crawl: float):
+    """Two crawls an hour apart, the second finding new_listings new IDs"""
+    scheduler.record("argenprop", barrio, ["old"], pages, now=last_crawl - HOUR)
+    new_ids = [f"{barrio}-{i}" for i in range(new_listings)]
+    scheduler.record("argenprop", barrio, ["old"] + new_ids, pages, now=last_crawl)
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    scheduler = BarrioScheduler(str(tmp_path / "schedule.json"))
+    # Expected new listings per page, an hour after the last crawl: hot 5, big 2.5, cold 1
+    visit_twice(scheduler, "hot", pages=2, new_listings=10, last_crawl=NOW - HOUR)
+    visit_twice(scheduler, "big", pages=4, new_listings=10, last_crawl=NOW - HOUR)
+    visit_twice(scheduler, "cold", pages=1, new_listings=1, last_crawl=NOW - HOUR)
+    # Past the 48h staleness limit
+    visit_twice(scheduler, "stale", pages=1, new_listings=0, last_crawl=NOW - 50 * HOUR)
+    return scheduler
+
+
+PAGES = {"hot": 2, "big": 4, "cold": 1, "stale": 1, "new": 2}
+
+
+@pytest.mark.parametrize("budget, planned", [
+    (8, ["stale", "hot", "big", "cold"]),
+    (4, ["stale", "hot", "cold"]),      # big no longer fits; cold still does
+    (3, ["stale", "hot"]),
+    (1, ["stale"]),
+])
+def test_plan_fills_the_page_budget_overdue_first_then_by_yield(scheduler, budget, planned):
+    selected = scheduler.plan("argenprop", ["cold", "big", "hot", "stale"], budget, now=NOW)
+
+    assert selected == planned
+    assert sum(PAGES[barrio] for barrio in selected) <= budget
+
+
+def test_never_crawled_barrios_are_overdue(scheduler):
+    selected = scheduler.plan("argenprop", ["hot", "new", "stale"], 3, now=NOW)
+    assert selected == ["new", "stale"]
+
+
+def test_a_budget_below_every_unit_still_crawls_one(scheduler):
+    assert scheduler.plan("argenprop", ["big"], 2, now=NOW) == ["big"]
+
+
+def test_plan_survives_a_save_and_reload(scheduler):
+    scheduler.save()
+    reloaded = BarrioScheduler(scheduler.path)
+
+    barrios = ["cold", "big", "hot", "stale"]
+    assert reloaded.plan("argenprop", barrios, 4, now=NOW) == scheduler.plan("argenprop", barrios, 4, now=NOW)
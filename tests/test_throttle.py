@@ -0,0 +1,139 @@
+from types import SimpleNamespace
+
+import pytest
+
+from api._lib.scrapers import throttle as throttle_module
+from api._lib.scrapers.throttle import CircuitOpenError, HostController, HostThrottle, ThrottledError, TransientError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(throttle_module, "time", SimpleNamespace(
+        monotonic=clock.monotonic, sleep=clock.sleep, time=lambda: clock.now
+    ))
+    return clock
+
+
+def request(controller: HostController, clock: Clock, outcome: str, latency: float = 0.1, pause=None):
+    assert controller.try_acquire() == 0
+    started = clock.now
+    clock.now += latency
+    controller.release(outcome, started, pause=pause)
+
+
+def test_window_grows_by_one_per_window_of_successes(clock):
+    controller = HostController("example.com", max_concurrency=8)
+    assert controller.limit == 4
+
+    for _ in range(4):
+        request(controller, clock, "ok")
+    assert controller.limit == 5
+
+    for _ in range(100):
+        request(controller, clock, "ok")
+    assert controller.limit == 8
+
+
+def test_window_stops_growing_while_latency_rises(clock):
+    controller = HostController("example.com", max_concurrency=8)
+    request(controller, clock, "ok", latency=0.1)
+    for _ in range(20):
+        request(controller, clock, "ok", latency=2.0)
+    assert controller.limit == 4
+
+
+def test_window_halves_once_per_burst_of_failures(clock):
+    controller = HostController("example.com", max_concurrency=8)
+    burst = [controller.try_acquire() for _ in range(3)]
+    assert burst == [0, 0, 0]
+    started = clock.now
+    clock.now += 0.1
+
+    # Three requests of the same burst fail: only the first halves the window
+    for _ in burst:
+        controller.release("throttled", started)
+    assert controller.limit == 2
+    assert controller.stats["throttled"] == 3
+
+    request(controller, clock, "error")
+    assert controller.limit == 1
+    assert controller.stats["min_limit"] == 1
+
+
+def test_throttle_pauses_the_host_for_retry_after(clock):
+    controller = HostController("example.com", max_concurrency=8)
+    request(controller, clock, "throttled", pause=5.0)
+    assert controller.try_acquire() == pytest.approx(5.0)
+    clock.now += 5.0
+    assert controller.try_acquire() == 0
+
+
+def test_breaker_opens_probes_and_closes(clock):
+    controller = HostController("example.com", max_concurrency=8, failure_threshold=3, cooldown=10.0)
+    for _ in range(3):
+        request(controller, clock, "error")
+    assert controller.state == "open"
+    assert controller.try_acquire() == pytest.approx(10.0)
+
+    # After the cooldown, a single probe is let through
+    clock.now += 10.0
+    assert controller.try_acquire() == 0
+    assert controller.state == "half_open"
+    assert controller.try_acquire() > 0
+    controller.release("ok", clock.now)
+
+    assert controller.state == "closed"
+    assert controller.stats["circuit_trips"] == 1
+
+
+def test_breaker_gives_up_after_repeated_trips(clock):
+    controller = HostController("example.com", max_concurrency=8, failure_threshold=2, cooldown=10.0, max_trips=3)
+    for _ in range(2):
+        request(controller, clock, "error")
+    # Each failed probe trips again, with a doubled cooldown
+    for cooldown in (10.0, 20.0):
+        clock.now += cooldown
+        request(controller, clock, "error")
+
+    assert controller.state == "dead"
+    assert controller.stats["circuit_trips"] == 3
+    with pytest.raises(CircuitOpenError):
+        controller.try_acquire()
+
+
+def flaky(failures: list):
+    """A request that raises each of `failures` in turn, then succeeds"""
+    def fetch():
+        if failures:
+            raise failures.pop(0)
+        return b"ok"
+    return fetch
+
+
+def test_call_retries_transient_errors(clock):
+    throttle = HostThrottle(max_concurrency=4, max_retries=3, backoff=0)
+    assert throttle.call("https://example.com/a", flaky([TransientError("HTTP 502"), ThrottledError(429)])) == b"ok"
+
+    stats = throttle.stats()["example.com"]
+    assert stats["retries"] == 2
+    assert stats["errors"] == 1
+    assert stats["throttled"] == 1
+
+
+def test_call_gives_up_after_max_retries(clock):
+    throttle = HostThrottle(max_concurrency=4, max_retries=2, backoff=0)
+    with pytest.raises(TransientError):
+        throttle.call("https://example.com/a", flaky([TransientError("HTTP 502")] * 3))
+    assert throttle.controller("https://example.com/b").in_flight == 0
@@ -0,0 +1,41 @@
+import pytest
+
+from conftest import make_property
+from run_scraper import property_row, save_properties, upsert_rows
+
+
+def rows(count: int) -> list:
+    return [property_row(make_property(f"a{i}")) for i in range(count)]
+
+
+@pytest.mark.parametrize("status", [400, 409, 422])
+def test_a_rejected_row_only_costs_itself(db, supabase, status):
+    db.reject_status = status
+    db.rejected_ids = {"a5"}
+
+    failed = upsert_rows(supabase, rows(8))
+
+    assert [row["external_id"] for row in failed] == ["a5"]
+    assert sorted(row["external_id"] for row in db.tables["propiedades"]) == [f"a{i}" for i in range(8) if i != 5]
+    # 8 -> 4 -> 2 -> 1: one request per level on the bad row's side, one per good half
+    assert db.writes == 7
+
+
+def test_server_errors_fail_the_chunk_without_splitting(db, supabase):
+    db.down = True
+
+    failed = upsert_rows(supabase, rows(8))
+
+    assert len(failed) == 8
+    assert db.writes == 1
+
+
+def test_save_properties_reports_the_keys_that_failed(db, supabase):
+    db.rejected_ids = {"a1"}
+    properties = [make_property("a0"), make_property("a1"), make_property("a2")]
+
+    stats, failed = save_properties(properties, supabase)
+
+    assert failed == {("a1", "argenprop")}
+    assert stats["inserted"] == 2
+    assert stats["errors"] == 1